@@ -1,5 +1,5 @@
 # coding: utf-8
-from coreapi import auth, codecs, exceptions, transports, utils
+from coreapi import auth, cache, codecs, exceptions, instrumentation, pagination, transports, utils
 from coreapi.client import Client
 from coreapi.document import Array, Document, Link, Object, Error, Field
 
@@ -8,5 +8,5 @@ __version__ = '2.3.3'
 __all__ = [
     'Array', 'Document', 'Link', 'Object', 'Error', 'Field',
     'Client',
-    'auth', 'codecs', 'exceptions', 'transports', 'utils',
+    'auth', 'cache', 'codecs', 'exceptions', 'instrumentation', 'pagination', 'transports', 'utils',
 ]
@@ -0,0 +1,13 @@
+# coding: utf-8
+# Performance benchmarks for the client library. Run the full suite with:
+#
+#     python -m coreapi.benchmarks --output results.json
+#
+# And compare a later run against those results with:
+#
+#     python -m coreapi.benchmarks --baseline results.json
+#
+# Individual benchmark modules may also be run directly, for example:
+#
+#     python -m coreapi.benchmarks.codecs
+#     python -m coreapi.benchmarks.transport
@@ -0,0 +1,6 @@
+# coding: utf-8
+from coreapi.benchmarks.runner import main
+import sys
+
+
+sys.exit(main())
@@ -0,0 +1,121 @@
+# coding: utf-8
+from __future__ import print_function
+from collections import OrderedDict
+from coreapi.benchmarks.data import SIZES, make_document
+from coreapi.benchmarks.timing import measure
+from coreapi.codecs import CoreJSONCodec, JSONCodec
+from coreapi.codecs.backends import get_default_backend
+from coreapi.codecs.corejson import _primitive_to_document
+from coreapi.document import Document, Object
+import functools
+import json
+
+
+def iter_encode(codec, document):
+    """
+    Encode a document in chunks, discarding each chunk as it is produced.
+    """
+    for chunk in codec.iter_encode(document):
+        pass
+
+
+def benchmarks():
+    """
+    Yield two-tuples of (name, func) for encoding and decoding synthetic schemas.
+    """
+    corejson = CoreJSONCodec()
+    stdlib = CoreJSONCodec(backend='json')
+    lazy = CoreJSONCodec(lazy=True)
+    jsondata = JSONCodec()
+    unordered = JSONCodec(ordered=False)
+    for size in SIZES:
+        document = make_document(size)
+        content = corejson.encode(document)
+        yield 'codecs.corejson.decode.%s' % size, functools.partial(corejson.decode, content)
+        yield 'codecs.corejson.decode_lazy.%s' % size, functools.partial(lazy.decode, content)
+        yield 'codecs.corejson.encode.%s' % size, functools.partial(corejson.encode, document)
+        yield 'codecs.corejson.encode_stdlib.%s' % size, functools.partial(stdlib.encode, document)
+        yield 'codecs.corejson.iter_encode.%s' % size, functools.partial(iter_encode, corejson, document)
+        yield 'codecs.json.decode.%s' % size, functools.partial(jsondata.decode, content)
+        yield 'codecs.json.decode_unordered.%s' % size, functools.partial(unordered.decode, content)
+
+
+def decode_in_passes(content, base_url=None):
+    """
+    Decode CoreJSON by parsing it into primitives, and then converting the
+    primitives into a document, as `CoreJSONCodec` did before it built
+    documents in a single pass.
+    """
+    document = _primitive_to_document(json.loads(content.decode('utf-8')), base_url)
+    if isinstance(document, Object):
+        document = Document(content=dict(document))
+    return document
+
+
+def bench_single_pass_decode(number=5, repeat=3):
+    """
+    Compare the time to decode each size of schema in separate passes,
+    with decoding it in a single pass, both with and without pausing the
+    garbage collector.
+    """
+    codec = CoreJSONCodec()
+    paused = CoreJSONCodec(pause_gc=True)
+    results = OrderedDict()
+    for size in SIZES:
+        content = codec.encode(make_document(size))
+        scale = number * 2000 // SIZES[size]['links']
+        results[size] = {
+            'passes': measure(functools.partial(decode_in_passes, content), scale, repeat),
+            'single': measure(functools.partial(codec.decode, content), scale, repeat),
+            'pause_gc': measure(functools.partial(paused.decode, content), scale, repeat)
+        }
+    return results
+
+
+def bench_json_backends(number=5, repeat=3):
+    """
+    Compare the standard library JSON backend with the default backend,
+    when decoding plain JSON, and when encoding CoreJSON.
+    """
+    backend = get_default_backend().name
+    document = make_document('medium')
+    content = CoreJSONCodec().encode(document)
+    results = OrderedDict()
+    for name in ('json', backend):
+        results[name] = {
+            'decode': measure(functools.partial(JSONCodec(name, ordered=False).decode, content), number, repeat),
+            'encode': measure(functools.partial(CoreJSONCodec(name).encode, document), number, repeat)
+        }
+    return results
+
+
+def main():
+    from coreapi.benchmarks.transport import print_comparison
+
+    for size, results in bench_single_pass_decode().items():
+        print_comparison(
+            'CoreJSON decode, %s schema' % size,
+            ('passes', results['passes']['best']),
+            ('single', results['single']['best']),
+            per='decode'
+        )
+        print_comparison(
+            'CoreJSON decode, %s schema, pausing the garbage collector' % size,
+            ('passes', results['passes']['best']),
+            ('pause_gc', results['pause_gc']['best']),
+            per='decode'
+        )
+
+    results = bench_json_backends()
+    backend = get_default_backend().name
+    for operation in ('decode', 'encode'):
+        print_comparison(
+            'JSON backends, medium schema',
+            ('json', results['json'][operation]['best']),
+            (backend, results[backend][operation]['best']),
+            per=operation
+        )
+
+
+if __name__ == '__main__':
+    main()
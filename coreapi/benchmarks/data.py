@@ -0,0 +1,110 @@
+# coding: utf-8
+from collections import OrderedDict
+from coreapi import Document, Field, Link
+import coreschema
+
+
+# Synthetic schemas, from a handful of links up to thousands of links
+# in deeply nested sections. Every section also holds an array of data.
+SIZES = OrderedDict([
+    ('small', {'links': 10, 'depth': 1}),
+    ('medium', {'links': 200, 'depth': 3}),
+    ('large', {'links': 2000, 'depth': 6})
+])
+
+BRANCHES = 4
+ITEMS = 3
+
+# Flat documents, with many links and values in a single section.
+WIDTHS = OrderedDict([
+    ('narrow', 10),
+    ('wide', 1000)
+])
+
+
+def make_link(idx):
+    """
+    Return a link with a mix of path, query and body fields.
+    """
+    action = 'post' if (idx % 2) else 'get'
+    fields = [
+        Field(name='id', required=True, location='path', schema=coreschema.Integer(title='ID')),
+        Field(name='search', location='query', schema=coreschema.String(description='Filter the results.')),
+        Field(name='page', location='query', schema=coreschema.Integer())
+    ]
+    if action == 'post':
+        fields.append(Field(name='name', required=True, location='form', schema=coreschema.String()))
+    return Link(
+        url='/resource_%d/{id}/' % idx,
+        action=action,
+        encoding='application/json' if (action == 'post') else '',
+        title='Resource %d' % idx,
+        description='An example link.',
+        fields=fields
+    )
+
+
+def make_items(count=ITEMS):
+    return [
+        {'id': idx, 'name': 'Item %d' % idx, 'active': bool(idx % 2), 'tags': ['a', 'b']}
+        for idx in range(count)
+    ]
+
+
+def make_content(links, depth):
+    """
+    Return plain nested dictionaries, with `links` links spread over
+    sections nested `depth` levels deep.
+    """
+    content = {}
+    sections = []
+    for idx in range(links):
+        node = content
+        for level in range(depth):
+            key = 'section_%d' % ((idx // BRANCHES ** level) % BRANCHES)
+            if key not in node:
+                node[key] = {}
+                sections.append(node[key])
+            node = node[key]
+        node['link_%d' % idx] = make_link(idx)
+    for section in sections:
+        section['items'] = make_items()
+    return content
+
+
+def make_wide_document(width):
+    """
+    Return a document holding `width` links and `width` values at the top level.
+    """
+    content = {}
+    for idx in range(width):
+        content['link_%d' % idx] = make_link(idx)
+        content['value_%d' % idx] = idx
+    return Document(url='http://example.com/', title='Example API', content=content)
+
+
+def make_document(size):
+    """
+    Return a synthetic schema document of the given size.
+    """
+    return Document(
+        url='http://example.com/',
+        title='Example API',
+        content=make_content(**SIZES[size])
+    )
+
+
+def get_deepest_keys(document):
+    """
+    Return the list of keys indexing the first of the most deeply nested links.
+    """
+    keys = []
+    node = document
+    while True:
+        key = sorted(key for key in node.keys() if key.startswith('section_'))[:1]
+        if not key:
+            break
+        keys.append(key[0])
+        node = node[key[0]]
+    link_key = sorted(key for key in node.keys() if key.startswith('link_'))[0]
+    return keys + [link_key]
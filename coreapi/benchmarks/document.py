@@ -0,0 +1,47 @@
+# coding: utf-8
+from coreapi.benchmarks.data import SIZES, WIDTHS, get_deepest_keys, make_content, make_wide_document
+from coreapi.document import Document, Link
+import functools
+import itypes
+
+
+def walk(node):
+    """
+    Visit every value in a document, returning the number of values seen.
+    """
+    count = 1
+    if isinstance(node, itypes.Dict):
+        for key, value in node.items():
+            count += walk(value)
+    elif isinstance(node, itypes.List):
+        for value in node:
+            count += walk(value)
+    return count
+
+
+def iterate_keys(node):
+    for key in node:
+        pass
+
+
+def benchmarks():
+    """
+    Yield two-tuples of (name, func) for building and using documents.
+    """
+    replacement = Link(url='/replaced/')
+    for size in SIZES:
+        content = make_content(**SIZES[size])
+        document = Document(url='http://example.com/', title='Example API', content=content)
+        keys = get_deepest_keys(document)
+        yield 'document.construct.%s' % size, functools.partial(
+            Document, url='http://example.com/', title='Example API', content=content
+        )
+        yield 'document.iterate.%s' % size, functools.partial(walk, document)
+        yield 'document.set_in.%s' % size, functools.partial(document.set_in, keys, replacement)
+    for name, width in WIDTHS.items():
+        document = make_wide_document(width)
+        yield 'document.keys.%s' % name, functools.partial(iterate_keys, document)
+        yield 'document.data.%s' % name, lambda document=document: document.data
+        yield 'document.links.%s' % name, lambda document=document: document.links
+        yield 'document.set.%s' % name, functools.partial(document.set, 'value_0', replacement)
+        yield 'document.delete.%s' % name, functools.partial(document.delete, 'value_0')
@@ -0,0 +1,110 @@
+# coding: utf-8
+from __future__ import print_function
+from collections import OrderedDict
+from coreapi.benchmarks import codecs, document, transport
+from coreapi.benchmarks.timing import calibrate, measure
+from coreapi.utils import format_time
+import argparse
+import json
+import platform
+import sys
+
+
+MODULES = [codecs, document, transport]
+DEFAULT_THRESHOLD = 0.1
+
+
+def run(pattern=None, repeat=5, target=0.1, modules=None, progress=None):
+    """
+    Run each benchmark with a name containing `pattern`, and return an
+    ordered dictionary of timings, keyed by benchmark name.
+
+    The number of calls in each repetition is chosen so that each
+    repetition takes roughly `target` seconds.
+    """
+    results = OrderedDict()
+    for module in (MODULES if modules is None else modules):
+        for name, func in module.benchmarks():
+            if pattern and pattern not in name:
+                continue
+            number = calibrate(func, target)
+            results[name] = measure(func, number, repeat)
+            if progress is not None:
+                progress(name, results[name])
+    return results
+
+
+def get_report(results):
+    """
+    Return a machine-readable report of the results, including details of
+    the environment they were measured in.
+    """
+    import coreapi
+
+    return OrderedDict([
+        ('coreapi', coreapi.__version__),
+        ('python', platform.python_version()),
+        ('implementation', platform.python_implementation()),
+        ('platform', platform.platform()),
+        ('results', results)
+    ])
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """
+    Compare the best timings against those in a baseline report.
+
+    Returns a list of three-tuples of (name, baseline, change), where
+    `change` is the relative change in time, for each benchmark that was
+    slower than the baseline by more than `threshold`.
+    """
+    regressions = []
+    baseline_results = baseline.get('results', {})
+    for name, timing in results.items():
+        if name not in baseline_results:
+            continue
+        before = baseline_results[name]['best']
+        change = (timing['best'] - before) / before
+        if change > threshold:
+            regressions.append((name, before, change))
+    return regressions
+
+
+def print_result(name, timing):
+    print('%-40s %10s  (mean %s, %d x %d)' % (
+        name, format_time(timing['best']), format_time(timing['mean']), timing['repeat'], timing['number']
+    ), file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m coreapi.benchmarks', description='Run the benchmark suite.')
+    parser.add_argument('pattern', nargs='?', help='Only run benchmarks with names containing this text.')
+    parser.add_argument('-o', '--output', help='Write the results to this file, as JSON.')
+    parser.add_argument('-b', '--baseline', help='Compare the results against a previous JSON results file.')
+    parser.add_argument('-t', '--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='Report benchmarks this much slower than the baseline as regressions. (default: 0.1)')
+    parser.add_argument('-r', '--repeat', type=int, default=5, help='Number of repetitions. (default: 5)')
+    parser.add_argument('--quick', action='store_true', help='Run fewer, shorter repetitions.')
+    args = parser.parse_args(argv)
+
+    repeat, target = (3, 0.01) if args.quick else (args.repeat, 0.1)
+    results = run(args.pattern, repeat=repeat, target=target, progress=print_result)
+    report = get_report(results)
+
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(report, output, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+        regressions = compare(results, baseline, args.threshold)
+        for name, before, change in regressions:
+            print('Regression: %s %s -> %s (+%.1f%%)' % (
+                name, format_time(before), format_time(results[name]['best']), change * 100
+            ), file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
@@ -0,0 +1,66 @@
+# coding: utf-8
+import threading
+
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+except ImportError:  # Python 2
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+
+
+DEFAULT_CONTENT = b'{"_type": "document", "_meta": {"url": "/"}, "example": 123}'
+
+
+class StubRequestHandler(BaseHTTPRequestHandler):
+    """
+    Responds to every request with the server's fixed content.
+    """
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def handle_request(self):
+        length = int(self.headers.get('Content-Length', 0))
+        if length:
+            self.rfile.read(length)
+        content = self.server.content
+        self.send_response(200)
+        self.send_header('Content-Type', self.server.content_type)
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = handle_request
+
+    def log_message(self, *args):
+        pass
+
+
+class StubServer(ThreadingMixIn, HTTPServer):
+    """
+    A local HTTP server, run in a background thread, for end-to-end benchmarks.
+
+        with StubServer() as server:
+            client.get(server.url)
+    """
+    daemon_threads = True
+
+    def __init__(self, content=DEFAULT_CONTENT, content_type='application/coreapi+json'):
+        HTTPServer.__init__(self, ('127.0.0.1', 0), StubRequestHandler)
+        self.content = content
+        self.content_type = content_type
+        self._thread = None
+
+    @property
+    def url(self):
+        return 'http://127.0.0.1:%d/' % self.server_address[1]
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self.serve_forever, kwargs={'poll_interval': 0.01})
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self.shutdown()
+        self.server_close()
@@ -0,0 +1,37 @@
+# coding: utf-8
+from coreapi.compat import monotonic
+
+
+def measure(func, number=1000, repeat=5):
+    """
+    Call `func` `number` times, repeated `repeat` times, and return a
+    dictionary with the best and mean time per call, in seconds.
+    """
+    timings = []
+    for idx in range(repeat):
+        start = monotonic()
+        for _ in range(number):
+            func()
+        timings.append((monotonic() - start) / number)
+    return {
+        'best': min(timings),
+        'mean': sum(timings) / len(timings),
+        'number': number,
+        'repeat': repeat
+    }
+
+
+def calibrate(func, target=0.1, maximum=100000):
+    """
+    Return the number of calls to `func` that take roughly `target` seconds.
+    """
+    number = 1
+    while number < maximum:
+        start = monotonic()
+        for _ in range(number):
+            func()
+        elapsed = monotonic() - start
+        if elapsed >= target / 10.0:
+            break
+        number *= 10
+    return max(1, min(maximum, int(number * target / max(elapsed, 1e-9))))
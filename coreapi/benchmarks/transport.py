@@ -0,0 +1,113 @@
+# coding: utf-8
+from __future__ import print_function
+from coreapi.benchmarks.data import make_link
+from coreapi.benchmarks.server import DEFAULT_CONTENT, StubServer
+from coreapi.benchmarks.timing import measure
+from coreapi.codecs import CoreJSONCodec
+from coreapi.document import Link
+from coreapi.transports import HTTPTransport, WSGITransport
+from coreapi.transports.http import _build_http_request, _get_headers, _get_params
+from coreapi.utils import format_time
+import functools
+
+
+def bench_environment_settings(number=1000, repeat=5):
+    """
+    Compare the per-request time of transitions against a local server,
+    with and without caching the environment settings.
+    """
+    decoders = [CoreJSONCodec()]
+    results = {}
+    with StubServer() as server:
+        link = Link(url=server.url)
+        for cache_environment in (False, True):
+            transport = HTTPTransport(cache_environment=cache_environment)
+            transport.transition(link, decoders)  # Warm up the connection pool.
+            name = 'cached' if cache_environment else 'uncached'
+            results[name] = measure(lambda: transport.transition(link, decoders), number, repeat)
+    return results
+
+
+def stub_application(environ, start_response):
+    start_response('200 OK', [('Content-Type', 'application/coreapi+json')])
+    return [DEFAULT_CONTENT]
+
+
+def bench_wsgi_transport(number=1000, repeat=5):
+    """
+    Compare the per-request time of transitions over loopback TCP, with
+    calling a WSGI application in-process.
+    """
+    decoders = [CoreJSONCodec()]
+    results = {}
+    with StubServer() as server:
+        link = Link(url=server.url)
+        transport = HTTPTransport()
+        transport.transition(link, decoders)
+        results['http'] = measure(lambda: transport.transition(link, decoders), number, repeat)
+
+    link = Link(url='http://testserver/')
+    transport = WSGITransport(stub_application)
+    results['wsgi'] = measure(lambda: transport.transition(link, decoders), number, repeat)
+    return results
+
+
+def benchmarks():
+    """
+    Yield two-tuples of (name, func) for building requests, and for
+    transitions against a local stub server.
+    """
+    decoders = [CoreJSONCodec()]
+    link = make_link(1)
+    params = {'id': 1, 'search': 'example', 'page': 2, 'name': 'Example'}
+    yield 'transport.get_params', functools.partial(
+        _get_params, 'POST', 'application/json', link.fields, params
+    )
+
+    transport = HTTPTransport()
+    url = 'http://example.com/resource_1/1/'
+    headers = _get_headers(url, decoders)
+    get_params = {'search': 'example', 'page': 2}
+    for method, encoding, fields in (('GET', '', get_params), ('POST', 'application/json', params)):
+        request_params = _get_params(method, encoding, link.fields, fields)
+        yield 'transport.build_request.%s' % method.lower(), functools.partial(
+            _build_http_request, transport._session, url, method, headers, encoding, request_params
+        )
+
+    with StubServer() as server:
+        get_link = Link(url=server.url)
+        post_link = Link(url=server.url + 'resource_1/{id}/', action='post', encoding='application/json', fields=link.fields)
+        transport.transition(get_link, decoders)
+        yield 'transport.transition.get', functools.partial(transport.transition, get_link, decoders)
+        yield 'transport.transition.post', functools.partial(transport.transition, post_link, decoders, params)
+
+    wsgi_link = Link(url='http://testserver/')
+    wsgi_transport = WSGITransport(stub_application)
+    yield 'transport.transition.wsgi', functools.partial(wsgi_transport.transition, wsgi_link, decoders)
+
+
+def print_comparison(title, before, after, per='request'):
+    print('%s, per %s:' % (title, per))
+    for name, seconds in (before, after):
+        print('  %-9s %s' % (name + ':', format_time(seconds)))
+    saving = before[1] - after[1]
+    print('  saving:   %s (%.1f%%)' % (format_time(saving), 100.0 * saving / before[1]))
+
+
+def main():
+    results = bench_environment_settings()
+    print_comparison(
+        'Environment settings',
+        ('uncached', results['uncached']['best']),
+        ('cached', results['cached']['best'])
+    )
+    results = bench_wsgi_transport()
+    print_comparison(
+        'In-process WSGI',
+        ('http', results['http']['best']),
+        ('wsgi', results['wsgi']['best'])
+    )
+
+
+if __name__ == '__main__':
+    main()
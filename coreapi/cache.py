@@ -0,0 +1,306 @@
+# coding: utf-8
+from collections import OrderedDict, namedtuple
+import copy
+import email.utils
+import hashlib
+import itypes
+import os
+import pickle
+import tempfile
+import threading
+import time
+
+
+# Cache entries hold the decoded result of a response, together with the
+# information required to determine freshness and to revalidate the response.
+
+CacheEntry = namedtuple('CacheEntry', ['result', 'accept', 'etag', 'last_modified', 'expires', 'size'])
+
+
+def _parse_cache_control(value):
+    """
+    Parse a 'Cache-Control' header into a dictionary of directives.
+    """
+    directives = {}
+    for item in (value or '').split(','):
+        name, sep, argument = item.strip().partition('=')
+        if name:
+            directives[name.lower()] = argument.strip('"') if sep else None
+    return directives
+
+
+def _parse_http_date(value):
+    """
+    Parse an HTTP date header into a timestamp, or `None` if it is invalid.
+    """
+    if not value:
+        return None
+    parsed = email.utils.parsedate_tz(value)
+    if parsed is None:
+        return None
+    return email.utils.mktime_tz(parsed)
+
+
+def _parse_int(value):
+    try:
+        return max(int(value), 0)
+    except (TypeError, ValueError):
+        return None
+
+
+def _get_expiry(headers, now):
+    """
+    Return the time at which a response becomes stale, based on the
+    'Cache-Control', 'Expires', 'Date' and 'Age' headers.
+    """
+    cache_control = _parse_cache_control(headers.get('cache-control'))
+    if 'no-cache' in cache_control:
+        return now
+
+    age = _parse_int(headers.get('age')) or 0
+    max_age = _parse_int(cache_control.get('max-age'))
+    if max_age is not None:
+        return now + max_age - age
+
+    expires = _parse_http_date(headers.get('expires'))
+    if expires is not None:
+        date = _parse_http_date(headers.get('date')) or now
+        return now + (expires - date) - age
+
+    # No explicit freshness information. The response must be revalidated.
+    return now
+
+
+def get_cache_key(request):
+    """
+    Return the key to use when caching the response to the given request.
+    """
+    return request.url
+
+
+def is_fresh(entry, now=None):
+    now = time.time() if (now is None) else now
+    return entry.expires > now
+
+
+def get_conditional_headers(entry):
+    """
+    Return the headers to use when revalidating a stale cache entry.
+    """
+    headers = {}
+    if entry.etag:
+        headers['If-None-Match'] = entry.etag
+    if entry.last_modified:
+        headers['If-Modified-Since'] = entry.last_modified
+    return headers
+
+
+def create_entry(response, result, accept, now=None):
+    """
+    Return a new cache entry for a decoded response, or `None` if the
+    response may not be stored.
+    """
+    now = time.time() if (now is None) else now
+    if response.status_code != 200:
+        return None
+    if hasattr(result, 'read'):
+        # Downloaded files are not cached.
+        return None
+
+    headers = response.headers
+    cache_control = _parse_cache_control(headers.get('cache-control'))
+    if 'no-store' in cache_control or headers.get('vary', '').strip() == '*':
+        return None
+
+    etag = headers.get('etag')
+    last_modified = headers.get('last-modified')
+    expires = _get_expiry(headers, now)
+    if expires <= now and not (etag or last_modified):
+        # Stale immediately, and no way to revalidate. No point storing.
+        return None
+
+    return CacheEntry(
+        result=result,
+        accept=accept,
+        etag=etag,
+        last_modified=last_modified,
+        expires=expires,
+        size=len(response.content)
+    )
+
+
+def update_entry(entry, response, now=None):
+    """
+    Given a '304 Not Modified' response, return the updated cache entry.
+    """
+    now = time.time() if (now is None) else now
+    headers = response.headers
+    return entry._replace(
+        etag=headers.get('etag', entry.etag),
+        last_modified=headers.get('last-modified', entry.last_modified),
+        expires=_get_expiry(headers, now)
+    )
+
+
+def copy_result(result):
+    """
+    Documents are immutable, and may be shared. Plain data is copied, so that
+    modifying a result does not alter the cached version.
+    """
+    if isinstance(result, (dict, list)):
+        return copy.deepcopy(result)
+    return result
+
+
+# Cache backends.
+
+class BaseCache(itypes.Object):
+    def get(self, key):
+        raise NotImplementedError()  # pragma: nocover
+
+    def set(self, key, entry):
+        raise NotImplementedError()  # pragma: nocover
+
+    def delete(self, key):
+        raise NotImplementedError()  # pragma: nocover
+
+    def clear(self):
+        raise NotImplementedError()  # pragma: nocover
+
+
+class MemoryCache(BaseCache):
+    """
+    An in-memory cache, evicting the least recently used entries once
+    either `max_entries` or `max_size` (in bytes of response content)
+    is exceeded.
+    """
+    def __init__(self, max_entries=1000, max_size=None):
+        self._max_entries = max_entries
+        self._max_size = max_size
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._entries[key] = entry
+            return entry
+
+    def set(self, key, entry):
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= previous.size
+            self._entries[key] = entry
+            self._size += entry.size
+            while self._entries and self._is_full():
+                evicted_key, evicted = self._entries.popitem(last=False)
+                self._size -= evicted.size
+
+    def _is_full(self):
+        if self._max_entries is not None and len(self._entries) > self._max_entries:
+            return True
+        return self._max_size is not None and self._size > self._max_size
+
+    def delete(self, key):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._size -= entry.size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+
+class FileCache(BaseCache):
+    """
+    An on-disk cache, storing one pickled entry per file. Evicts the least
+    recently used entries once the total size of the cache directory
+    exceeds `max_size` bytes.
+
+    Entries are unpickled when read, so anyone who can write to the cache
+    directory can run code in the client. The directory is created readable
+    and writable only by the current user, and must not be shared.
+    """
+    suffix = '.cache'
+
+    def __init__(self, directory, max_size=100 * 1024 * 1024):
+        if not os.path.exists(directory):
+            os.makedirs(directory, 0o700)
+        self._directory = directory
+        self._max_size = max_size
+        self._lock = threading.Lock()
+
+    @property
+    def directory(self):
+        return self._directory
+
+    def _get_path(self, key):
+        digest = hashlib.sha256(key.encode('utf-8')).hexdigest()
+        return os.path.join(self._directory, digest + self.suffix)
+
+    def get(self, key):
+        path = self._get_path(key)
+        try:
+            with open(path, 'rb') as cache_file:
+                stored_key, entry = pickle.load(cache_file)
+            os.utime(path, None)
+        except (IOError, OSError, EOFError, ValueError, pickle.UnpicklingError):
+            return None
+        if stored_key != key:
+            return None
+        return entry
+
+    def set(self, key, entry):
+        path = self._get_path(key)
+        fd, temp_path = tempfile.mkstemp(dir=self._directory, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as temp_file:
+            pickle.dump((key, entry), temp_file, pickle.HIGHEST_PROTOCOL)
+        os.rename(temp_path, path)
+        self._evict()
+
+    def delete(self, key):
+        try:
+            os.remove(self._get_path(key))
+        except OSError:
+            pass
+
+    def clear(self):
+        for path, stat in self._list():
+            try:
+                os.remove(path)
+            except OSError:  # pragma: nocover
+                pass
+
+    def _list(self):
+        items = []
+        for filename in os.listdir(self._directory):
+            if filename.endswith(self.suffix):
+                path = os.path.join(self._directory, filename)
+                try:
+                    items.append((path, os.stat(path)))
+                except OSError:  # pragma: nocover
+                    pass
+        return items
+
+    def _evict(self):
+        if self._max_size is None:
+            return
+        with self._lock:
+            items = sorted(self._list(), key=lambda item: item[1].st_mtime)
+            total = sum([stat.st_size for path, stat in items])
+            for path, stat in items:
+                if total <= self._max_size:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:  # pragma: nocover
+                    pass
+                total -= stat.st_size
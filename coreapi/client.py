@@ -1,6 +1,8 @@
-from coreapi import codecs, exceptions, transports
-from coreapi.compat import string_types
+from coreapi import codecs, exceptions, instrumentation, transports
+from coreapi.compat import futures, string_types
 from coreapi.document import Document, Link
+from coreapi.pagination import PageIterator, ParallelPageIterator, get_next_link, iter_items
+from coreapi.stats import ClientStats
 from coreapi.utils import determine_transport, get_installed_codecs
 import collections
 import itypes
@@ -8,6 +10,10 @@ import itypes
 
 LinkAncestor = collections.namedtuple('LinkAncestor', ['document', 'keys'])
 
+# Matches the default number of pooled connections per host used by `requests`,
+# so that concurrent calls to a single host reuse pooled connections.
+DEFAULT_MAX_WORKERS = 10
+
 
 def _lookup_link(document, keys):
     """
@@ -89,14 +95,23 @@ def get_default_decoders():
     ]
 
 
-def get_default_transports(auth=None, session=None):
-    return [
+def get_default_transports(auth=None, session=None, unix_sockets=False):
+    default_transports = [
         transports.HTTPTransport(auth=auth, session=session)
     ]
+    if unix_sockets:
+        assert transports.UnixSocketTransport is not None, (
+            'Unix domain sockets are not supported on this platform.'
+        )
+        # Uses its own session, so that no adapter is mounted on the
+        # caller's session.
+        default_transports.append(transports.UnixSocketTransport(auth=auth))
+    return default_transports
 
 
 class Client(itypes.Object):
-    def __init__(self, decoders=None, transports=None, auth=None, session=None):
+    def __init__(self, decoders=None, transports=None, auth=None, session=None, stats=False,
+                 unix_sockets=False):
         assert transports is None or auth is None, (
             "Cannot specify both 'auth' and 'transports'. "
             "When specifying transport instances explicitly you should set "
@@ -105,9 +120,10 @@ class Client(itypes.Object):
         if decoders is None:
             decoders = get_default_decoders()
         if transports is None:
-            transports = get_default_transports(auth=auth, session=session)
+            transports = get_default_transports(auth=auth, session=session, unix_sockets=unix_sockets)
         self._decoders = itypes.List(decoders)
         self._transports = itypes.List(transports)
+        self._stats = ClientStats() if stats else None
 
     @property
     def decoders(self):
@@ -117,7 +133,12 @@ class Client(itypes.Object):
     def transports(self):
         return self._transports
 
-    def get(self, url, format=None, force_codec=False):
+    def _prepare_get(self, url, format=None, force_codec=False):
+        """
+        Determine the link, transport and decoders to use for a `get()`.
+
+        Returns a four-tuple of (transport, link, decoders, options).
+        """
         link = Link(url, action='get')
 
         decoders = self.decoders
@@ -131,16 +152,16 @@ class Client(itypes.Object):
                 else:
                     raise ValueError("No decoder available with format='%s'" % format)
 
-        # Perform the action, and return a new document.
         transport = determine_transport(self.transports, link.url)
-        return transport.transition(link, decoders, force_codec=force_codec)
+        return (transport, link, decoders, {'force_codec': force_codec})
 
-    def reload(self, document, format=None, force_codec=False):
-        # Fallback for v1.x. To be removed in favour of explict `get` style.
-        return self.get(document.url, format=format, force_codec=force_codec)
+    def _prepare_action(self, document, keys, params=None, validate=True, overrides=None,
+                        action=None, encoding=None, transform=None):
+        """
+        Validate an `action()` call, and determine the link and transport to use.
 
-    def action(self, document, keys, params=None, validate=True, overrides=None,
-               action=None, encoding=None, transform=None):
+        Returns a four-tuple of (transport, link, decoders, options).
+        """
         if (action is not None) or (encoding is not None) or (transform is not None):
             # Fallback for v1.x overrides.
             # Will be removed at some point, most likely in a 2.1 release.
@@ -160,9 +181,11 @@ class Client(itypes.Object):
             params = {}
 
         # Validate the keys and link parameters.
-        link, link_ancestors = _lookup_link(document, keys)
+        with instrumentation.phase('lookup_link'):
+            link, link_ancestors = _lookup_link(document, keys)
         if validate:
-            _validate_parameters(link, params)
+            with instrumentation.phase('validate_parameters'):
+                _validate_parameters(link, params)
 
         if overrides:
             # Handle any explicit overrides.
@@ -173,6 +196,160 @@ class Client(itypes.Object):
             fields = overrides.get('fields', link.fields)
             link = Link(url, action=action, encoding=encoding, transform=transform, fields=fields)
 
-        # Perform the action, and return a new document.
         transport = determine_transport(self.transports, link.url)
-        return transport.transition(link, self.decoders, params=params, link_ancestors=link_ancestors)
+        options = {'params': params, 'link_ancestors': link_ancestors}
+        return (transport, link, self.decoders, options)
+
+    def stats(self, reset=False):
+        """
+        Return a dictionary of request statistics, keyed by the action and URL
+        template of each link. Requires the client to be created with `stats=True`.
+        """
+        assert self._stats is not None, (
+            "The client must be instantiated with 'stats=True' to collect statistics."
+        )
+        return self._stats.snapshot(reset=reset)
+
+    def _transition(self, kind, transport, link, decoders, **options):
+        with instrumentation.transition(kind, self._stats) as record:
+            if record is not None:
+                record.link = link
+            return transport.transition(link, decoders, **options)
+
+    def get(self, url, format=None, force_codec=False):
+        # Perform the action, and return a new document.
+        with instrumentation.transition('get', self._stats) as record:
+            transport, link, decoders, options = self._prepare_get(url, format, force_codec)
+            if record is not None:
+                record.link = link
+            return transport.transition(link, decoders, **options)
+
+    def reload(self, document, format=None, force_codec=False):
+        # Fallback for v1.x. To be removed in favour of explict `get` style.
+        return self.get(document.url, format=format, force_codec=force_codec)
+
+    def action(self, document, keys, params=None, validate=True, overrides=None,
+               action=None, encoding=None, transform=None):
+        # Perform the action, and return a new document.
+        with instrumentation.transition('action', self._stats) as record:
+            transport, link, decoders, options = self._prepare_action(
+                document, keys, params, validate, overrides, action, encoding, transform
+            )
+            if record is not None:
+                record.link = link
+            return transport.transition(link, decoders, **options)
+
+    def action_many(self, document, calls, validate=True, max_workers=None):
+        """
+        Perform a batch of actions concurrently, using a pool of threads.
+
+        `calls` is a list of (keys, params) two-tuples. Every call is validated
+        before any requests are made. Returns a list of results in the same
+        order as `calls`, with the exception instance in place of the result
+        for any call that failed.
+        """
+        assert futures is not None, (
+            "The 'futures' package must be installed to use 'action_many' on Python 2."
+        )
+        prepared = [
+            self._prepare_action(document, keys, params, validate)
+            for keys, params in calls
+        ]
+        if not prepared:
+            return []
+
+        if max_workers is None:
+            max_workers = min(len(prepared), DEFAULT_MAX_WORKERS)
+
+        with futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            pending = [
+                executor.submit(self._transition, 'action', transport, link, decoders, **options)
+                for transport, link, decoders, options in prepared
+            ]
+
+        results = []
+        for future in pending:
+            exc = future.exception()
+            results.append(future.result() if exc is None else exc)
+        return results
+
+    def paginate(self, document, keys, params=None, validate=True, prefetch=1, items_key=None,
+                 max_workers=None, ordered=True):
+        """
+        Perform the action, and yield each item from the returned page, and
+        from every following page.
+
+        The next page is found from the `next` link or URL in each page, and
+        up to `prefetch` pages are fetched in the background while the current
+        page is being handled. Set `prefetch=0` to fetch pages sequentially.
+
+        If `max_workers` is set, and the first page includes a total count,
+        then the remaining pages are fetched concurrently instead, using the
+        link's `page` or `offset` field. Pages are yielded in order, unless
+        `ordered=False`, in which case they are yielded as they complete.
+        """
+        transport, link, decoders, options = self._prepare_action(document, keys, params, validate)
+
+        def fetch(params):
+            return self._transition('paginate', transport, link, decoders, params=params)
+
+        def fetch_next(page):
+            next_link = get_next_link(page)
+            if next_link is None:
+                return None
+            next_transport = determine_transport(self.transports, next_link.url)
+            return self._transition('paginate', next_transport, next_link, decoders)
+
+        if max_workers is None:
+            pages = PageIterator(lambda: fetch(options['params']), fetch_next, prefetch=prefetch)
+        else:
+            pages = ParallelPageIterator(
+                fetch, fetch_next, link, options['params'], max_workers, ordered, items_key
+            )
+        return iter_items(pages, items_key)
+
+    def stream(self, document, keys, params=None, path=None, validate=True):
+        """
+        Perform the action, and yield each item of the array at `path` in the
+        response as soon as it has been received and decoded, rather than
+        once the whole response has been read.
+
+        `path` is a list of object keys and array indexes, leading from the
+        top of the response to the array, such as `['results']`. By default
+        the response must be an array.
+
+        Any statistics record the time until the response headers are received.
+        """
+        transport, link, decoders, options = self._prepare_action(document, keys, params, validate)
+        assert hasattr(transport, 'stream'), (
+            'The %s transport does not support streaming.' % transport.__class__.__name__
+        )
+        if path is None:
+            path = []
+        elif isinstance(path, string_types):
+            path = [path]
+
+        def stream():
+            with instrumentation.transition('stream', self._stats) as record:
+                if record is not None:
+                    record.link = link
+                items = transport.stream(link, decoders, params=options['params'], path=path)
+            for item in items:
+                yield item
+
+        return stream()
+
+    # Asynchronous interface. These methods return awaitables, and require
+    # Python 3.5+. Transports that provide a `transition_async` coroutine are
+    # used natively, any others are run in the event loop's default executor.
+
+    def get_async(self, url, format=None, force_codec=False):
+        from coreapi.transports.asynchttp import transition_async
+        return transition_async(self._prepare_get, url, format, force_codec)
+
+    def reload_async(self, document, format=None, force_codec=False):
+        return self.get_async(document.url, format=format, force_codec=force_codec)
+
+    def action_async(self, document, keys, params=None, validate=True, overrides=None):
+        from coreapi.transports.asynchttp import transition_async
+        return transition_async(self._prepare_action, document, keys, params, validate, overrides)
@@ -0,0 +1,177 @@
+# coding: utf-8
+from collections import OrderedDict
+from coreapi.compat import COMPACT_SEPARATORS, VERBOSE_SEPARATORS, force_bytes
+import json
+import math
+import sys
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+
+# JSON parsing and serialization, for the JSON based codecs. By default the
+# fastest installed library is used, falling back to the standard library.
+#
+# Every backend accepts the same input as the standard library, and returns
+# the same result. Where a faster library rejects some input, such as the
+# 'NaN' literal or very large integers, or would encode it differently, the
+# standard library is used instead.
+#
+# Parsing with an `object_hook`, or into ordered dictionaries, always uses the
+# standard library, which calls hooks from C as it parses. Applying them in
+# a separate pass over the output of a faster library is no quicker.
+
+# The standard library only parses bytes directly on Python 3.6+.
+_PARSES_BYTES = sys.version_info >= (3, 6) or sys.version_info[0] == 2
+
+
+def _is_finite(data):
+    """
+    Return `False` if the data contains any NaN or infinite floats.
+    """
+    if isinstance(data, float):
+        return not (math.isnan(data) or math.isinf(data))
+    if isinstance(data, dict):
+        data = data.values()
+    elif not isinstance(data, (list, tuple)):
+        return True
+    for value in data:
+        if not _is_finite(value):
+            return False
+    return True
+
+
+def _ordered(object_hook):
+    if object_hook is None:
+        return OrderedDict
+    return lambda pairs: object_hook(OrderedDict(pairs))
+
+
+class StandardJSONBackend(object):
+    """
+    Uses the standard library `json` module.
+    """
+    name = 'json'
+    available = True
+
+    def loads(self, bytestring, object_hook=None, ordered=False):
+        """
+        Parse UTF-8 encoded JSON. Each object is returned as a `dict`, or as
+        an `OrderedDict` if `ordered` is set, and is then passed to
+        `object_hook`, if given. Raises `ValueError` for malformed JSON.
+        """
+        if not _PARSES_BYTES:  # pragma: nocover
+            bytestring = bytestring.decode('utf-8')
+        if ordered:
+            return json.loads(bytestring, object_pairs_hook=_ordered(object_hook))
+        return json.loads(bytestring, object_hook=object_hook)
+
+    def dumps(self, data, indent=False):
+        """
+        Return UTF-8 encoded JSON, either compact or indented.
+        """
+        if indent:
+            content = json.dumps(data, ensure_ascii=False, indent=4, separators=VERBOSE_SEPARATORS)
+        else:
+            content = json.dumps(data, ensure_ascii=False, separators=COMPACT_SEPARATORS)
+        return force_bytes(content)
+
+
+class OrjsonBackend(StandardJSONBackend):
+    """
+    Uses the `orjson` package, which parses bytes directly.
+    """
+    name = 'orjson'
+    available = orjson is not None
+
+    def loads(self, bytestring, object_hook=None, ordered=False):
+        if object_hook is None and not ordered:
+            try:
+                return orjson.loads(bytestring)
+            except ValueError:
+                pass
+        return super(OrjsonBackend, self).loads(bytestring, object_hook, ordered)
+
+    def dumps(self, data, indent=False):
+        if not indent:
+            # Indented output uses the standard library, as `orjson` only
+            # supports a two space indent. So does any data with NaN or
+            # infinite floats, which `orjson` writes as `null`.
+            try:
+                content = orjson.dumps(data)
+            except TypeError:
+                pass
+            else:
+                if b'null' not in content or _is_finite(data):
+                    return content
+        return super(OrjsonBackend, self).dumps(data, indent)
+
+
+class UjsonBackend(StandardJSONBackend):
+    """
+    Uses the `ujson` package.
+    """
+    name = 'ujson'
+    available = ujson is not None
+
+    def loads(self, bytestring, object_hook=None, ordered=False):
+        if object_hook is None and not ordered:
+            try:
+                return ujson.loads(bytestring)
+            except ValueError:
+                pass
+        return super(UjsonBackend, self).loads(bytestring, object_hook, ordered)
+
+    def dumps(self, data, indent=False):
+        if not indent:
+            try:
+                return force_bytes(ujson.dumps(data, ensure_ascii=False, escape_forward_slashes=False))
+            except (TypeError, OverflowError):
+                pass
+        return super(UjsonBackend, self).dumps(data, indent)
+
+
+# In order of preference.
+BACKENDS = OrderedDict([
+    (backend_class.name, backend_class)
+    for backend_class in (OrjsonBackend, UjsonBackend, StandardJSONBackend)
+])
+
+_default_backend = None
+
+
+def get_backend(name=None):
+    """
+    Return the JSON backend with the given name, or the default backend.
+    """
+    if name is None:
+        return get_default_backend()
+    assert name in BACKENDS, 'Unknown JSON backend %s. Must be one of %s.' % (repr(name), ', '.join(BACKENDS))
+    backend_class = BACKENDS[name]
+    assert backend_class.available, "The '%s' package must be installed to use its JSON backend." % name
+    return backend_class()
+
+
+def get_default_backend():
+    global _default_backend
+    if _default_backend is None:
+        _default_backend = [
+            backend_class() for backend_class in BACKENDS.values()
+            if backend_class.available
+        ][0]
+    return _default_backend
+
+
+def set_default_backend(name):
+    """
+    Set the JSON backend used by codecs that are not given one explicitly.
+    """
+    global _default_backend
+    _default_backend = get_backend(name)
@@ -1,11 +1,14 @@
 from __future__ import unicode_literals
 from collections import OrderedDict
+from coreapi.codecs.backends import get_backend, get_default_backend
 from coreapi.codecs.base import BaseCodec
-from coreapi.compat import force_bytes, string_types, urlparse
-from coreapi.compat import COMPACT_SEPARATORS, VERBOSE_SEPARATORS
-from coreapi.document import Document, Link, Array, Object, Error, Field
+from coreapi.compat import string_types, urlparse
+from coreapi.document import Document, Link, Array, Object, Error, Field, _new
 from coreapi.exceptions import ParseError
+from coreapi.streaming import iter_array
 import coreschema
+import functools
+import gc
 import json
 
 
@@ -230,6 +233,152 @@ def _document_to_primitive(node, base_url=None):
     return node
 
 
+# Streaming encoding.
+#
+# Walks the document and yields the JSON encoding a piece at a time, giving
+# exactly the same output as encoding the result of `_document_to_primitive`
+# with the standard library, but without first building that primitive tree.
+# This is slower than `encode()`, even with the standard library backend, as
+# the walk is done in Python rather than by the backend's encoder.
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+_encode_string = json.encoder.encode_basestring
+_encode_value = json.JSONEncoder(ensure_ascii=False).encode
+
+
+def _iter_node_items(node, base_url=None):
+    """
+    Yield the (key, value, base_url) items of a node, in the same order as
+    `_document_to_primitive`.
+    """
+    if isinstance(node, Document):
+        yield ('_type', 'document', None)
+        meta = OrderedDict()
+        url = _graceful_relative_url(base_url, node.url)
+        if url:
+            meta['url'] = url
+        if node.title:
+            meta['title'] = node.title
+        if node.description:
+            meta['description'] = node.description
+        if meta:
+            yield ('_meta', meta, None)
+        for key, value in node.items():
+            yield (_escape_key(key), value, url)
+
+    elif isinstance(node, Error):
+        yield ('_type', 'error', None)
+        if node.title:
+            yield ('_meta', {'title': node.title}, None)
+        for key, value in node.items():
+            yield (_escape_key(key), value, base_url)
+
+    elif isinstance(node, Link):
+        yield ('_type', 'link', None)
+        url = _graceful_relative_url(base_url, node.url)
+        if url:
+            yield ('url', url, None)
+        for key in ('action', 'encoding', 'transform', 'title', 'description'):
+            value = getattr(node, key)
+            if value:
+                yield (key, value, None)
+        if node.fields:
+            yield ('fields', node.fields, None)
+
+    elif isinstance(node, Field):
+        yield ('name', node.name, None)
+        if node.required:
+            yield ('required', node.required, None)
+        if node.location:
+            yield ('location', node.location, None)
+        if node.schema:
+            yield ('schema', encode_schema_to_corejson(node.schema), None)
+
+    elif isinstance(node, Object):
+        for key, value in node.items():
+            yield (_escape_key(key), value, base_url)
+
+    else:
+        for key, value in node.items():
+            if not isinstance(key, string_types):
+                key = json.dumps(key)
+            yield (key, value, None)
+
+
+_NODE_TYPES = (Document, Error, Link, Field, Object, dict)
+_LIST_TYPES = (Array, list, tuple)
+
+
+def _iter_encode(node, indent=False):
+    """
+    Yield the encoding of a node as strings.
+
+    Uses an explicit stack rather than recursion, so that each string is
+    yielded directly, however deeply it is nested.
+    """
+    key_separator = ': ' if indent else ':'
+    # Each frame is [items, opening, closing, level, empty].
+    frame = [iter([(None, node, None)]), '', '', -1, False]
+    stack = []
+    while True:
+        items, opening, closing, level = frame[:4]
+        inner = ('\n' + '    ' * (level + 1)) if (indent and level >= 0) else ''
+        for key, value, base_url in items:
+            if frame[4]:
+                prefix = opening + inner
+                frame[4] = False
+            elif level >= 0:
+                prefix = ',' + inner
+            else:
+                prefix = ''
+            if key is not None:
+                prefix += _encode_string(key) + key_separator
+
+            if isinstance(value, string_types):
+                yield prefix + _encode_string(value)
+            elif isinstance(value, _NODE_TYPES):
+                yield prefix
+                stack.append(frame)
+                frame = [_iter_node_items(value, base_url), '{', '}', level + 1, True]
+                break
+            elif isinstance(value, _LIST_TYPES):
+                yield prefix
+                stack.append(frame)
+                children = ((None, child, None) for child in value)
+                frame = [children, '[', ']', level + 1, True]
+                break
+            else:
+                yield prefix + _encode_value(value)
+        else:
+            if frame[4]:
+                yield opening + closing
+            elif indent and level >= 0:
+                yield '\n' + '    ' * level + closing
+            else:
+                yield closing
+            if not stack:
+                return
+            frame = stack.pop()
+
+
+def _iter_chunks(strings, chunk_size):
+    """
+    Join an iterable of strings into UTF-8 encoded chunks of about `chunk_size` bytes.
+    """
+    buffer = []
+    size = 0
+    for string in strings:
+        buffer.append(string)
+        size += len(string)
+        if size >= chunk_size:
+            yield ''.join(buffer).encode('utf-8')
+            buffer = []
+            size = 0
+    if buffer:
+        yield ''.join(buffer).encode('utf-8')
+
+
 def _primitive_to_document(data, base_url=None):
     """
     Take Python primitives as returned from parsing JSON content,
@@ -296,6 +445,200 @@ def _primitive_to_document(data, base_url=None):
     return data
 
 
+def _get_link(data, url):
+    """
+    Return a link, given its primitive data, and its resolved URL.
+    """
+    fields = tuple([
+        Field(
+            name=_get_string(item, 'name'),
+            required=_get_bool(item, 'required'),
+            location=_get_string(item, 'location'),
+            schema=_get_schema(item, 'schema')
+        )
+        for item in _get_list(data, 'fields') if isinstance(item, dict)
+    ])
+    return _new(
+        Link,
+        _url=url,
+        _action=_get_string(data, 'action'),
+        _encoding=_get_string(data, 'encoding'),
+        _transform=_get_string(data, 'transform'),
+        _title=_get_string(data, 'title'),
+        _description=_get_string(data, 'description'),
+        _fields=fields
+    )
+
+
+class _DocumentBuilder(object):
+    """
+    Builds a document in a single pass, as the JSON content is parsed.
+
+    Each JSON object is passed to `object_hook` once its content has been
+    parsed, so nodes are built from the bottom up. Objects without a known
+    '_type' are left as plain dictionaries until their parent is built, as
+    they may be link fields or schemas, rather than document content.
+
+    URLs cannot be resolved until the URL of the enclosing document is
+    known, so the links and documents contained in each document are
+    recorded, and resolved from the top down once parsing is complete.
+    """
+    def __init__(self):
+        self._contained = {}
+
+    def object_hook(self, data):
+        type_id = data.get('_type')
+        if type_id == 'document':
+            meta = _get_dict(data, '_meta')
+            contained = []
+            document = _new(
+                Document,
+                _url=_get_string(meta, 'url'),
+                _title=_get_string(meta, 'title'),
+                _description=_get_string(meta, 'description'),
+                _media_type='application/coreapi+json',
+                _data=self._get_content(data, contained)
+            )
+            self._contained[id(document)] = contained
+            return document
+
+        elif type_id == 'error':
+            meta = _get_dict(data, '_meta')
+            contained = []
+            error = _new(Error, _title=_get_string(meta, 'title'), _data=self._get_content(data, contained))
+            self._contained[id(error)] = contained
+            return error
+
+        elif type_id == 'link':
+            return _get_link(data, _get_string(data, 'url'))
+
+        return data
+
+    def _get_content(self, data, contained):
+        content = {}
+        for key, value in data.items():
+            if key[:1] == '_':
+                if key in ('_type', '_meta'):
+                    continue
+                key = _unescape_key(key)
+            value_type = type(value)
+            if value_type is dict or value_type is list or value_type is Error:
+                value = self._to_node(value, contained)
+            elif value_type is Link or value_type is Document:
+                contained.append(value)
+            content[key] = value
+        return content
+
+    def _get_items(self, data, contained):
+        items = []
+        for value in data:
+            value_type = type(value)
+            if value_type is dict or value_type is list or value_type is Error:
+                value = self._to_node(value, contained)
+            elif value_type is Link or value_type is Document:
+                contained.append(value)
+            items.append(value)
+        return items
+
+    def _to_node(self, value, contained):
+        value_type = type(value)
+        if value_type is dict:
+            return _new(Object, _data=self._get_content(value, contained))
+        elif value_type is list:
+            return _new(Array, _data=self._get_items(value, contained))
+        # Links in errors are relative to the enclosing document.
+        contained.extend(self._contained.pop(id(value)))
+        return value
+
+    def _resolve(self, nodes, base_url):
+        for node in nodes:
+            node._url = urlparse.urljoin(base_url, node._url)
+            if type(node) is Document:
+                self._resolve(self._contained.pop(id(node)), node._url)
+
+    def build_value(self, value, base_url=None):
+        """
+        Return any value, such as an item of an array, with all URLs resolved.
+        """
+        contained = []
+        value = self._get_items([value], contained)[0]
+        self._resolve(contained, base_url)
+        return value
+
+    def build(self, data, base_url=None):
+        """
+        Return the document or error, given the result of parsing the JSON
+        content, with all URLs resolved.
+        """
+        if type(data) is dict:
+            contained = []
+            content = self._get_content(data, contained)
+            self._resolve(contained, base_url)
+            return _new(Document, _url='', _title='', _description='', _media_type='', _data=content)
+        elif type(data) is Document:
+            self._resolve([data], base_url)
+            return data
+        elif type(data) is Error:
+            self._resolve(self._contained.pop(id(data)), base_url)
+            return data
+        raise ParseError('Top level node should be a document or error.')
+
+
+# Lazy decoding. The content is parsed into primitives, and each document,
+# object or array is only converted into a node when it is first accessed.
+
+def _load_content(data, base_url):
+    return {
+        _unescape_key(key): _to_lazy_node(value, base_url)
+        for key, value in data.items()
+        if key not in ('_type', '_meta')
+    }
+
+
+def _load_items(data, base_url):
+    return [_to_lazy_node(item, base_url) for item in data]
+
+
+def _to_lazy_node(data, base_url=None):
+    if isinstance(data, dict):
+        type_id = data.get('_type')
+        if type_id == 'document':
+            meta = _get_dict(data, '_meta')
+            url = urlparse.urljoin(base_url, _get_string(meta, 'url'))
+            return _new(
+                Document,
+                _url=url,
+                _title=_get_string(meta, 'title'),
+                _description=_get_string(meta, 'description'),
+                _media_type='application/coreapi+json',
+                _loader=functools.partial(_load_content, data, url)
+            )
+        elif type_id == 'error':
+            meta = _get_dict(data, '_meta')
+            return _new(
+                Error,
+                _title=_get_string(meta, 'title'),
+                _loader=functools.partial(_load_content, data, base_url)
+            )
+        elif type_id == 'link':
+            return _get_link(data, urlparse.urljoin(base_url, _get_string(data, 'url')))
+        return _new(Object, _loader=functools.partial(_load_content, data, base_url))
+    elif isinstance(data, list):
+        return _new(Array, _loader=functools.partial(_load_items, data, base_url))
+    return data
+
+
+def _build_lazy(data, base_url=None):
+    if not isinstance(data, dict) or data.get('_type') == 'link':
+        raise ParseError('Top level node should be a document or error.')
+    elif data.get('_type') in ('document', 'error'):
+        return _to_lazy_node(data, base_url)
+    return _new(
+        Document, _url='', _title='', _description='', _media_type='',
+        _loader=functools.partial(_load_content, data, base_url)
+    )
+
+
 class CoreJSONCodec(BaseCodec):
     media_type = 'application/coreapi+json'
     format = 'corejson'
@@ -303,44 +646,90 @@ class CoreJSONCodec(BaseCodec):
     # The following is due to be deprecated...
     media_types = ['application/coreapi+json', 'application/vnd.coreapi+json']
 
+    def __init__(self, backend=None, lazy=False, pause_gc=False):
+        """
+        `backend` - The name of the JSON backend to use, such as 'orjson'.
+                    Defaults to the fastest installed backend.
+        `lazy` - Convert each part of a decoded document into nodes only
+                 when it is first accessed.
+        `pause_gc` - Disable the cyclic garbage collector while decoding.
+                     This affects every thread in the interpreter.
+        """
+        self._backend = None if (backend is None) else get_backend(backend)
+        self._lazy = lazy
+        self._pause_gc = pause_gc
+
     def decode(self, bytestring, **options):
         """
         Takes a bytestring and returns a document.
         """
         base_url = options.get('base_url')
-
+        backend = self._backend or get_default_backend()
+
+        # Decoding allocates many objects, but creates no reference cycles,
+        # so the cyclic garbage collector may optionally be paused, rather
+        # than have it scan the partly built document repeatedly.
+        gc_enabled = self._pause_gc and gc.isenabled()
+        if gc_enabled:
+            gc.disable()
         try:
-            data = json.loads(bytestring.decode('utf-8'))
+            if self._lazy:
+                return _build_lazy(backend.loads(bytestring), base_url)
+            builder = _DocumentBuilder()
+            data = backend.loads(bytestring, object_hook=builder.object_hook)
+            return builder.build(data, base_url)
         except ValueError as exc:
             raise ParseError('Malformed JSON. %s' % exc)
+        finally:
+            if gc_enabled:
+                gc.enable()
 
-        doc = _primitive_to_document(data, base_url)
+    def iter_decode(self, chunks, path=(), **options):
+        """
+        Given an iterable of chunks of content, yield each item of the array
+        at `path` in the document, as soon as it has been parsed.
 
-        if isinstance(doc, Object):
-            doc = Document(content=dict(doc))
-        elif not (isinstance(doc, Document) or isinstance(doc, Error)):
-            raise ParseError('Top level node should be a document or error.')
+        URLs are resolved against the URL of each enclosing document, so the
+        '_meta' of a document must come before the content on the path, as
+        it does in the output of `encode()`.
+        """
+        base_urls = [options.get('base_url')]
+        builder = _DocumentBuilder()
+        decoder = json.JSONDecoder(object_hook=builder.object_hook)
+        path = [key if isinstance(key, int) else _escape_key(key) for key in path]
+
+        def on_skip(key, value):
+            if key == '_meta' and isinstance(value, dict):
+                base_urls.append(urlparse.urljoin(base_urls[-1], _get_string(value, 'url')))
 
-        return doc
+        for item in iter_array(chunks, path, decoder, on_skip):
+            yield builder.build_value(item, base_urls[-1])
 
     def encode(self, document, **options):
         """
         Takes a document and returns a bytestring.
         """
-        indent = options.get('indent')
-
-        if indent:
-            kwargs = {
-                'ensure_ascii': False,
-                'indent': 4,
-                'separators': VERBOSE_SEPARATORS
-            }
-        else:
-            kwargs = {
-                'ensure_ascii': False,
-                'indent': None,
-                'separators': COMPACT_SEPARATORS
-            }
-
+        backend = self._backend or get_default_backend()
         data = _document_to_primitive(document)
-        return force_bytes(json.dumps(data, **kwargs))
+        return backend.dumps(data, indent=bool(options.get('indent')))
+
+    def iter_encode(self, document, **options):
+        """
+        Takes a document and yields the encoded bytestring in chunks, without
+        building the whole encoding in memory.
+
+        Supports the `indent` option, and `chunk_size`, the approximate size
+        of each chunk in bytes. The output always matches the standard
+        library backend.
+        """
+        indent = bool(options.get('indent'))
+        chunk_size = options.get('chunk_size') or DEFAULT_CHUNK_SIZE
+        return _iter_chunks(_iter_encode(document, indent), chunk_size)
+
+    def encode_to(self, document, fp, **options):
+        """
+        Takes a document and writes the encoded bytestring to `fp`, a binary
+        file-like object, such as an open file, a socket file or a response.
+        """
+        for chunk in self.iter_encode(document, **options):
+            fp.write(chunk)
@@ -3,6 +3,7 @@ from coreapi.codecs.base import BaseCodec
 from coreapi.compat import urlparse
 from coreapi.utils import DownloadedFile, guess_extension
 import cgi
+import hashlib
 import os
 import posixpath
 import tempfile
@@ -102,27 +103,58 @@ class DownloadCodec(BaseCodec):
     media_type = '*/*'
     format = 'download'
 
-    def __init__(self, download_dir=None):
+    def __init__(self, download_dir=None, chunk_size=64 * 1024, checksum=None):
         """
         `download_dir` - The path to use for file downloads.
+        `chunk_size` - The size of the chunks used when streaming a download.
+        `checksum` - The name of a `hashlib` algorithm, such as 'sha256', used
+                     to compute a checksum of the download as it is written.
         """
+        if checksum is not None:
+            hashlib.new(checksum)  # Fail early for unknown algorithms.
         self._delete_on_close = download_dir is None
         self._download_dir = download_dir
+        self._chunk_size = chunk_size
+        self._checksum = checksum
 
     @property
     def download_dir(self):
         return self._download_dir
 
+    @property
+    def chunk_size(self):
+        return self._chunk_size
+
+    @property
+    def checksum(self):
+        return self._checksum
+
     def decode(self, bytestring, **options):
+        return self.decode_stream([bytestring], **options)
+
+    def decode_stream(self, chunks, **options):
+        """
+        Takes an iterable of bytestrings, and writes them to the download file
+        as they are received, so that the download is never held in memory.
+        """
         base_url = options.get('base_url')
         content_type = options.get('content_type')
         content_disposition = options.get('content_disposition')
 
-        # Write the download to a temporary .download file.
-        fd, temp_path = tempfile.mkstemp(suffix='.download')
-        file_handle = os.fdopen(fd, 'wb')
-        file_handle.write(bytestring)
-        file_handle.close()
+        # Write the download to a temporary .download file. This is created
+        # in the output directory, so that it can be moved into place without
+        # copying the content.
+        fd, temp_path = tempfile.mkstemp(suffix='.download', dir=self._download_dir)
+        digest = None if (self._checksum is None) else hashlib.new(self._checksum)
+        try:
+            with os.fdopen(fd, 'wb') as file_handle:
+                for chunk in chunks:
+                    file_handle.write(chunk)
+                    if digest is not None:
+                        digest.update(chunk)
+        except Exception:
+            os.remove(temp_path)
+            raise
 
         # Determine the output filename.
         output_filename = _get_filename(base_url, content_type, content_disposition)
@@ -146,4 +178,6 @@ class DownloadCodec(BaseCodec):
         output_file = open(output_path, 'rb')
         downloaded = DownloadedFile(output_file, output_path, delete=self._delete_on_close)
         downloaded.basename = output_filename
+        if digest is not None:
+            downloaded.checksum = digest.hexdigest()
         return downloaded
@@ -1,6 +1,8 @@
 # coding: utf-8
+from coreapi.codecs.backends import get_backend, get_default_backend
 from coreapi.codecs.base import BaseCodec
 from coreapi.exceptions import ParseError
+from coreapi.streaming import iter_array
 import collections
 import json
 
@@ -9,14 +11,33 @@ class JSONCodec(BaseCodec):
     media_type = 'application/json'
     format = 'json'
 
+    def __init__(self, backend=None, ordered=True):
+        """
+        `backend` - The name of the JSON backend to use, such as 'orjson'.
+                    Defaults to the fastest installed backend.
+        `ordered` - Return objects as `OrderedDict` instances. Set to `False`
+                    to return plain dictionaries, which is faster.
+        """
+        self._backend = None if (backend is None) else get_backend(backend)
+        self._ordered = ordered
+
     def decode(self, bytestring, **options):
         """
         Return raw JSON data.
         """
+        backend = self._backend or get_default_backend()
         try:
-            return json.loads(
-                bytestring.decode('utf-8'),
-                object_pairs_hook=collections.OrderedDict
-            )
+            return backend.loads(bytestring, ordered=self._ordered)
         except ValueError as exc:
             raise ParseError('Malformed JSON. %s' % exc)
+
+    def iter_decode(self, chunks, path=(), **options):
+        """
+        Given an iterable of chunks of content, yield each item of the array
+        at `path`, as soon as it has been parsed.
+        """
+        if self._ordered:
+            decoder = json.JSONDecoder(object_pairs_hook=collections.OrderedDict)
+        else:
+            decoder = json.JSONDecoder()
+        return iter_array(chunks, path, decoder)
@@ -59,6 +59,20 @@ except ImportError:
         return text
 
 
+try:
+    from time import monotonic
+except ImportError:
+    # Python 2
+    from time import time as monotonic
+
+
+try:
+    from concurrent import futures
+except ImportError:
+    # Python 2, without the 'futures' backport installed.
+    futures = None
+
+
 try:
     from tempfile import _TemporaryFileWrapper
 except ImportError:
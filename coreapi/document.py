@@ -2,6 +2,7 @@
 from __future__ import unicode_literals
 from collections import OrderedDict, namedtuple
 from coreapi.compat import string_types
+import bisect
 import itypes
 
 
@@ -13,6 +14,99 @@ def _to_immutable(value):
     return value
 
 
+def _new(cls, **attributes):
+    """
+    Return a new instance of a document type, with the given private
+    attributes, such as `_data`, set directly, without validating or
+    copying them.
+
+    Used by codecs when building nodes from content that is already known
+    to be valid, with immutable values and string keys.
+    """
+    node = cls.__new__(cls)
+    node.__dict__.update(attributes)
+    return node
+
+
+class _LazyData(object):
+    """
+    Provides the `_data` of a lazily built node, the first time it is accessed.
+
+    Lazy nodes are created with a `_loader` function in place of `_data`,
+    which returns the node's content with each child converted into a node,
+    which may itself be lazy. Nodes with `_data` set directly are unaffected,
+    as instance attributes take precedence over this descriptor.
+
+    If two threads access a lazy node at once, both may call the loader,
+    and either result is kept. The results are equal.
+    """
+    def __get__(self, node, owner=None):
+        if node is None:
+            return self
+        data = node._loader()
+        node.__dict__['_data'] = data
+        node.__dict__.pop('_loader', None)
+        return data
+
+
+# Updating nodes.
+#
+# `set()` and `delete()` make a single shallow copy of the node's content,
+# sharing every unchanged value with the original node. Only the new value
+# is converted and checked, and the cached key order is carried over to the
+# updated node, unless the change moves a link within it.
+
+def _updated(node, data, key_order=None):
+    """
+    Return a copy of a node, with new content.
+    """
+    attributes = {
+        name: value for name, value in node.__dict__.items()
+        if name not in ('_data', '_key_order', '_loader')
+    }
+    attributes['_data'] = data
+    if key_order is not None:
+        attributes['_key_order'] = key_order
+    return _new(node.__class__, **attributes)
+
+
+def _without(keys, key):
+    if key not in keys:
+        return keys
+    index = keys.index(key)
+    return keys[:index] + keys[index + 1:]
+
+
+def _set_item(node, key, value):
+    if not isinstance(key, string_types):
+        raise TypeError('%s keys must be strings.' % node.__class__.__name__)
+    value = _to_immutable(value)
+    data = node._data.copy()
+    key_order = node.__dict__.get('_key_order')
+    if key_order is not None:
+        if key in data:
+            if _key_sorting((key, data[key])) != _key_sorting((key, value)):
+                key_order = None
+        elif isinstance(value, Link):
+            key_order = None
+        else:
+            keys, data_keys, link_keys = key_order
+            index = bisect.bisect(data_keys, key)
+            data_keys = data_keys[:index] + (key,) + data_keys[index:]
+            key_order = (data_keys + link_keys, data_keys, link_keys)
+    data[key] = value
+    return _updated(node, data, key_order)
+
+
+def _delete_item(node, key):
+    data = node._data.copy()
+    data.pop(key)
+    key_order = node.__dict__.get('_key_order')
+    if key_order is not None:
+        key_order = tuple([_without(keys, key) for keys in key_order])
+    return _updated(node, data, key_order)
+
+
 def _repr(node):
     from coreapi.codecs.python import PythonCodec
     return PythonCodec().encode(node)
@@ -23,6 +117,15 @@ def _str(node):
     return DisplayCodec().encode(node)
 
 
+ACTION_PRIORITY = {
+    'get': 0,
+    'post': 1,
+    'put': 2,
+    'patch': 3,
+    'delete': 4
+}
+
+
 def _key_sorting(item):
     """
     Document and Object sorting.
@@ -31,17 +134,29 @@ def _key_sorting(item):
     """
     key, value = item
     if isinstance(value, Link):
-        action_priority = {
-            'get': 0,
-            'post': 1,
-            'put': 2,
-            'patch': 3,
-            'delete': 4
-        }.get(value.action, 5)
-        return (1, (value.url, action_priority))
+        return (1, (value.url, ACTION_PRIORITY.get(value.action, 5)))
     return (0, key)
 
 
+class _KeyOrder(object):
+    """
+    Provides the `_key_order` of a node, a three-tuple of its sorted keys,
+    the keys of its data, and the keys of its links.
+
+    Nodes are immutable, so the order is computed the first time it is
+    accessed, and then stored on the node.
+    """
+    def __get__(self, node, owner=None):
+        if node is None:
+            return self
+        items = sorted(node._data.items(), key=_key_sorting)
+        data_keys = tuple([key for key, value in items if not isinstance(value, Link)])
+        link_keys = tuple([key for key, value in items if isinstance(value, Link)])
+        key_order = (data_keys + link_keys, data_keys, link_keys)
+        node.__dict__['_key_order'] = key_order
+        return key_order
+
+
 # The field class, as used by Link objects:
 
 # NOTE: 'type', 'description' and 'example' are now deprecated,
@@ -59,6 +174,9 @@ class Document(itypes.Dict):
     Expresses the data that the client may access,
     and the actions that the client may perform.
     """
+    _data = _LazyData()
+    _key_order = _KeyOrder()
+
     def __init__(self, url=None, title=None, description=None, media_type=None, content=None):
         content = {} if (content is None) else content
 
@@ -85,8 +203,13 @@ class Document(itypes.Dict):
         return self.__class__(self.url, self.title, self.description, self.media_type, data)
 
     def __iter__(self):
-        items = sorted(self._data.items(), key=_key_sorting)
-        return iter([key for key, value in items])
+        return iter(self._key_order[0])
+
+    def set(self, key, value):
+        return _set_item(self, key, value)
+
+    def delete(self, key):
+        return _delete_item(self, key)
 
     def __repr__(self):
         return _repr(self)
@@ -121,23 +244,22 @@ class Document(itypes.Dict):
 
     @property
     def data(self):
-        return OrderedDict([
-            (key, value) for key, value in self.items()
-            if not isinstance(value, Link)
-        ])
+        data = self._data
+        return OrderedDict([(key, data[key]) for key in self._key_order[1]])
 
     @property
     def links(self):
-        return OrderedDict([
-            (key, value) for key, value in self.items()
-            if isinstance(value, Link)
-        ])
+        data = self._data
+        return OrderedDict([(key, data[key]) for key in self._key_order[2]])
 
 
 class Object(itypes.Dict):
     """
     An immutable mapping of strings to values.
     """
+    _data = _LazyData()
+    _key_order = _KeyOrder()
+
     def __init__(self, *args, **kwargs):
         data = dict(*args, **kwargs)
         if any([not isinstance(key, string_types) for key in data.keys()]):
@@ -145,8 +267,13 @@ class Object(itypes.Dict):
         self._data = {key: _to_immutable(value) for key, value in data.items()}
 
     def __iter__(self):
-        items = sorted(self._data.items(), key=_key_sorting)
-        return iter([key for key, value in items])
+        return iter(self._key_order[0])
+
+    def set(self, key, value):
+        return _set_item(self, key, value)
+
+    def delete(self, key):
+        return _delete_item(self, key)
 
     def __repr__(self):
         return _repr(self)
@@ -156,26 +283,34 @@ class Object(itypes.Dict):
 
     @property
     def data(self):
-        return OrderedDict([
-            (key, value) for key, value in self.items()
-            if not isinstance(value, Link)
-        ])
+        data = self._data
+        return OrderedDict([(key, data[key]) for key in self._key_order[1]])
 
     @property
     def links(self):
-        return OrderedDict([
-            (key, value) for key, value in self.items()
-            if isinstance(value, Link)
-        ])
+        data = self._data
+        return OrderedDict([(key, data[key]) for key in self._key_order[2]])
 
 
 class Array(itypes.List):
     """
     An immutable list type container.
     """
+    _data = _LazyData()
+
     def __init__(self, *args):
         self._data = [_to_immutable(value) for value in list(*args)]
 
+    def set(self, index, value):
+        data = list(self._data)
+        data[index] = _to_immutable(value)
+        return _new(self.__class__, _data=data)
+
+    def delete(self, index):
+        data = list(self._data)
+        data.pop(index)
+        return _new(self.__class__, _data=data)
+
     def __repr__(self):
         return _repr(self)
 
@@ -266,6 +401,9 @@ class Link(itypes.Object):
 
 
 class Error(itypes.Dict):
+    _data = _LazyData()
+    _key_order = _KeyOrder()
+
     def __init__(self, title=None, content=None):
         data = {} if (content is None) else content
 
@@ -280,8 +418,13 @@ class Error(itypes.Dict):
         self._data = {key: _to_immutable(value) for key, value in data.items()}
 
     def __iter__(self):
-        items = sorted(self._data.items(), key=_key_sorting)
-        return iter([key for key, value in items])
+        return iter(self._key_order[0])
+
+    def set(self, key, value):
+        return _set_item(self, key, value)
+
+    def delete(self, key):
+        return _delete_item(self, key)
 
     def __repr__(self):
         return _repr(self)
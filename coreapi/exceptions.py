@@ -30,6 +30,14 @@ class NetworkError(CoreAPIException):
     pass
 
 
+class CircuitOpenError(NetworkError):
+    """
+    Raised when a request is not sent, because the circuit breaker for
+    the host is open following repeated failures.
+    """
+    pass
+
+
 class LinkLookupError(CoreAPIException):
     """
     Raised when `.action` fails to index a link in the document.
@@ -0,0 +1,149 @@
+# coding: utf-8
+from collections import OrderedDict
+from coreapi.compat import monotonic
+import threading
+
+
+# Listeners registered with `add_listener()` are called with a
+# `TransitionRecord` once each `Client.get()`, `Client.action()` or similar
+# call completes, giving the time spent in each phase of the transition.
+#
+# When no listeners are registered no records are created, and timing
+# each phase costs no more than a single thread-local lookup.
+
+_listeners = []
+_local = threading.local()
+
+
+def add_listener(listener):
+    """
+    Register a function to be called with a `TransitionRecord` for each
+    completed transition, in the thread that made the transition.
+    """
+    if listener not in _listeners:
+        _listeners.append(listener)
+
+
+def remove_listener(listener):
+    if listener in _listeners:
+        _listeners.remove(listener)
+
+
+class TransitionRecord(object):
+    """
+    A structured record of a single transition.
+
+    Phase timings are in seconds, and are measured using a monotonic clock.
+    If a phase occurs more than once, such as when a request is retried,
+    its timings are summed.
+    """
+    def __init__(self, kind):
+        self.kind = kind
+        self.link = None
+        self.method = None
+        self.url = None
+        self.status_code = None
+        self.codec = None
+        self.request_bytes = 0
+        self.response_bytes = 0
+        self.phases = OrderedDict()
+        self.exception = None
+        self.start = monotonic()
+        self.duration = None
+
+    def add_phase(self, name, duration):
+        self.phases[name] = self.phases.get(name, 0.0) + duration
+
+    def as_dict(self):
+        return {
+            'kind': self.kind,
+            'method': self.method,
+            'url': self.url,
+            'status_code': self.status_code,
+            'codec': self.codec,
+            'request_bytes': self.request_bytes,
+            'response_bytes': self.response_bytes,
+            'phases': dict(self.phases),
+            'exception': self.exception,
+            'duration': self.duration
+        }
+
+    def __repr__(self):
+        return '<TransitionRecord %s %s %s %.6fs>' % (self.method, self.url, self.status_code, self.duration or 0.0)
+
+
+class _NullContext(object):
+    def __enter__(self):
+        return None
+
+    def __exit__(self, *args):
+        return False
+
+
+_null_context = _NullContext()
+
+
+class _Phase(object):
+    def __init__(self, record, name):
+        self.record = record
+        self.name = name
+
+    def __enter__(self):
+        self.start = monotonic()
+        return self.record
+
+    def __exit__(self, *args):
+        self.record.add_phase(self.name, monotonic() - self.start)
+        return False
+
+
+class _Transition(object):
+    def __init__(self, kind, listener=None):
+        self.kind = kind
+        self.listener = listener
+
+    def __enter__(self):
+        self.record = TransitionRecord(self.kind)
+        _local.record = self.record
+        return self.record
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        record = self.record
+        record.duration = monotonic() - record.start
+        record.exception = exc_value
+        _local.record = None
+        if self.listener is not None:
+            self.listener(record)
+        for listener in list(_listeners):
+            listener(record)
+        return False
+
+
+def current_record():
+    """
+    Return the record for the transition in progress on this thread, or `None`.
+    """
+    return getattr(_local, 'record', None)
+
+
+def transition(kind, listener=None):
+    """
+    A context manager that records a transition, if any listeners are
+    registered and no transition is already being recorded on this thread.
+
+    An additional `listener` may be given, which is called with the record
+    for this transition only.
+    """
+    if (listener is None and not _listeners) or current_record() is not None:
+        return _null_context
+    return _Transition(kind, listener)
+
+
+def phase(name):
+    """
+    A context manager that times a phase of the current transition.
+    """
+    record = getattr(_local, 'record', None)
+    if record is None:
+        return _null_context
+    return _Phase(record, name)
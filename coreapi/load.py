@@ -0,0 +1,309 @@
+# coding: utf-8
+from __future__ import print_function
+from collections import OrderedDict
+from coreapi.client import Client, _lookup_link
+from coreapi.compat import monotonic, string_types
+from coreapi.utils import format_time
+import argparse
+import bisect
+import itertools
+import json
+import os
+import random
+import string
+import sys
+import threading
+import time
+
+
+# Drives the links in a schema concurrently, for load testing an API with
+# the same client that is used in production. Run with:
+#
+#     python -m coreapi.load scenario.json --concurrency 20 --rate 100 --duration 60
+#
+# A scenario file lists the links to call, their relative weights, and the
+# parameters to call them with:
+#
+#     {
+#         "schema": "http://localhost:8000/",
+#         "links": [
+#             {"keys": ["users", "list"], "weight": 3, "params": {"page": {"$randint": [1, 10]}}},
+#             {"keys": ["users", "read"], "params": {"id": {"$choice": [1, 2, 3]}}}
+#         ]
+#     }
+
+DEFAULT_CONCURRENCY = 10
+DEFAULT_DURATION = 10.0
+
+
+def _choice(rng, options):
+    return rng.choice(options)
+
+
+def _randint(rng, bounds):
+    return rng.randint(bounds[0], bounds[1])
+
+
+def _uniform(rng, bounds):
+    return rng.uniform(bounds[0], bounds[1])
+
+
+def _string(rng, length):
+    return ''.join(rng.choice(string.ascii_lowercase) for idx in range(length))
+
+
+GENERATORS = {
+    '$choice': _choice,
+    '$randint': _randint,
+    '$uniform': _uniform,
+    '$string': _string
+}
+
+
+def make_generator(value):
+    """
+    Return a function that takes a `random.Random` instance, and returns a
+    parameter value.
+
+    Values may be callables, or generator specifications such as
+    `{"$randint": [1, 10]}` or `{"$sequence": 1}`, and may be nested in
+    lists and dictionaries. Any other value is used as it is.
+    """
+    if callable(value):
+        return value
+    if isinstance(value, dict) and len(value) == 1:
+        name, argument = list(value.items())[0]
+        if name == '$sequence':
+            counter = itertools.count(argument)
+            return lambda rng: next(counter)
+        if name in GENERATORS:
+            func = GENERATORS[name]
+            return lambda rng: func(rng, argument)
+        assert not name.startswith('$'), 'Unknown parameter generator %s.' % repr(name)
+    if isinstance(value, dict):
+        generators = [(key, make_generator(item)) for key, item in value.items()]
+        return lambda rng: {key: generator(rng) for key, generator in generators}
+    if isinstance(value, list):
+        generators = [make_generator(item) for item in value]
+        return lambda rng: [generator(rng) for generator in generators]
+    return lambda rng: value
+
+
+class Step(object):
+    """
+    A link in a scenario, with a relative weight and parameter generators.
+    """
+    def __init__(self, keys, params=None, weight=1):
+        if isinstance(keys, string_types):
+            keys = [keys]
+        assert weight > 0, 'Scenario weights must be positive.'
+        self.keys = list(keys)
+        self.weight = weight
+        self._params = make_generator(params or {})
+
+    def get_params(self, rng):
+        return self._params(rng)
+
+
+class Scenario(object):
+    """
+    A weighted set of links to call.
+    """
+    def __init__(self, steps, schema=None):
+        assert steps, 'A scenario must include at least one link.'
+        self.steps = list(steps)
+        self.schema = schema
+        self._totals = []
+        total = 0
+        for step in self.steps:
+            total += step.weight
+            self._totals.append(total)
+
+    @classmethod
+    def from_data(cls, data):
+        steps = [
+            Step(item['keys'], params=item.get('params'), weight=item.get('weight', 1))
+            for item in data.get('links', [])
+        ]
+        return cls(steps, schema=data.get('schema'))
+
+    def validate(self, document):
+        """
+        Check that every link in the scenario exists in the document.
+        """
+        for step in self.steps:
+            _lookup_link(document, step.keys)
+
+    def choose(self, rng):
+        index = bisect.bisect_right(self._totals, rng.random() * self._totals[-1])
+        return self.steps[min(index, len(self.steps) - 1)]
+
+
+def load_scenario(path):
+    with open(path) as scenario_file:
+        return Scenario.from_data(json.load(scenario_file))
+
+
+def load_schema(client, location, format=None, base_url=None):
+    """
+    Return the schema document from either a URL, or a local file.
+    """
+    if not os.path.exists(location):
+        return client.get(location, format=format)
+
+    decoders = [decoder for decoder in client.decoders if format is None or decoder.format == format]
+    assert decoders, "No decoder available with format='%s'" % format
+    with open(location, 'rb') as schema_file:
+        return decoders[0].decode(schema_file.read(), base_url=base_url)
+
+
+class RateLimiter(object):
+    """
+    Spaces out requests evenly, across all threads, to a target rate.
+    """
+    def __init__(self, rate):
+        self._interval = 1.0 / rate
+        self._next = monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self, deadline):
+        """
+        Sleep until the next request is due. Returns `False` if it is not
+        due until after the deadline.
+        """
+        with self._lock:
+            due = self._next = max(self._next, monotonic() - self._interval)
+            self._next += self._interval
+        if due >= deadline:
+            return False
+        delay = due - monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        return True
+
+
+def _work(client, document, scenario, deadline, limiter, rng, stopped):
+    while not stopped.is_set():
+        if limiter is not None and not limiter.wait(deadline):
+            return
+        if monotonic() >= deadline:
+            return
+        step = scenario.choose(rng)
+        try:
+            client.action(document, step.keys, params=step.get_params(rng))
+        except Exception:
+            # Failures are counted in the client's statistics.
+            pass
+
+
+def run_load(client, document, scenario, concurrency=DEFAULT_CONCURRENCY, rate=None,
+             duration=DEFAULT_DURATION, seed=None, stopped=None):
+    """
+    Call the links in the scenario from `concurrency` threads, for `duration`
+    seconds, and return a report of the throughput, latency and errors for
+    each link. If `rate` is set, requests are limited to that many per second
+    in total.
+
+    The client must be instantiated with `stats=True`.
+    """
+    scenario.validate(document)
+    if stopped is None:
+        stopped = threading.Event()
+    limiter = None if (rate is None) else RateLimiter(rate)
+    seeds = random.Random(seed)
+
+    client.stats(reset=True)
+    start = monotonic()
+    deadline = start + duration
+    threads = [
+        threading.Thread(target=_work, args=(
+            client, document, scenario, deadline, limiter, random.Random(seeds.random()), stopped
+        ))
+        for idx in range(concurrency)
+    ]
+    for thread in threads:
+        thread.daemon = True
+        thread.start()
+    for thread in threads:
+        while thread.is_alive():
+            thread.join(0.1)
+    elapsed = monotonic() - start
+
+    links = client.stats()
+    for link_stats in links.values():
+        link_stats['throughput'] = link_stats['requests'] / elapsed
+    requests = sum(link_stats['requests'] for link_stats in links.values())
+    errors = sum(link_stats['errors'] for link_stats in links.values())
+    return OrderedDict([
+        ('duration', elapsed),
+        ('concurrency', concurrency),
+        ('rate', rate),
+        ('requests', requests),
+        ('errors', errors),
+        ('throughput', requests / elapsed),
+        ('links', links)
+    ])
+
+
+def _format_latency(seconds):
+    return '-' if (seconds is None) else format_time(seconds)
+
+
+def format_report(report):
+    lines = ['%-50s %9s %9s %7s %9s %9s %9s %9s' % (
+        'Link', 'Requests', 'Req/s', 'Errors', 'p50', 'p90', 'p99', 'max'
+    )]
+    for key in sorted(report['links'].keys()):
+        link_stats = report['links'][key]
+        latency = link_stats['latency']
+        lines.append('%-50s %9d %9.1f %7d %9s %9s %9s %9s' % (
+            key, link_stats['requests'], link_stats['throughput'], link_stats['errors'],
+            _format_latency(latency['p50']), _format_latency(latency['p90']),
+            _format_latency(latency['p99']), _format_latency(latency['max'])
+        ))
+        for label, count in sorted(link_stats['error_types'].items()):
+            lines.append('    %s: %d' % (label, count))
+    lines.append('%-50s %9d %9.1f %7d' % ('Total', report['requests'], report['throughput'], report['errors']))
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='coreapi-load', description="Load test an API by calling its schema's links.")
+    parser.add_argument('scenario', help='A JSON file listing the links to call.')
+    parser.add_argument('-s', '--schema', help='The schema URL or file, if not given in the scenario.')
+    parser.add_argument('-f', '--format', help='The format of the schema, such as "corejson".')
+    parser.add_argument('--base-url', help='The URL that links in a schema file are relative to.')
+    parser.add_argument('-c', '--concurrency', type=int, default=DEFAULT_CONCURRENCY,
+                        help='The number of threads making requests. (default: %d)' % DEFAULT_CONCURRENCY)
+    parser.add_argument('-r', '--rate', type=float, help='The target number of requests per second, in total.')
+    parser.add_argument('-d', '--duration', type=float, default=DEFAULT_DURATION,
+                        help='The number of seconds to run for. (default: %d)' % DEFAULT_DURATION)
+    parser.add_argument('--seed', type=int, help='Seed the random choice of links and parameters.')
+    parser.add_argument('-o', '--output', help='Also write the report to this file, as JSON.')
+    args = parser.parse_args(argv)
+
+    scenario = load_scenario(args.scenario)
+    location = args.schema or scenario.schema
+    if not location:
+        parser.error('No schema given. Use --schema, or set "schema" in the scenario.')
+
+    client = Client(stats=True)
+    document = load_schema(client, location, args.format, args.base_url)
+    stopped = threading.Event()
+    try:
+        report = run_load(
+            client, document, scenario, args.concurrency, args.rate, args.duration, args.seed, stopped
+        )
+    except KeyboardInterrupt:  # pragma: nocover
+        stopped.set()
+        return 1
+
+    print(format_report(report))
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(report, output, indent=2)
+    return 0
+
+
+if __name__ == '__main__':  # pragma: nocover
+    sys.exit(main())
@@ -0,0 +1,287 @@
+# coding: utf-8
+from coreapi import exceptions
+from coreapi.compat import futures, string_types, urlparse
+from coreapi.document import Link
+import collections
+import itertools
+import itypes
+import math
+import threading
+
+try:
+    import queue
+except ImportError:  # pragma: nocover
+    import Queue as queue
+
+
+# Keys that are checked, in order, for the list of items in a page.
+ITEMS_KEYS = ('results', 'items', 'data')
+NEXT_KEY = 'next'
+COUNT_KEYS = ('count', 'total')
+
+# Link fields that select a page, either by page number or by offset.
+PAGE_FIELD = 'page'
+OFFSET_FIELD = 'offset'
+LIMIT_FIELD = 'limit'
+
+
+def get_next_link(page, next_key=NEXT_KEY):
+    """
+    Return the link to the next page, or `None` if this is the last page.
+
+    The next page may be given as either a `Link`, or as a URL string,
+    which is resolved relative to the URL of the page.
+    """
+    if not isinstance(page, (dict, itypes.Dict)):
+        return None
+    value = page.get(next_key)
+    if isinstance(value, Link):
+        return value
+    if isinstance(value, string_types) and value:
+        base_url = getattr(page, 'url', '')
+        return Link(url=urlparse.urljoin(base_url, value) if base_url else value)
+    return None
+
+
+def get_page_items(page, items_key=None):
+    """
+    Return the list of items contained in a page.
+    """
+    if isinstance(page, (list, itypes.List)):
+        return page
+    if isinstance(page, (dict, itypes.Dict)):
+        if items_key is not None:
+            return page.get(items_key) or []
+        for key in ITEMS_KEYS:
+            if isinstance(page.get(key), (list, itypes.List)):
+                return page[key]
+        data = getattr(page, 'data', page)
+        lists = [value for value in data.values() if isinstance(value, (list, itypes.List))]
+        if len(lists) == 1:
+            return lists[0]
+    if page is None:
+        return []
+    raise exceptions.ParseError(
+        "Could not determine the list of items in the page. Use 'items_key' to set it explicitly."
+    )
+
+
+def get_count(page):
+    """
+    Return the total number of items in the collection, or `None` if unknown.
+    """
+    if not isinstance(page, (dict, itypes.Dict)):
+        return None
+    for key in COUNT_KEYS:
+        value = page.get(key)
+        if isinstance(value, int) and not isinstance(value, bool):
+            return value
+    return None
+
+
+def get_remaining_params(page, link, params, items_key=None):
+    """
+    Given the first page returned by a link, return a list of the parameters
+    to use for fetching each of the remaining pages.
+
+    Returns `None` if the pages cannot be determined up front, because the
+    page does not include a total count, or the link has neither a `page`
+    nor an `offset` field.
+    """
+    count = get_count(page)
+    field_names = [field.name for field in link.fields]
+    if count is None:
+        return None
+
+    if PAGE_FIELD in field_names:
+        page_size = len(get_page_items(page, items_key))
+        if not page_size:
+            return []
+        page_number = int(params.get(PAGE_FIELD, 1))
+        last_page = int(math.ceil(count / float(page_size)))
+        return [
+            dict(params, **{PAGE_FIELD: number})
+            for number in range(page_number + 1, last_page + 1)
+        ]
+
+    if OFFSET_FIELD in field_names:
+        offset = int(params.get(OFFSET_FIELD, 0))
+        limit = params.get(LIMIT_FIELD) or len(get_page_items(page, items_key))
+        if not limit:
+            return []
+        return [
+            dict(params, **{OFFSET_FIELD: start})
+            for start in range(offset + int(limit), count, int(limit))
+        ]
+
+    return None
+
+
+def iter_parallel(fetch, params_list, max_workers, ordered=True):
+    """
+    Call `fetch(params)` for each item in `params_list`, using a pool of
+    threads, and yield each result.
+
+    Results are yielded in the order of `params_list` if `ordered` is set,
+    or otherwise as each request completes. At most `max_workers` requests
+    are in flight at once, and no more results are held than that.
+    """
+    assert futures is not None, (
+        "The 'futures' package must be installed for parallel pagination on Python 2."
+    )
+    remaining = iter(params_list)
+    with futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = collections.deque([
+            executor.submit(fetch, params)
+            for params in itertools.islice(remaining, max_workers)
+        ])
+        try:
+            while pending:
+                if ordered:
+                    future = pending.popleft()
+                else:
+                    done, not_done = futures.wait(pending, return_when=futures.FIRST_COMPLETED)
+                    future = [item for item in pending if item in done][0]
+                    pending.remove(future)
+                result = future.result()
+                params = next(remaining, None)
+                if params is not None:
+                    pending.append(executor.submit(fetch, params))
+                yield result
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+class ParallelPageIterator(object):
+    """
+    Iterates over the pages returned by a link. If the first page includes
+    a total count, and the link has a `page` or `offset` field, then the
+    remaining pages are fetched concurrently, using up to `max_workers`
+    threads. Otherwise the pages are fetched one after another.
+
+    `fetch(params)` returns the page for the given link parameters, and
+    `fetch_next(page)` returns the page following `page`, or `None`.
+    """
+    def __init__(self, fetch, fetch_next, link, params, max_workers, ordered=True, items_key=None):
+        self._fetch = fetch
+        self._fetch_next = fetch_next
+        self._link = link
+        self._params = params
+        self._max_workers = max_workers
+        self._ordered = ordered
+        self._items_key = items_key
+
+    def __iter__(self):
+        page = self._fetch(self._params)
+        yield page
+        remaining = get_remaining_params(page, self._link, self._params, self._items_key)
+        if remaining is None:
+            page = self._fetch_next(page)
+            while page is not None:
+                yield page
+                page = self._fetch_next(page)
+            return
+        for page in iter_parallel(self._fetch, remaining, self._max_workers, self._ordered):
+            yield page
+
+
+_END = object()
+
+
+class PageIterator(object):
+    """
+    Iterates over a chain of pages, fetching up to `prefetch` pages ahead
+    in a background thread while the caller handles the current page.
+
+    At most `prefetch` fetched pages are held in memory, in addition to the
+    current page, so that iterating over any number of pages uses a bounded
+    amount of memory.
+
+    `fetch_first()` returns the first page, and `fetch_next(page)` returns
+    the page following `page`, or `None` if it is the last page.
+    """
+    def __init__(self, fetch_first, fetch_next, prefetch=1):
+        self._fetch_first = fetch_first
+        self._fetch_next = fetch_next
+        self._prefetch = prefetch
+        self._stopped = threading.Event()
+        self._queue = None
+        self._thread = None
+        # The number of pages fetched, or being fetched, that the consumer
+        # has not yet taken from the queue.
+        self._pending = 0
+        self._space = threading.Condition()
+
+    def __iter__(self):
+        if not self._prefetch:
+            return self._iter_sequential()
+        return self._iter_prefetched()
+
+    def _iter_sequential(self):
+        page = self._fetch_first()
+        while page is not None:
+            yield page
+            page = self._fetch_next(page)
+
+    def _iter_prefetched(self):
+        self._queue = queue.Queue(maxsize=self._prefetch)
+        self._thread = threading.Thread(target=self._produce)
+        self._thread.daemon = True
+        self._thread.start()
+        try:
+            while True:
+                page, exc = self._queue.get()
+                with self._space:
+                    self._pending -= 1
+                    self._space.notify()
+                if exc is not None:
+                    raise exc
+                if page is _END:
+                    return
+                yield page
+        finally:
+            self.close()
+
+    def _reserve(self):
+        """
+        Block until there is space in the window of prefetched pages, so that
+        each page is only fetched once it can be queued. Returns `False` if
+        the consumer has stopped iterating.
+        """
+        with self._space:
+            while self._pending >= self._prefetch:
+                if self._stopped.is_set():
+                    return False
+                self._space.wait(0.1)
+            if self._stopped.is_set():
+                return False
+            self._pending += 1
+            return True
+
+    def _produce(self):
+        page = None
+        try:
+            while self._reserve():
+                page = self._fetch_first() if (page is None) else self._fetch_next(page)
+                if page is None:
+                    self._queue.put((_END, None))
+                    return
+                self._queue.put((page, None))
+        except Exception as exc:
+            self._queue.put((None, exc))
+
+    def close(self):
+        """
+        Stop fetching pages in the background.
+        """
+        self._stopped.set()
+
+
+def iter_items(pages, items_key=None):
+    """
+    Given an iterable of pages, yield each item in turn.
+    """
+    for page in pages:
+        for item in get_page_items(page, items_key):
+            yield item
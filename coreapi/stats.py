@@ -0,0 +1,212 @@
+# coding: utf-8
+from collections import OrderedDict
+import threading
+
+
+# Latencies are recorded in microseconds, in a histogram with log-linear
+# buckets, in the style of HdrHistogram. Values below 128us are recorded
+# exactly, and larger values to within 1/64th (about 1.6%).
+
+SUB_BUCKET_BITS = 7
+SUB_BUCKET_COUNT = 1 << SUB_BUCKET_BITS
+SUB_BUCKET_HALF = SUB_BUCKET_COUNT >> 1
+
+PERCENTILES = OrderedDict([
+    ('p50', 50.0),
+    ('p90', 90.0),
+    ('p99', 99.0),
+    ('p999', 99.9)
+])
+
+
+def get_bucket_index(value):
+    if value < SUB_BUCKET_COUNT:
+        return value
+    shift = value.bit_length() - SUB_BUCKET_BITS
+    return SUB_BUCKET_COUNT + (shift - 1) * SUB_BUCKET_HALF + (value >> shift) - SUB_BUCKET_HALF
+
+
+def get_bucket_value(index):
+    """
+    Return the highest value that is recorded in the given bucket.
+    """
+    if index < SUB_BUCKET_COUNT:
+        return index
+    shift = (index - SUB_BUCKET_COUNT) // SUB_BUCKET_HALF + 1
+    top = (index - SUB_BUCKET_COUNT) % SUB_BUCKET_HALF + SUB_BUCKET_HALF
+    return ((top + 1) << shift) - 1
+
+
+class Histogram(object):
+    """
+    A sparse latency histogram. Not thread-safe. Each thread records into
+    its own histograms, which are merged when statistics are read.
+    """
+    def __init__(self):
+        self.counts = {}
+        self.total = 0
+        self.count = 0
+        self.min = None
+        self.max = None
+
+    def record(self, value):
+        index = get_bucket_index(value)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.total += value
+        self.count += 1
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def merge(self, other):
+        for index, count in list(other.counts.items()):
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.total += other.total
+        self.count += other.count
+        if other.min is not None and (self.min is None or other.min < self.min):
+            self.min = other.min
+        if other.max is not None and (self.max is None or other.max > self.max):
+            self.max = other.max
+
+    def percentile(self, percentile):
+        if not self.count:
+            return None
+        target = max(int(round(self.count * percentile / 100.0)), 1)
+        seen = 0
+        for index in sorted(self.counts.keys()):
+            seen += self.counts[index]
+            if seen >= target:
+                return min(get_bucket_value(index), self.max)
+        return self.max  # pragma: nocover
+
+
+def _to_seconds(microseconds):
+    return None if (microseconds is None) else microseconds / 1e6
+
+
+class LinkStats(object):
+    """
+    Counters for a single link, as recorded by a single thread.
+    """
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.error_types = {}
+        self.request_bytes = 0
+        self.response_bytes = 0
+        self.latency = Histogram()
+
+    def merge(self, other):
+        self.requests += other.requests
+        self.errors += other.errors
+        for label, count in list(other.error_types.items()):
+            self.error_types[label] = self.error_types.get(label, 0) + count
+        self.request_bytes += other.request_bytes
+        self.response_bytes += other.response_bytes
+        self.latency.merge(other.latency)
+
+    def as_dict(self):
+        latency = self.latency
+        summary = OrderedDict([
+            ('min', _to_seconds(latency.min)),
+            ('max', _to_seconds(latency.max)),
+            ('mean', _to_seconds(latency.total / float(latency.count)) if latency.count else None)
+        ])
+        for name, percentile in PERCENTILES.items():
+            summary[name] = _to_seconds(latency.percentile(percentile))
+        return {
+            'requests': self.requests,
+            'errors': self.errors,
+            'error_types': dict(self.error_types),
+            'request_bytes': self.request_bytes,
+            'response_bytes': self.response_bytes,
+            'latency': summary
+        }
+
+
+def get_link_key(record):
+    """
+    Return the key that statistics are aggregated by, for a transition
+    record. Links are identified by their action and URL template, so that
+    requests with different parameters are aggregated together.
+    """
+    link = record.link
+    if link is None:
+        return '%s %s' % (record.method, record.url)
+    return '%s %s' % ((link.action or 'get').upper(), link.url)
+
+
+def get_error_label(record):
+    """
+    Return a label for the kind of error in a failed transition record,
+    either the response status code, or the name of the exception raised.
+    """
+    if (record.status_code or 0) >= 400:
+        return 'HTTP %d' % record.status_code
+    return record.exception.__class__.__name__
+
+
+class ClientStats(object):
+    """
+    Aggregates transition records into per-link statistics.
+
+    Each thread records into its own shard, so that recording does not
+    contend on a lock. A lock is only taken when a thread records for the
+    first time, and when the statistics are read or reset.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._shards = []
+        self._generation = 0
+
+    def _get_shard(self):
+        local = self._local
+        if getattr(local, 'generation', None) != self._generation:
+            with self._lock:
+                local.shard = {}
+                local.generation = self._generation
+                self._shards.append(local.shard)
+        return local.shard
+
+    def __call__(self, record):
+        self.record(record)
+
+    def record(self, record):
+        shard = self._get_shard()
+        key = get_link_key(record)
+        link_stats = shard.get(key)
+        if link_stats is None:
+            link_stats = shard[key] = LinkStats()
+        link_stats.requests += 1
+        if record.exception is not None or (record.status_code or 0) >= 400:
+            label = get_error_label(record)
+            link_stats.errors += 1
+            link_stats.error_types[label] = link_stats.error_types.get(label, 0) + 1
+        link_stats.request_bytes += record.request_bytes
+        link_stats.response_bytes += record.response_bytes
+        link_stats.latency.record(int(record.duration * 1e6))
+
+    def snapshot(self, reset=False):
+        """
+        Return a dictionary of statistics, keyed by link.
+        """
+        with self._lock:
+            shards = list(self._shards)
+            if reset:
+                self._shards = []
+                self._generation += 1
+
+        merged = {}
+        for shard in shards:
+            for key, link_stats in list(shard.items()):
+                if key not in merged:
+                    merged[key] = LinkStats()
+                merged[key].merge(link_stats)
+        return {key: link_stats.as_dict() for key, link_stats in merged.items()}
+
+    def reset(self):
+        with self._lock:
+            self._shards = []
+            self._generation += 1
@@ -0,0 +1,166 @@
+# coding: utf-8
+from coreapi import exceptions
+from coreapi.document import Array
+import codecs
+import json
+import re
+
+
+# Incremental parsing of JSON arrays, for responses too large to buffer.
+#
+# The content is read a chunk at a time, and each item of the array is
+# parsed with the standard library's decoder as soon as it is complete.
+# Only the current item is held in memory, so the time to the first item
+# does not depend on the size of the content. Any values that come before
+# the array are parsed and discarded.
+
+WHITESPACE = re.compile(r'[ \t\n\r]*')
+NUMBER = re.compile(r'[-+0-9.eE]*')
+NUMBER_START = '-0123456789'
+
+
+class _Reader(object):
+    """
+    Reads text from an iterable of UTF-8 encoded chunks, discarding each
+    chunk once it has been parsed.
+    """
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+
+    def fill(self):
+        """
+        Read another chunk. Returns `False` if there is no more content.
+        """
+        if self.eof:
+            return False
+        self.buffer = self.buffer[self.pos:]
+        self.pos = 0
+        try:
+            chunk = next(self._chunks)
+        except StopIteration:
+            self.eof = True
+            self.buffer += self._decoder.decode(b'', final=True)
+            return False
+        self.buffer += self._decoder.decode(chunk)
+        return True
+
+    def peek(self):
+        """
+        Return the next character other than whitespace, without consuming
+        it, or an empty string at the end of the content.
+        """
+        while True:
+            self.pos = WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self.fill():
+                return ''
+
+    def consume(self, expected):
+        char = self.peek()
+        if char not in expected:
+            raise exceptions.ParseError(
+                'Malformed JSON. Expected %s, but got %s.' % (' or '.join(repr(item) for item in expected), repr(char or 'end of content'))
+            )
+        self.pos += 1
+        return char
+
+    def value(self, decoder):
+        """
+        Parse and return the next complete value.
+        """
+        char = self.peek()
+        if char and char in NUMBER_START:
+            # A number at the end of the buffer may continue in the next chunk.
+            while NUMBER.match(self.buffer, self.pos).end() == len(self.buffer) and self.fill():
+                pass
+        while True:
+            try:
+                value, end = decoder.raw_decode(self.buffer, self.pos)
+            except ValueError as exc:
+                if self.fill():
+                    continue
+                raise exceptions.ParseError('Malformed JSON. %s' % exc)
+            self.pos = end
+            return value
+
+
+def _seek_key(reader, key, decoder, on_skip=None):
+    reader.consume('{')
+    if reader.peek() == '}':
+        return False
+    while True:
+        name = reader.value(decoder)
+        reader.consume(':')
+        if name == key:
+            return True
+        value = reader.value(decoder)
+        if on_skip is not None:
+            on_skip(name, value)
+        if reader.consume(',}') == '}':
+            return False
+
+
+def _seek_index(reader, index, decoder, on_skip=None):
+    reader.consume('[')
+    if reader.peek() == ']':
+        return False
+    for idx in range(index):
+        reader.value(decoder)
+        if reader.consume(',]') == ']':
+            return False
+    return True
+
+
+def _not_found(path):
+    index_string = ''.join('[%s]' % repr(key).strip('u') for key in path)
+    return exceptions.ParseError('No array found at %s.' % (index_string or 'the top level'))
+
+
+def get_array(value, path=()):
+    """
+    Return the array found by following `path` from an already decoded value.
+    """
+    for key in path:
+        try:
+            value = value[key]
+        except (KeyError, IndexError, TypeError):
+            raise _not_found(path)
+    if not isinstance(value, (list, Array)):
+        raise _not_found(path)
+    return value
+
+
+def iter_array(chunks, path=(), decoder=None, on_skip=None):
+    """
+    Given an iterable of chunks of JSON content, yield each item of the
+    array found by following `path`, a list of object keys and array indexes,
+    from the top level value.
+
+    Items are parsed with `decoder`, a `json.JSONDecoder` instance. If given,
+    `on_skip` is called with the key and value of each object member that
+    comes before the key being followed, in the order they are parsed.
+    """
+    if decoder is None:
+        decoder = json.JSONDecoder()
+    plain_decoder = json.JSONDecoder()
+    reader = _Reader(chunks)
+
+    for key in path:
+        seek = _seek_index if isinstance(key, int) else _seek_key
+        if not seek(reader, key, plain_decoder, on_skip):
+            raise _not_found(path)
+
+    if reader.peek() != '[':
+        raise _not_found(path)
+    reader.consume('[')
+    if reader.peek() == ']':
+        return
+    while True:
+        yield reader.value(decoder)
+        if reader.consume(',]') == ']':
+            return
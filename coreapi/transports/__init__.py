@@ -1,8 +1,24 @@
 # coding: utf-8
 from coreapi.transports.base import BaseTransport
 from coreapi.transports.http import HTTPTransport
+from coreapi.transports.wsgi import WSGITransport
+import socket
+import sys
+
+if hasattr(socket, 'AF_UNIX'):
+    from coreapi.transports.unix import UnixSocketTransport
+else:  # pragma: nocover
+    UnixSocketTransport = None
+
+if sys.version_info >= (3, 5):
+    from coreapi.transports.asgi import ASGITransport
+    from coreapi.transports.asynchttp import AsyncHTTPTransport
+else:  # pragma: nocover
+    ASGITransport = None
+    AsyncHTTPTransport = None
 
 
 __all__ = [
-    'BaseTransport', 'HTTPTransport'
+    'BaseTransport', 'HTTPTransport', 'AsyncHTTPTransport', 'WSGITransport', 'ASGITransport',
+    'UnixSocketTransport'
 ]
@@ -0,0 +1,129 @@
+# coding: utf-8
+# Note that this module requires Python 3.5+, and is only imported by
+# `coreapi.transports` when running on a supported version.
+from coreapi.compat import futures, urlparse
+from coreapi.transports.wsgi import WSGITransport, build_response, get_request_body, get_server
+from urllib.parse import unquote
+import asyncio
+import io
+import requests
+import threading
+
+
+class ASGIAdapter(requests.adapters.BaseAdapter):
+    """
+    A `requests` adapter that sends requests directly to an ASGI application,
+    rather than over the network.
+
+    The application runs on an event loop in a background thread, which is
+    started on the first request, so that it may be called from both
+    synchronous code and from within another running event loop.
+    """
+    def __init__(self, app):
+        super(ASGIAdapter, self).__init__()
+        self.app = app
+        self._loop = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def _get_loop(self):
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._loop.run_forever)
+                self._thread.daemon = True
+                self._thread.start()
+            return self._loop
+
+    def get_scope(self, request):
+        url_components = urlparse.urlparse(request.url)
+        headers = [
+            (key.lower().encode('latin-1'), value.encode('latin-1'))
+            for key, value in request.headers.items()
+            if key.lower() not in ('content-length', 'transfer-encoding')
+        ]
+        if 'host' not in [key for key, value in headers]:
+            headers.insert(0, (b'host', url_components.netloc.rsplit('@', 1)[-1].encode('latin-1')))
+        path = url_components.path or '/'
+        return {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': request.method,
+            'scheme': url_components.scheme,
+            'path': unquote(path),
+            'raw_path': path.encode('latin-1'),
+            'query_string': url_components.query.encode('latin-1'),
+            'root_path': '',
+            'headers': headers,
+            'server': get_server(request.url),
+            'client': None
+        }
+
+    async def call_app(self, scope, body):
+        """
+        Run the application, returning a three-tuple of (status, headers, content).
+        """
+        request_sent = False
+        response_complete = asyncio.Event()
+        started = {'status': 500, 'headers': []}
+        chunks = []
+
+        async def receive():
+            nonlocal request_sent
+            if not request_sent:
+                request_sent = True
+                return {'type': 'http.request', 'body': body, 'more_body': False}
+            await response_complete.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                started['status'] = message['status']
+                started['headers'] = [
+                    (key.decode('latin-1'), value.decode('latin-1'))
+                    for key, value in message.get('headers', [])
+                ]
+            elif message['type'] == 'http.response.body':
+                chunks.append(message.get('body', b''))
+                if not message.get('more_body', False):
+                    response_complete.set()
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            response_complete.set()
+        return (started['status'], started['headers'], b''.join(chunks))
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        scope = self.get_scope(request)
+        body = get_request_body(request)
+        if isinstance(timeout, tuple):
+            timeout = timeout[1]
+
+        future = asyncio.run_coroutine_threadsafe(self.call_app(scope, body), self._get_loop())
+        try:
+            status, headers, content = future.result(timeout)
+        except futures.TimeoutError:
+            future.cancel()
+            raise requests.exceptions.ReadTimeout('The ASGI application did not respond in time.', request=request)
+        return build_response(self, request, status, headers, io.BytesIO(content))
+
+    def close(self):
+        with self._lock:
+            if self._loop is not None:
+                self._loop.call_soon_threadsafe(self._loop.stop)
+                self._thread.join()
+                self._loop.close()
+                self._loop = self._thread = None
+
+
+class ASGITransport(WSGITransport):
+    """
+    Makes requests directly to an ASGI application running in the same process,
+    rather than over the network.
+
+    If `hosts` is set, then the transport is only used for URLs with one
+    of the given hostnames. Otherwise it is used for every HTTP URL.
+    """
+    adapter_class = ASGIAdapter
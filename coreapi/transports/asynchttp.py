@@ -0,0 +1,170 @@
+# coding: utf-8
+# Note that this module requires Python 3.5+, and is only imported by
+# `coreapi.transports` when running on a supported version.
+from coreapi import exceptions
+from coreapi.document import Document, Error
+from coreapi.transports.base import BaseTransport
+from coreapi.transports.http import (
+    _build_http_request, _decode_result, _get_encoding,
+    _get_headers, _get_method, _get_params, _get_url,
+    _handle_inplace_replacements
+)
+import asyncio
+import functools
+import itypes
+import requests
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+
+async def transition_async(prepare, *args):
+    """
+    Run a transition without blocking the event loop.
+
+    `prepare` is one of the `Client._prepare_*` methods, and returns a
+    four-tuple of (transport, link, decoders, options).
+    """
+    transport, link, decoders, options = prepare(*args)
+    if hasattr(transport, 'transition_async'):
+        return await transport.transition_async(link, decoders, **options)
+
+    # Fallback for blocking transports.
+    loop = asyncio.get_event_loop()
+    func = functools.partial(transport.transition, link, decoders, **options)
+    return await loop.run_in_executor(None, func)
+
+
+class _AsyncBody(object):
+    """
+    Wraps an iterable request body as an asynchronous iterable, which
+    `aiohttp` requires for streaming request bodies.
+
+    Asynchronous generators require Python 3.6+, so this is a class.
+    """
+    def __init__(self, body):
+        self._chunks = iter(body)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._chunks)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+class AsyncResponse(object):
+    """
+    A fully read `aiohttp` response, providing the same interface as
+    a `requests` response, as used by `_decode_result`.
+    """
+    def __init__(self, response, content):
+        self.content = content
+        self.headers = requests.structures.CaseInsensitiveDict(response.headers)
+        self.url = str(response.url)
+        self.status_code = response.status
+        self.reason = response.reason
+
+
+class AsyncHTTPTransport(BaseTransport):
+    """
+    A non-blocking HTTP transport, for use with `Client.get_async()`,
+    `Client.action_async()` and `Client.reload_async()`.
+    """
+    schemes = ['http', 'https']
+
+    def __init__(self, headers=None, auth=None, limit=100, limit_per_host=0, timeout=None):
+        assert aiohttp is not None, (
+            "The 'aiohttp' package must be installed to use AsyncHTTPTransport."
+        )
+        if headers:
+            headers = {key.lower(): value for key, value in headers.items()}
+
+        # The `requests` session is never used to send requests, only to
+        # prepare them, so that request building and authentication behave
+        # exactly as they do for `HTTPTransport`.
+        session = requests.Session()
+        if auth is not None:
+            session.auth = auth
+
+        self._headers = itypes.Dict(headers or {})
+        self._session = session
+        self._allow_cookies = getattr(auth, 'allow_cookies', False)
+        self._limit = limit
+        self._limit_per_host = limit_per_host
+        self._timeout = timeout
+        self._client_session = None
+        self._loop = None
+
+    @property
+    def headers(self):
+        return self._headers
+
+    def transition(self, link, decoders, params=None, link_ancestors=None, force_codec=False):
+        msg = (
+            "AsyncHTTPTransport does not support blocking requests. "
+            "Use 'Client.action_async()' or 'Client.get_async()' instead."
+        )
+        raise exceptions.NetworkError(msg)
+
+    def _get_client_session(self):
+        # Client sessions are bound to the event loop that they were created in.
+        loop = asyncio.get_event_loop()
+        if self._client_session is None or self._client_session.closed or self._loop is not loop:
+            connector = aiohttp.TCPConnector(limit=self._limit, limit_per_host=self._limit_per_host)
+            if self._allow_cookies:
+                cookie_jar = aiohttp.CookieJar()
+            else:
+                cookie_jar = aiohttp.DummyCookieJar()
+            timeout = aiohttp.ClientTimeout(total=self._timeout)
+            self._client_session = aiohttp.ClientSession(
+                connector=connector, cookie_jar=cookie_jar, timeout=timeout
+            )
+            self._loop = loop
+        return self._client_session
+
+    async def close(self):
+        if self._client_session is not None:
+            await self._client_session.close()
+            self._client_session = None
+
+    async def _send(self, request):
+        body = request.body
+        if body is not None and not isinstance(body, (bytes, str)) and not hasattr(body, 'read'):
+            body = _AsyncBody(body)
+
+        client_session = self._get_client_session()
+        try:
+            async with client_session.request(
+                request.method, request.url, headers=dict(request.headers),
+                data=body, allow_redirects=True
+            ) as response:
+                content = await response.read()
+        except aiohttp.ClientError as exc:
+            raise exceptions.NetworkError(str(exc))
+        return AsyncResponse(response, content)
+
+    async def transition_async(self, link, decoders, params=None, link_ancestors=None, force_codec=False):
+        session = self._session
+        method = _get_method(link.action)
+        encoding = _get_encoding(link.encoding)
+        params = _get_params(method, encoding, link.fields, params)
+        url = _get_url(link.url, params.path)
+        headers = _get_headers(url, decoders)
+        headers.update(self.headers)
+
+        request = _build_http_request(session, url, method, headers, encoding, params)
+        response = await self._send(request)
+        result = _decode_result(response, decoders, force_codec)
+
+        if isinstance(result, Document) and link_ancestors:
+            result = _handle_inplace_replacements(result, link, link_ancestors)
+
+        if isinstance(result, Error):
+            raise exceptions.ErrorMessage(result)
+
+        return result
@@ -0,0 +1,56 @@
+# coding: utf-8
+import threading
+
+
+class _Call(object):
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.exception = None
+
+
+class SingleFlight(object):
+    """
+    Coalesces concurrent calls that share the same key, so that only one
+    of them runs, and its outcome is shared with every other caller.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def __len__(self):
+        return len(self._calls)
+
+    def do(self, key, func):
+        """
+        Call `func`, unless a call with the same key is already in flight,
+        in which case wait for it to complete instead.
+
+        Returns a two-tuple of (result, shared), where `shared` indicates
+        that the result came from another caller. If the call raises an
+        exception then every waiting caller raises it.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                shared = True
+            else:
+                shared = False
+                call = self._calls[key] = _Call()
+
+        if shared:
+            call.done.wait()
+            if call.exception is not None:
+                raise call.exception
+            return (call.result, True)
+
+        try:
+            call.result = func()
+        except Exception as exc:
+            call.exception = exc
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return (call.result, False)
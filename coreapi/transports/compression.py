@@ -0,0 +1,100 @@
+# coding: utf-8
+from coreapi.compat import text_type
+from coreapi.utils import Counters
+import zlib
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+def _gzip(content):
+    compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    return compressor.compress(content) + compressor.flush()
+
+
+def _deflate(content):
+    return zlib.compress(content)
+
+
+def get_compressors():
+    """
+    Return a dictionary of the available request body compression functions,
+    keyed by content coding.
+    """
+    compressors = {
+        'gzip': _gzip,
+        'deflate': _deflate
+    }
+    if brotli is not None:
+        compressors['br'] = brotli.compress
+    if zstandard is not None:
+        compressors['zstd'] = lambda content: zstandard.ZstdCompressor().compress(content)
+    return compressors
+
+
+def get_accept_encoding():
+    """
+    Return an 'Accept-Encoding' header value, listing every content coding
+    that responses may be transparently decoded from.
+    """
+    # `urllib3` handles decoding, and supports 'br' and 'zstd' responses
+    # whenever the relevant libraries are installed.
+    from urllib3.util.request import ACCEPT_ENCODING
+    return ', '.join([coding.strip() for coding in ACCEPT_ENCODING.split(',')])
+
+
+def compress_request(request, encoding, threshold=0):
+    """
+    Compress the body of a prepared request in place, if it is at least
+    `threshold` bytes. Streamed request bodies are left unchanged.
+    """
+    body = request.body
+    if isinstance(body, text_type):
+        body = body.encode('utf-8')
+    if not isinstance(body, bytes) or len(body) < threshold:
+        return
+    if 'Content-Encoding' in request.headers:
+        return
+    compressed = get_compressors()[encoding](body)
+    request.body = compressed
+    request.headers['Content-Encoding'] = encoding
+    request.headers['Content-Length'] = str(len(compressed))
+
+
+class TransferStats(Counters):
+    """
+    Thread-safe counters of the number of body bytes transferred, both before
+    and after any compression is applied.
+    """
+    fields = (
+        'request_bytes', 'request_bytes_compressed',
+        'response_bytes', 'response_bytes_compressed'
+    )
+
+
+def count_response(response, stats):
+    """
+    Record the size of the response content, as it is read, both as
+    received and after it has been decoded.
+    """
+    iter_content = getattr(response, 'iter_content', None)
+    if iter_content is None:
+        return
+
+    def counting_iter_content(*args, **kwargs):
+        decoded = 0
+        for chunk in iter_content(*args, **kwargs):
+            decoded += len(chunk)
+            yield chunk
+        raw = getattr(response, 'raw', None)
+        received = raw.tell() if hasattr(raw, 'tell') else decoded
+        stats.add(response_bytes=decoded, response_bytes_compressed=received)
+
+    response.iter_content = counting_iter_content
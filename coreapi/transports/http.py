@@ -1,15 +1,28 @@
 # coding: utf-8
 from __future__ import unicode_literals
 from collections import OrderedDict
-from coreapi import exceptions, utils
-from coreapi.compat import cookiejar, urlparse
+from coreapi import exceptions, instrumentation, utils
+from coreapi.cache import (
+    copy_result, create_entry, get_cache_key, get_conditional_headers,
+    is_fresh, update_entry
+)
+from coreapi.compat import cookiejar, monotonic, text_type, urlparse
 from coreapi.document import Document, Object, Link, Array, Error
+from coreapi.streaming import get_array
 from coreapi.transports.base import BaseTransport
+from coreapi.transports.coalesce import SingleFlight
+from coreapi.transports.compression import (
+    TransferStats, compress_request, count_response, get_accept_encoding,
+    get_compressors
+)
+from coreapi.transports.multipart import get_multipart_body
 from coreapi.utils import guess_filename, is_file, File
 import collections
+import itertools
 import requests
 import itypes
 import mimetypes
+import threading
 import uritemplate
 import warnings
 
@@ -17,18 +30,10 @@ import warnings
 Params = collections.namedtuple('Params', ['path', 'query', 'data', 'files'])
 empty_params = Params({}, {}, {}, {})
 
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
 
-class ForceMultiPartDict(dict):
-    """
-    A dictionary that always evaluates as True.
-    Allows us to force requests to use multipart encoding, even when no
-    file parameters are passed.
-    """
-    def __bool__(self):
-        return True
-
-    def __nonzero__(self):
-        return True
+# Used when streaming response content, if the codec does not set a chunk size.
+DEFAULT_CHUNK_SIZE = 64 * 1024
 
 
 class BlockAll(cookiejar.CookiePolicy):
@@ -80,6 +85,112 @@ class CallbackAdapter(requests.adapters.HTTPAdapter):
         return response
 
 
+class PoolingAdapter(requests.adapters.HTTPAdapter):
+    """
+    Custom requests HTTP adapter, that supports evicting the connection pools
+    of any hosts that have not been used for `idle_timeout` seconds.
+    """
+    def __init__(self, idle_timeout=None, **kwargs):
+        self.idle_timeout = idle_timeout
+        self._last_used = {}
+        self._evict_lock = threading.Lock()
+        super(PoolingAdapter, self).__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        if self.idle_timeout is not None:
+            self.evict_idle()
+            parsed = urlparse.urlparse(request.url)
+            self._last_used[_get_pool_host(parsed.scheme, parsed.hostname, parsed.port)] = monotonic()
+        return super(PoolingAdapter, self).send(request, **kwargs)
+
+    def evict_idle(self):
+        """
+        Close the connection pools of any hosts that have been idle for
+        longer than `idle_timeout`.
+        """
+        now = monotonic()
+        with self._evict_lock:
+            idle = set([
+                host for host, last_used in self._last_used.items()
+                if now - last_used > self.idle_timeout
+            ])
+            if not idle:
+                return
+            pools = self.poolmanager.pools
+            for key in list(pools.keys()):
+                host = _get_pool_host(key.key_scheme, key.key_host, key.key_port)
+                if host in idle:
+                    try:
+                        del pools[key]
+                    except KeyError:  # pragma: nocover
+                        pass
+            for host in idle:
+                self._last_used.pop(host, None)
+
+
+def _get_pool_host(scheme, host, port=None):
+    """
+    Return a string identifying the connection pool for a given host.
+    """
+    if port is None:
+        port = {'http': 80, 'https': 443}.get(scheme)
+    return '%s://%s:%s' % (scheme, host, port)
+
+
+def _get_connection_pool_stats(pool):
+    """
+    Return the live occupancy of a single `urllib3` connection pool.
+    """
+    # The queue is filled with `None` placeholders up to `maxsize`, which
+    # are replaced by connections as they are created and returned.
+    maxsize = pool.pool.maxsize
+    available = pool.pool.qsize()
+    idle = len([conn for conn in list(pool.pool.queue) if conn is not None])
+    return {
+        'maxsize': maxsize,
+        'in_use': max(maxsize - available, 0),
+        'idle': idle,
+        'num_connections': pool.num_connections,
+        'num_requests': pool.num_requests
+    }
+
+
+def _get_pool_stats(adapter):
+    """
+    Return the live occupancy of each connection pool held by an adapter.
+    """
+    if hasattr(adapter, 'pool_stats'):
+        return adapter.pool_stats()
+
+    poolmanager = getattr(adapter, 'poolmanager', None)
+    if poolmanager is None:
+        return {}
+
+    stats = {}
+    for key in list(poolmanager.pools.keys()):
+        pool = poolmanager.pools.get(key)
+        if pool is None or pool.pool is None:
+            continue
+        host = _get_pool_host(key.key_scheme, key.key_host, key.key_port)
+        stats[host] = _get_connection_pool_stats(pool)
+    return stats
+
+
+def _get_pooling_adapter(options):
+    """
+    Return an adapter for the given pool options, using the `requests`
+    defaults for any options that are not set.
+    """
+    kwargs = {
+        'pool_connections': options.get('pool_connections'),
+        'pool_maxsize': options.get('pool_maxsize'),
+        'pool_block': options.get('pool_block'),
+        'idle_timeout': options.get('pool_idle_timeout')
+    }
+    kwargs = {key: value for key, value in kwargs.items() if value is not None}
+    return PoolingAdapter(**kwargs)
+
+
 def _get_method(action):
     if not action:
         return 'GET'
@@ -215,8 +326,10 @@ def _build_http_request(session, url, method, headers=None, encoding=None, param
         if encoding == 'application/json':
             opts['json'] = params.data
         elif encoding == 'multipart/form-data':
-            opts['data'] = params.data
-            opts['files'] = ForceMultiPartDict(params.files)
+            # Encoded incrementally, so that file uploads are streamed.
+            body, content_type = get_multipart_body(params.data, params.files)
+            opts['data'] = body
+            opts['headers']['Content-Type'] = content_type
         elif encoding == 'application/x-www-form-urlencoded':
             opts['data'] = params.data
         elif encoding == 'application/octet-stream':
@@ -271,30 +384,127 @@ def _coerce_to_error(obj, default_title):
     return Error(title=default_title, content={'message': obj})
 
 
-def _decode_result(response, decoders, force_codec=False):
+def _get_decoding_options(response):
     """
-    Given an HTTP response, return the decoded Core API document.
+    Return the options to pass to the codec when decoding a response.
     """
-    if response.content:
-        # Content returned in response. We should decode it.
-        if force_codec:
-            codec = decoders[0]
-        else:
-            content_type = response.headers.get('content-type')
-            codec = utils.negotiate_decoder(decoders, content_type)
+    options = {
+        'base_url': response.url
+    }
+    if 'content-type' in response.headers:
+        options['content_type'] = response.headers['content-type']
+    if 'content-disposition' in response.headers:
+        options['content_disposition'] = response.headers['content-disposition']
+    return options
 
-        options = {
-            'base_url': response.url
-        }
-        if 'content-type' in response.headers:
-            options['content_type'] = response.headers['content-type']
-        if 'content-disposition' in response.headers:
-            options['content_disposition'] = response.headers['content-disposition']
 
-        result = codec.load(response.content, **options)
+def _get_streaming_codec(response, decoders, force_codec=False, method='decode_stream'):
+    """
+    Return the codec to use if the response content should be streamed
+    to the codec, rather than read into memory, or `None` otherwise.
+
+    `method` is the name of the codec method that the content is streamed to.
+    """
+    if not hasattr(response, 'iter_content') or response.status_code >= 400:
+        return None
+    if force_codec:
+        codec = decoders[0]
     else:
+        try:
+            codec = utils.negotiate_decoder(decoders, response.headers.get('content-type'))
+        except exceptions.NoCodecAvailable:
+            return None
+    if hasattr(codec, method):
+        return codec
+    return None
+
+
+def _decode_stream(response, codec):
+    """
+    Stream the response content to a codec, without reading it into memory.
+    """
+    chunk_size = getattr(codec, 'chunk_size', None) or DEFAULT_CHUNK_SIZE
+    chunks = response.iter_content(chunk_size)
+    try:
+        for chunk in chunks:
+            if chunk:
+                options = _get_decoding_options(response)
+                return codec.decode_stream(itertools.chain([chunk], chunks), **options)
         # No content returned in response.
-        result = None
+        return None
+    finally:
+        response.close()
+
+
+def _iter_decode(response, codec, path):
+    """
+    Stream the response content to a codec, yielding each item as it is decoded.
+    """
+    chunk_size = getattr(codec, 'chunk_size', None) or DEFAULT_CHUNK_SIZE
+    chunks = response.iter_content(chunk_size)
+    try:
+        for item in codec.iter_decode(chunks, path=path, **_get_decoding_options(response)):
+            yield item
+    finally:
+        response.close()
+
+
+def _get_request_size(request):
+    """
+    Return the number of bytes in the request body, if known.
+    """
+    body = request.body
+    if body is None:
+        return 0
+    if isinstance(body, text_type):
+        return len(body.encode('utf-8'))
+    if isinstance(body, bytes):
+        return len(body)
+    length = request.headers.get('Content-Length')
+    return int(length) if length else 0
+
+
+def _get_response_size(response):
+    """
+    Return the number of bytes of content received, before any decompression.
+    """
+    raw = getattr(response, 'raw', None)
+    if hasattr(raw, 'tell'):
+        return raw.tell()
+    return len(response.content or b'')
+
+
+def _decode_result(response, decoders, force_codec=False):
+    """
+    Given an HTTP response, return the decoded Core API document.
+    """
+    codec = _get_streaming_codec(response, decoders, force_codec)
+    if codec is not None:
+        # Reading the response body is included in the decoding time.
+        with instrumentation.phase('decode'):
+            result = _decode_stream(response, codec)
+    else:
+        with instrumentation.phase('read_body'):
+            content = response.content
+        if content:
+            # Content returned in response. We should decode it.
+            if force_codec:
+                codec = decoders[0]
+            else:
+                content_type = response.headers.get('content-type')
+                codec = utils.negotiate_decoder(decoders, content_type)
+
+            options = _get_decoding_options(response)
+            with instrumentation.phase('decode'):
+                result = codec.load(content, **options)
+        else:
+            # No content returned in response.
+            result = None
+
+    record = instrumentation.current_record()
+    if record is not None:
+        record.codec = getattr(codec, 'media_type', None)
+        record.response_bytes += _get_response_size(response)
 
     # Coerce 4xx and 5xx codes into errors.
     is_error = response.status_code >= 400 and response.status_code <= 599
@@ -334,7 +544,10 @@ def _handle_inplace_replacements(document, link, link_ancestors):
 class HTTPTransport(BaseTransport):
     schemes = ['http', 'https']
 
-    def __init__(self, credentials=None, headers=None, auth=None, session=None, request_callback=None, response_callback=None):
+    def __init__(self, credentials=None, headers=None, auth=None, session=None, request_callback=None, response_callback=None,
+                 pool_connections=None, pool_maxsize=None, pool_block=None, pool_idle_timeout=None, host_pools=None,
+                 cache=None, compress_requests=None, compress_threshold=1024, accept_encoding=None,
+                 cache_environment=True, coalesce_requests=False, retry=None):
         if headers:
             headers = {key.lower(): value for key, value in headers.items()}
         if session is None:
@@ -359,31 +572,249 @@ class HTTPTransport(BaseTransport):
             session.mount('https://', CallbackAdapter(request_callback, response_callback))
             session.mount('http://', CallbackAdapter(request_callback, response_callback))
 
-        self._headers = itypes.Dict(headers or {})
+        pool_options = {
+            'pool_connections': pool_connections,
+            'pool_maxsize': pool_maxsize,
+            'pool_block': pool_block,
+            'pool_idle_timeout': pool_idle_timeout
+        }
+        if any([value is not None for value in pool_options.values()]):
+            adapter = _get_pooling_adapter(pool_options)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+        for host, options in (host_pools or {}).items():
+            unknown = set(options.keys()) - set(pool_options.keys())
+            assert not unknown, "Unknown pool options for host '%s': %s" % (host, ', '.join(sorted(unknown)))
+            adapter = _get_pooling_adapter(dict(pool_options, **options))
+            session.mount('https://%s/' % host, adapter)
+            session.mount('http://%s/' % host, adapter)
+
+        if compress_requests is not None:
+            compressors = get_compressors()
+            assert compress_requests in compressors, (
+                "Unsupported 'compress_requests' value '%s'. Available encodings are: %s" %
+                (compress_requests, ', '.join(sorted(compressors.keys())))
+            )
+        headers = dict(headers or {})
+        if accept_encoding is not None:
+            headers.setdefault('accept-encoding', get_accept_encoding() if accept_encoding is True else accept_encoding)
+
+        self._headers = itypes.Dict(headers)
         self._session = session
+        self._cache = cache
+        self._compress_requests = compress_requests
+        self._compress_threshold = compress_threshold
+        self._transfer_stats = TransferStats()
+        self._cache_environment = cache_environment
+        self._environment_settings = {}
+        self._singleflight = SingleFlight() if coalesce_requests else None
+        self._coalesced_requests = 0
+        self._coalesced_lock = threading.Lock()
+        self._retry = retry
 
     @property
     def headers(self):
         return self._headers
 
-    def transition(self, link, decoders, params=None, link_ancestors=None, force_codec=False):
+    @property
+    def cache(self):
+        return self._cache
+
+    @property
+    def transfer_stats(self):
+        return self._transfer_stats
+
+    @property
+    def retry(self):
+        return self._retry
+
+    @property
+    def coalesced_requests(self):
+        return self._coalesced_requests
+
+    def pool_stats(self):
+        """
+        Return the live occupancy of the connection pools used by the session,
+        as a dictionary keyed by 'scheme://host:port'.
+        """
+        stats = {}
+        for adapter in set(self._session.adapters.values()):
+            stats.update(_get_pool_stats(adapter))
+        return stats
+
+    def _compress(self, request):
+        """
+        Compress the request body if required, and record its size.
+        """
+        body = request.body
+        if isinstance(body, text_type):
+            body = body.encode('utf-8')
+        if not isinstance(body, bytes):
+            return
+        if self._compress_requests is not None:
+            compress_request(request, self._compress_requests, self._compress_threshold)
+        sent = request.body
+        if isinstance(sent, text_type):
+            sent = sent.encode('utf-8')
+        self._transfer_stats.add(request_bytes=len(body), request_bytes_compressed=len(sent))
+
+    def refresh_environment(self):
+        """
+        Discard any cached proxy and certificate settings, so that they are
+        determined again from the session and environment.
+        """
+        self._environment_settings = {}
+
+    def _get_environment_settings(self, url):
+        """
+        Return the proxy, certificate and streaming settings to use when
+        sending a request. These are determined once for each scheme and host.
+        """
+        if not self._cache_environment:
+            return self._session.merge_environment_settings(url, None, True, None, None)
+
+        url_components = urlparse.urlparse(url)
+        key = (url_components.scheme, url_components.netloc)
+        settings = self._environment_settings.get(key)
+        if settings is None:
+            settings = self._session.merge_environment_settings(url, None, True, None, None)
+            self._environment_settings[key] = settings
+        return settings
+
+    def _send_once(self, request):
         session = self._session
+        settings = self._get_environment_settings(request.url)
+        with instrumentation.phase('network') as record:
+            response = session.send(request, **settings)
+        if record is not None:
+            record.status_code = response.status_code
+        count_response(response, self._transfer_stats)
+        return response
+
+    def _send(self, request):
+        if self._retry is None:
+            return self._send_once(request)
+        return self._retry.send(request, self._send_once)
+
+    def _fetch(self, request, decoders, force_codec=False):
+        response = self._send(request)
+        return _decode_result(response, decoders, force_codec)
+
+    def _fetch_cached(self, request, decoders, force_codec=False):
+        """
+        Fetch and decode a response, using the cache for `GET` requests.
+        Unsafe requests invalidate any cached response for the same URL.
+        """
+        cache = self._cache
+        key = get_cache_key(request)
+        if request.method not in SAFE_METHODS:
+            cache.delete(key)
+            return self._fetch(request, decoders, force_codec)
+        elif request.method != 'GET':
+            return self._fetch(request, decoders, force_codec)
+
+        accept = request.headers.get('accept')
+        entry = cache.get(key)
+        if entry is not None and entry.accept != accept:
+            entry = None
+        if entry is not None:
+            if is_fresh(entry):
+                return copy_result(entry.result)
+            request.headers.update(get_conditional_headers(entry))
+
+        response = self._send(request)
+        if entry is not None and response.status_code == 304:
+            # Not modified. Return the previously decoded result.
+            response.content  # Release the connection back to the pool.
+            entry = update_entry(entry, response)
+            cache.set(key, entry)
+            return copy_result(entry.result)
+
+        result = _decode_result(response, decoders, force_codec)
+        entry = create_entry(response, result, accept)
+        if entry is None:
+            cache.delete(key)
+            return result
+        cache.set(key, entry)
+        return copy_result(result)
+
+    def _fetch_coalesced(self, request, decoders, force_codec=False):
+        """
+        Fetch and decode a response, sharing a single in-flight request
+        between concurrent callers making an identical safe request.
+        """
+        fetch = self._fetch if (self._cache is None) else self._fetch_cached
+        if request.method not in SAFE_METHODS or request.body is not None:
+            return fetch(request, decoders, force_codec)
+
+        key = (request.method, request.url, request.headers.get('accept'), force_codec)
+        result, shared = self._singleflight.do(key, lambda: fetch(request, decoders, force_codec))
+        if not shared:
+            return result
+        if hasattr(result, 'read'):
+            # Downloaded files cannot be shared between callers.
+            return fetch(request, decoders, force_codec)
+
+        with self._coalesced_lock:
+            self._coalesced_requests += 1
+        return copy_result(result)
+
+    def _build_request(self, link, decoders, params=None):
         method = _get_method(link.action)
         encoding = _get_encoding(link.encoding)
-        params = _get_params(method, encoding, link.fields, params)
-        url = _get_url(link.url, params.path)
-        headers = _get_headers(url, decoders)
-        headers.update(self.headers)
-
-        request = _build_http_request(session, url, method, headers, encoding, params)
-        settings = session.merge_environment_settings(request.url, None, None, None, None)
-        response = session.send(request, **settings)
-        result = _decode_result(response, decoders, force_codec)
+        with instrumentation.phase('get_params'):
+            params = _get_params(method, encoding, link.fields, params)
+        with instrumentation.phase('build_request') as record:
+            url = _get_url(link.url, params.path)
+            headers = _get_headers(url, decoders)
+            headers.update(self.headers)
+
+            request = _build_http_request(self._session, url, method, headers, encoding, params)
+            self._compress(request)
+        if record is not None:
+            record.method = method
+            record.url = request.url
+            record.request_bytes = _get_request_size(request)
+        return request
+
+    def transition(self, link, decoders, params=None, link_ancestors=None, force_codec=False):
+        request = self._build_request(link, decoders, params)
+
+        if self._singleflight is not None:
+            result = self._fetch_coalesced(request, decoders, force_codec)
+        elif self._cache is None:
+            result = self._fetch(request, decoders, force_codec)
+        else:
+            result = self._fetch_cached(request, decoders, force_codec)
 
         if isinstance(result, Document) and link_ancestors:
-            result = _handle_inplace_replacements(result, link, link_ancestors)
+            with instrumentation.phase('inplace_replacements'):
+                result = _handle_inplace_replacements(result, link, link_ancestors)
 
         if isinstance(result, Error):
             raise exceptions.ErrorMessage(result)
 
         return result
+
+    def stream(self, link, decoders, params=None, path=(), force_codec=False):
+        """
+        Make the request, and return an iterator over the items of the array
+        at `path` in the response, which decodes each item as it is received.
+        The cache is not used.
+
+        If the codec cannot decode incrementally, the response is decoded in
+        full, and the items are then returned from the result.
+        """
+        request = self._build_request(link, decoders, params)
+        response = self._send(request)
+        codec = _get_streaming_codec(response, decoders, force_codec, method='iter_decode')
+        if codec is None:
+            result = _decode_result(response, decoders, force_codec)
+            if isinstance(result, Error):
+                raise exceptions.ErrorMessage(result)
+            return iter(get_array(result, path))
+
+        record = instrumentation.current_record()
+        if record is not None:
+            record.codec = getattr(codec, 'media_type', None)
+        return _iter_decode(response, codec, path)
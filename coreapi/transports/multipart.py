@@ -0,0 +1,163 @@
+# coding: utf-8
+from __future__ import unicode_literals
+from coreapi.compat import text_type
+from coreapi.utils import File, guess_filename
+from urllib3.fields import RequestField
+from urllib3.filepost import choose_boundary
+import io
+import os
+
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+
+def _get_content_length(content):
+    """
+    Return the length of some upload content, or `None` if it cannot be
+    determined without reading the content.
+    """
+    if isinstance(content, bytes):
+        return len(content)
+    elif isinstance(content, text_type):
+        return len(content.encode('utf-8'))
+    elif hasattr(content, 'fileno'):
+        try:
+            size = os.fstat(content.fileno()).st_size
+            return max(size - content.tell(), 0)
+        except (AttributeError, IOError, OSError, io.UnsupportedOperation):
+            pass
+    if hasattr(content, 'seek') and hasattr(content, 'tell'):
+        try:
+            position = content.tell()
+            content.seek(0, os.SEEK_END)
+            size = content.tell()
+            content.seek(position)
+            return max(size - position, 0)
+        except (AttributeError, IOError, OSError, io.UnsupportedOperation):
+            pass
+    return None
+
+
+def _iter_content(content, chunk_size):
+    """
+    Iterate over some upload content, in chunks of bytes.
+    """
+    if isinstance(content, bytes):
+        yield content
+    elif isinstance(content, text_type):
+        yield content.encode('utf-8')
+    elif hasattr(content, 'read'):
+        while True:
+            chunk = content.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk.encode('utf-8') if isinstance(chunk, text_type) else chunk
+    else:
+        for chunk in content:
+            yield chunk.encode('utf-8') if isinstance(chunk, text_type) else chunk
+
+
+def _render_headers(name, filename=None, content_type=None):
+    field = RequestField(name=name, data=b'', filename=filename)
+    field.make_multipart(content_type=content_type)
+    return field.render_headers().encode('utf-8')
+
+
+class MultipartEncoder(io.RawIOBase):
+    """
+    Encodes form data and files as a 'multipart/form-data' request body,
+    which is generated incrementally as it is read, rather than being
+    held in memory.
+
+    Follows the same encoding as `requests` uses for the `data` and `files`
+    arguments, with data fields first, followed by file fields.
+    """
+    def __init__(self, data, files, boundary=None, chunk_size=DEFAULT_CHUNK_SIZE):
+        self.boundary = boundary or choose_boundary()
+        self.chunk_size = chunk_size
+        self._parts = []
+        self._position = 0
+        self._buffer = b''
+        self._chunks = None
+
+        for key, value in (data or {}).items():
+            values = value if isinstance(value, (list, tuple)) else [value]
+            for item in values:
+                if not isinstance(item, (bytes, text_type)):
+                    item = text_type(item)
+                self._parts.append((_render_headers(key), item))
+
+        for key, value in (files or {}).items():
+            if isinstance(value, File):
+                filename, content, content_type = value.name, value.content, value.content_type
+            else:
+                filename, content, content_type = guess_filename(value) or key, value, None
+            if content is None:
+                continue
+            self._parts.append((_render_headers(key, filename, content_type), content))
+
+        self.length = self._get_length()
+
+    @property
+    def content_type(self):
+        return 'multipart/form-data; boundary=%s' % self.boundary
+
+    def _get_length(self):
+        boundary_length = len(self.boundary.encode('ascii'))
+        length = boundary_length + 6  # Closing '--boundary--\r\n'.
+        for headers, content in self._parts:
+            content_length = _get_content_length(content)
+            if content_length is None:
+                return None
+            # Opening '--boundary\r\n', headers, content, and trailing '\r\n'.
+            length += boundary_length + 4 + len(headers) + content_length + 2
+        return length
+
+    def iter_chunks(self):
+        boundary = self.boundary.encode('ascii')
+        for headers, content in self._parts:
+            yield b'--' + boundary + b'\r\n' + headers
+            for chunk in _iter_content(content, self.chunk_size):
+                if chunk:
+                    yield chunk
+            yield b'\r\n'
+        yield b'--' + boundary + b'--\r\n'
+
+    def __len__(self):
+        if self.length is None:
+            raise TypeError('The length of the multipart content is not known.')
+        return self.length
+
+    def readable(self):
+        return True
+
+    def tell(self):
+        return self._position
+
+    def read(self, size=-1):
+        if self._chunks is None:
+            self._chunks = self.iter_chunks()
+        while size is None or size < 0 or len(self._buffer) < size:
+            try:
+                self._buffer += next(self._chunks)
+            except StopIteration:
+                break
+        if size is None or size < 0:
+            data, self._buffer = self._buffer, b''
+        else:
+            data, self._buffer = self._buffer[:size], self._buffer[size:]
+        self._position += len(data)
+        return data
+
+
+def get_multipart_body(data, files, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Return a two-tuple of (body, content_type) for a multipart request.
+
+    The body is a file-like object if the total length is known, so that the
+    'Content-Length' header can be set, or a generator for a chunked upload.
+    """
+    encoder = MultipartEncoder(data, files, chunk_size=chunk_size)
+    if encoder.length is None:
+        return (encoder.iter_chunks(), encoder.content_type)
+    return (encoder, encoder.content_type)
@@ -0,0 +1,249 @@
+# coding: utf-8
+from coreapi import exceptions
+from coreapi.cache import _parse_http_date
+from coreapi.compat import monotonic, text_type, urlparse
+from coreapi.utils import Counters
+import random
+import requests
+import threading
+import time
+
+
+IDEMPOTENT_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE', 'PUT', 'DELETE')
+RETRY_STATUSES = (429, 502, 503, 504)
+
+
+def _get_host(url):
+    url_components = urlparse.urlparse(url)
+    return '%s://%s' % (url_components.scheme, url_components.netloc)
+
+
+def _is_connect_error(exc):
+    """
+    Return `True` if the request failed before it could be sent, in which
+    case it is safe to retry, regardless of the method.
+    """
+    if isinstance(exc, requests.exceptions.ConnectTimeout):
+        return True
+    if isinstance(exc, requests.exceptions.ConnectionError):
+        reason = getattr(exc.args[0], 'reason', None) if exc.args else None
+        return 'NewConnectionError' in type(reason).__name__
+    return False
+
+
+def _is_replayable(request):
+    """
+    Streamed request bodies are consumed as they are sent, and cannot be resent.
+    """
+    return request.body is None or isinstance(request.body, (bytes, text_type))
+
+
+class RetryStats(Counters):
+    """
+    Thread-safe counters of retries, and circuit breaker activity.
+    """
+    fields = ('retries', 'breaker_trips', 'breaker_rejections')
+
+
+class CircuitBreaker(object):
+    """
+    Tracks failures for each host. Once `failure_threshold` consecutive
+    requests to a host have failed the circuit opens, and requests to that
+    host fail immediately. After `reset_timeout` seconds a single trial
+    request is allowed. If it succeeds the circuit closes again.
+    """
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        assert failure_threshold >= 1, "'failure_threshold' must be at least 1."
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures = {}
+        self._opened = {}
+        self._trials = set()
+
+    def state(self, host):
+        """
+        Return one of 'closed', 'open' or 'half-open'.
+        """
+        with self._lock:
+            opened = self._opened.get(host)
+            if opened is None:
+                return 'closed'
+            if host in self._trials or monotonic() - opened >= self.reset_timeout:
+                return 'half-open'
+            return 'open'
+
+    def allow(self, host):
+        """
+        Return `True` if a request to the given host may be sent.
+        """
+        return self._allow(host)[0]
+
+    def _allow(self, host):
+        """
+        Return a two-tuple of (allowed, trial), where `trial` is `True` if
+        the request is the trial request for a half-open circuit.
+        """
+        with self._lock:
+            opened = self._opened.get(host)
+            if opened is None:
+                return (True, False)
+            if host in self._trials or monotonic() - opened < self.reset_timeout:
+                return (False, False)
+            self._trials.add(host)
+            return (True, True)
+
+    def release_trial(self, host):
+        """
+        End a trial request without recording its outcome, so that another
+        trial request may be sent.
+        """
+        with self._lock:
+            self._trials.discard(host)
+
+    def record_success(self, host):
+        with self._lock:
+            self._failures.pop(host, None)
+            self._opened.pop(host, None)
+            self._trials.discard(host)
+
+    def record_failure(self, host):
+        """
+        Record a failed request. Returns `True` if the circuit was opened.
+        """
+        with self._lock:
+            if host in self._trials:
+                # The trial request failed. Open the circuit again.
+                self._trials.discard(host)
+                self._opened[host] = monotonic()
+                return True
+            if host in self._opened:
+                return False
+            failures = self._failures.get(host, 0) + 1
+            self._failures[host] = failures
+            if failures >= self.failure_threshold:
+                self._failures.pop(host)
+                self._opened[host] = monotonic()
+                return True
+            return False
+
+    def reset(self):
+        with self._lock:
+            self._failures.clear()
+            self._opened.clear()
+            self._trials.clear()
+
+
+class RetryPolicy(object):
+    """
+    Retries failed requests, with jittered exponential backoff.
+
+    Requests are retried if the connection fails, or if the response status
+    code is one of `retry_statuses`, provided that the method is one of
+    `retry_methods`. Requests that failed to connect are always retried, as
+    they were never sent.
+
+    The delay before retry `n` is chosen at random between zero and
+    `backoff_factor * (2 ** n)`, up to `backoff_max` seconds. If the response
+    includes a 'Retry-After' header, that delay is used instead.
+    """
+    def __init__(self, max_retries=3, backoff_factor=0.1, backoff_max=30.0, jitter=True,
+                 retry_statuses=RETRY_STATUSES, retry_methods=IDEMPOTENT_METHODS,
+                 respect_retry_after=True, circuit_breaker=None):
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.backoff_max = backoff_max
+        self.jitter = jitter
+        self.retry_statuses = frozenset(retry_statuses)
+        self.retry_methods = frozenset([method.upper() for method in retry_methods])
+        self.respect_retry_after = respect_retry_after
+        self.circuit_breaker = circuit_breaker
+        self.stats = RetryStats()
+
+    def get_backoff(self, retry):
+        delay = min(self.backoff_factor * (2 ** retry), self.backoff_max)
+        if self.jitter:
+            return random.uniform(0, delay)
+        return delay
+
+    def get_retry_after(self, response):
+        """
+        Return the delay requested by a 'Retry-After' header, or `None`.
+        """
+        value = response.headers.get('retry-after')
+        if not value or not self.respect_retry_after:
+            return None
+        value = value.strip()
+        if value.isdigit():
+            delay = int(value)
+        else:
+            date = _parse_http_date(value)
+            if date is None:
+                return None
+            delay = date - time.time()
+        return min(max(delay, 0), self.backoff_max)
+
+    def sleep(self, delay):
+        time.sleep(delay)
+
+    def is_failure(self, response):
+        """
+        Return `True` if the response indicates that the host is unhealthy.
+        """
+        return response.status_code >= 500 and response.status_code in self.retry_statuses
+
+    def send(self, request, send):
+        """
+        Send a prepared request using the `send` function, retrying as required.
+        """
+        breaker = self.circuit_breaker
+        host = _get_host(request.url)
+        can_retry = _is_replayable(request)
+        idempotent = request.method in self.retry_methods
+        retry = 0
+
+        while True:
+            trial = False
+            if breaker is not None:
+                allowed, trial = breaker._allow(host)
+                if not allowed:
+                    self.stats.add(breaker_rejections=1)
+                    raise exceptions.CircuitOpenError(
+                        "Circuit open for '%s' after repeated failures." % host
+                    )
+
+            try:
+                response = send(request)
+            except requests.exceptions.RequestException as exc:
+                if breaker is not None and breaker.record_failure(host):
+                    self.stats.add(breaker_trips=1)
+                transient = isinstance(exc, (requests.exceptions.ConnectionError, requests.exceptions.Timeout))
+                should_retry = transient and (idempotent or _is_connect_error(exc))
+                if not (can_retry and should_retry and retry < self.max_retries):
+                    raise
+                delay = self.get_backoff(retry)
+            else:
+                failed = self.is_failure(response)
+                if breaker is not None:
+                    if not failed:
+                        breaker.record_success(host)
+                    elif breaker.record_failure(host):
+                        self.stats.add(breaker_trips=1)
+                retryable = response.status_code in self.retry_statuses and idempotent
+                if not (can_retry and retryable and retry < self.max_retries):
+                    return response
+                delay = self.get_retry_after(response)
+                if delay is None:
+                    delay = self.get_backoff(retry)
+                response.close()
+            finally:
+                if trial:
+                    # If the trial raised any other exception, its outcome is
+                    # unknown. Release it, so that the circuit is not left
+                    # waiting on a trial that will never complete.
+                    breaker.release_trial(host)
+
+            retry += 1
+            self.stats.add(retries=1)
+            if delay > 0:
+                self.sleep(delay)
@@ -0,0 +1,131 @@
+# coding: utf-8
+from coreapi.compat import urlparse
+from coreapi.transports.http import HTTPTransport, _get_connection_pool_stats
+from urllib3._collections import RecentlyUsedContainer
+import requests
+import socket
+import threading
+import urllib3
+
+try:
+    from urllib.parse import quote, unquote
+except ImportError:  # pragma: nocover
+    from urllib import quote, unquote
+
+
+# URLs take the form 'http+unix://%2Fvar%2Frun%2Fapi.sock/path/', with the
+# percent-encoded socket path in place of the hostname.
+SCHEME = 'http+unix'
+
+_register_lock = threading.Lock()
+
+
+def _register_scheme():
+    """
+    Register the scheme with `urlparse`, so that relative URLs in documents
+    are resolved against it. This affects the whole process, so is only done
+    once a Unix socket adapter is first created, rather than on import.
+    """
+    with _register_lock:
+        for schemes in (urlparse.uses_relative, urlparse.uses_netloc):
+            if SCHEME not in schemes:
+                schemes.append(SCHEME)
+
+
+def get_socket_url(socket_path, path='/'):
+    """
+    Return an 'http+unix' URL for the given socket path.
+    """
+    return '%s://%s%s' % (SCHEME, quote(socket_path, safe=''), path)
+
+
+class UnixHTTPConnection(urllib3.connection.HTTPConnection):
+    def __init__(self, socket_path, *args, **kwargs):
+        self.socket_path = socket_path
+        super(UnixHTTPConnection, self).__init__('localhost', *args, **kwargs)
+
+    def _new_conn(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.socket_path)
+        except (IOError, OSError) as exc:
+            sock.close()
+            raise urllib3.exceptions.NewConnectionError(
+                self, 'Failed to connect to %s: %s' % (self.socket_path, exc)
+            )
+        return sock
+
+
+class UnixHTTPConnectionPool(urllib3.connectionpool.HTTPConnectionPool):
+    def __init__(self, socket_path, **kwargs):
+        self.socket_path = socket_path
+        super(UnixHTTPConnectionPool, self).__init__('localhost', **kwargs)
+
+    def _new_conn(self):
+        self.num_connections += 1
+        return UnixHTTPConnection(self.socket_path, timeout=self.timeout.connect_timeout)
+
+
+class UnixSocketAdapter(requests.adapters.HTTPAdapter):
+    """
+    A `requests` adapter that sends requests over Unix domain sockets,
+    keeping a connection pool for each socket path.
+    """
+    def __init__(self, pool_connections=requests.adapters.DEFAULT_POOLSIZE,
+                 pool_maxsize=requests.adapters.DEFAULT_POOLSIZE, pool_block=False, **kwargs):
+        _register_scheme()
+        self._pool_maxsize = pool_maxsize
+        self._pool_block = pool_block
+        self.pools = RecentlyUsedContainer(pool_connections, dispose_func=lambda pool: pool.close())
+        super(UnixSocketAdapter, self).__init__(
+            pool_connections=pool_connections, pool_maxsize=pool_maxsize, pool_block=pool_block, **kwargs
+        )
+
+    def _get_pool(self, url):
+        socket_path = unquote(urlparse.urlparse(url).netloc)
+        with self.pools.lock:
+            pool = self.pools.get(socket_path)
+            if pool is None:
+                pool = UnixHTTPConnectionPool(socket_path, maxsize=self._pool_maxsize, block=self._pool_block)
+                self.pools[socket_path] = pool
+            return pool
+
+    def get_connection(self, url, proxies=None):
+        return self._get_pool(url)
+
+    def get_connection_with_tls_context(self, request, verify, proxies=None, cert=None):
+        return self._get_pool(request.url)
+
+    def request_url(self, request, proxies):
+        return request.path_url
+
+    def pool_stats(self):
+        stats = {}
+        with self.pools.lock:
+            for socket_path in self.pools.keys():
+                pool = self.pools[socket_path]
+                stats[get_socket_url(socket_path, path='')] = _get_connection_pool_stats(pool)
+        return stats
+
+    def close(self):
+        self.pools.clear()
+        super(UnixSocketAdapter, self).close()
+
+
+class UnixSocketTransport(HTTPTransport):
+    """
+    Makes HTTP requests over Unix domain sockets, for URLs using the
+    'http+unix' scheme.
+    """
+    schemes = [SCHEME]
+
+    def __init__(self, pool_connections=None, pool_maxsize=None, pool_block=None, **kwargs):
+        super(UnixSocketTransport, self).__init__(**kwargs)
+        pool_options = {
+            'pool_connections': pool_connections,
+            'pool_maxsize': pool_maxsize,
+            'pool_block': pool_block
+        }
+        pool_options = {key: value for key, value in pool_options.items() if value is not None}
+        self._session.mount(SCHEME + '://', UnixSocketAdapter(**pool_options))
@@ -0,0 +1,208 @@
+# coding: utf-8
+from coreapi.compat import text_type, urlparse
+from coreapi.transports.http import HTTPTransport
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+from urllib3._collections import HTTPHeaderDict
+import io
+import requests
+import sys
+import urllib3
+
+try:
+    from http.client import responses
+    from urllib.parse import unquote_to_bytes
+except ImportError:  # pragma: nocover
+    from httplib import responses
+    from urllib import unquote as unquote_to_bytes
+
+
+class IterableReader(io.RawIOBase):
+    """
+    A readable file-like object, returning the content of an iterable of bytes.
+    """
+    def __init__(self, iterable, on_close=None):
+        self._iterator = iter(iterable)
+        self._buffer = b''
+        self._on_close = on_close
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while not self._buffer:
+            try:
+                self._buffer = next(self._iterator)
+            except StopIteration:
+                return 0
+        size = min(len(buffer), len(self._buffer))
+        buffer[:size] = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        return size
+
+    def close(self):
+        if not self.closed and self._on_close is not None:
+            self._on_close()
+        io.RawIOBase.close(self)
+
+
+def get_request_body(request):
+    """
+    Return the body of a prepared request as bytes.
+    """
+    body = request.body
+    if body is None:
+        return b''
+    elif isinstance(body, text_type):
+        return body.encode('utf-8')
+    elif isinstance(body, bytes):
+        return body
+    elif hasattr(body, 'read'):
+        return body.read()
+    return b''.join(body)
+
+
+def get_server(url):
+    """
+    Return a two-tuple of (host, port) for the given URL.
+    """
+    url_components = urlparse.urlparse(url)
+    default_port = 443 if url_components.scheme == 'https' else 80
+    return (url_components.hostname or 'localhost', url_components.port or default_port)
+
+
+def build_response(adapter, request, status, headers, body):
+    """
+    Return a `requests` response, given the status code, a list of
+    two-tuples of headers, and a file-like object of the body content.
+    """
+    raw = urllib3.HTTPResponse(
+        body=body,
+        headers=HTTPHeaderDict(headers),
+        status=status,
+        reason=responses.get(status, ''),
+        preload_content=False,
+        decode_content=True,
+        request_method=request.method,
+        request_url=request.url
+    )
+    response = requests.Response()
+    response.status_code = status
+    response.headers = CaseInsensitiveDict(raw.headers)
+    response.encoding = get_encoding_from_headers(response.headers)
+    response.raw = raw
+    response.reason = raw.reason
+    response.url = request.url
+    response.request = request
+    response.connection = adapter
+    return response
+
+
+class WSGIAdapter(requests.adapters.BaseAdapter):
+    """
+    A `requests` adapter that sends requests directly to a WSGI application,
+    rather than over the network.
+    """
+    def __init__(self, app):
+        super(WSGIAdapter, self).__init__()
+        self.app = app
+
+    def get_environ(self, request):
+        url_components = urlparse.urlparse(request.url)
+        server_name, server_port = get_server(request.url)
+        body = get_request_body(request)
+        path = unquote_to_bytes(url_components.path or '/')
+        if sys.version_info[0] >= 3:
+            # PEP 3333 'bytes-as-unicode' strings.
+            path = path.decode('latin-1')
+
+        environ = {
+            'REQUEST_METHOD': request.method,
+            'SCRIPT_NAME': '',
+            'PATH_INFO': path,
+            'QUERY_STRING': url_components.query,
+            'SERVER_NAME': server_name,
+            'SERVER_PORT': str(server_port),
+            'SERVER_PROTOCOL': 'HTTP/1.1',
+            'HTTP_HOST': url_components.netloc.rsplit('@', 1)[-1],
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': url_components.scheme,
+            'wsgi.input': io.BytesIO(body),
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': False,
+            'wsgi.run_once': False
+        }
+        for key, value in request.headers.items():
+            key = key.upper().replace('-', '_')
+            if key == 'CONTENT_TYPE':
+                environ[key] = value
+            elif key not in ('CONTENT_LENGTH', 'TRANSFER_ENCODING'):
+                environ['HTTP_' + key] = value
+        environ['CONTENT_LENGTH'] = str(len(body))
+        return environ
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        environ = self.get_environ(request)
+        started = {}
+        written = []
+
+        def start_response(status, headers, exc_info=None):
+            # Nothing is sent until the application returns, so the status
+            # and headers may always be replaced, as when handling an error.
+            started['status'] = int(status.split(' ', 1)[0])
+            started['headers'] = headers
+            return written.append
+
+        result = self.app(environ, start_response)
+        close = getattr(result, 'close', None)
+        chunks = iter(result)
+        try:
+            # Generator applications do not call `start_response` until
+            # the first chunk of the body is requested.
+            first = next(chunks, b'')
+        except Exception:
+            if close is not None:
+                close()
+            raise
+
+        body = IterableReader(_chain(written + [first], chunks), on_close=close)
+        response = build_response(self, request, started['status'], started['headers'], body)
+        if not stream:
+            response.content
+        return response
+
+    def close(self):
+        pass
+
+
+def _chain(first, rest):
+    for chunk in first:
+        yield chunk
+    for chunk in rest:
+        yield chunk
+
+
+class WSGITransport(HTTPTransport):
+    """
+    Makes requests directly to a WSGI application running in the same process,
+    rather than over the network.
+
+    If `hosts` is set, then the transport is only used for URLs with one
+    of the given hostnames. Otherwise it is used for every HTTP URL.
+    """
+    adapter_class = WSGIAdapter
+
+    def __init__(self, app, hosts=None, **kwargs):
+        super(WSGITransport, self).__init__(**kwargs)
+        self._hosts = None if (hosts is None) else [host.lower() for host in hosts]
+        self._adapter = adapter = self.adapter_class(app)
+        self._session.mount('http://', adapter)
+        self._session.mount('https://', adapter)
+
+    @property
+    def hosts(self):
+        return self._hosts
+
+    def close(self):
+        self._adapter.close()
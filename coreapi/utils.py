@@ -4,6 +4,7 @@ from collections import namedtuple
 import os
 import pkg_resources
 import tempfile
+import threading
 
 
 def domain_matches(request, domain):
@@ -147,6 +148,7 @@ if _TemporaryFileWrapper:
     # Ideally we subclass this so that we can present a custom representation.
     class DownloadedFile(_TemporaryFileWrapper):
         basename = None
+        checksum = None
 
         def __repr__(self):
             state = "closed" if self.closed else "open"
@@ -162,9 +164,59 @@ else:
     DownloadedFile = tempfile.NamedTemporaryFile
 
 
+# Statistics utilities. Used by transports to count what they do.
+
+class Counters(object):
+    """
+    Thread-safe counters. Subclasses list the counter names in `fields`.
+    """
+    fields = ()
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = dict.fromkeys(self.fields, 0)
+
+    def add(self, **counts):
+        with self._lock:
+            for key, value in counts.items():
+                self._counts[key] += value
+
+    def as_dict(self):
+        with self._lock:
+            return dict(self._counts)
+
+    def reset(self):
+        with self._lock:
+            self._counts = dict.fromkeys(self.fields, 0)
+
+
+# Reporting utilities. Used when printing timings, such as from the load
+# tester and the benchmarks.
+
+def format_time(seconds):
+    """
+    Return a duration in seconds as a short string, such as '1.50ms'.
+    """
+    for unit, scale in (('s', 1.0), ('ms', 1e-3), ('us', 1e-6)):
+        if seconds >= scale:
+            return '%.2f%s' % (seconds / scale, unit)
+    return '%.0fns' % (seconds / 1e-9)
+
+
 # Negotiation utilities. USed to determine which codec or transport class
 # should be used, given a list of supported instances.
 
+def _matches_hosts(transport, url_components):
+    """
+    Transports may be restricted to a list of hosts, with or without a port.
+    """
+    hosts = getattr(transport, 'hosts', None)
+    if hosts is None:
+        return True
+    netloc = url_components.netloc.rsplit('@', 1)[-1].lower()
+    return netloc in hosts or url_components.hostname in hosts
+
+
 def determine_transport(transports, url):
     """
     Given a URL determine the appropriate transport instance.
@@ -180,7 +232,7 @@ def determine_transport(transports, url):
         raise exceptions.NetworkError("URL missing hostname '%s'." % url)
 
     for transport in transports:
-        if scheme in transport.schemes:
+        if scheme in transport.schemes and _matches_hosts(transport, url_components):
             return transport
 
     raise exceptions.NetworkError("Unsupported URL scheme '%s'." % scheme)
@@ -77,6 +77,9 @@ setup(
         ],
         'coreapi.transports': [
             'http=coreapi.transports:HTTPTransport',
+        ],
+        'console_scripts': [
+            'coreapi-load=coreapi.load:main',
         ]
     },
     classifiers=[
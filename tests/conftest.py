@@ -0,0 +1,117 @@
+# coding: utf-8
+from collections import namedtuple
+import os
+import pytest
+import threading
+
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn, UnixStreamServer
+except ImportError:  # pragma: nocover
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn, UnixStreamServer
+
+
+# A local HTTP server, for tests that need to make real network requests.
+# Tests set `local_server.handler` to a function that takes a `Request`
+# and returns a `Response`.
+
+Request = namedtuple('Request', ['method', 'path', 'headers', 'body'])
+Response = namedtuple('Response', ['status', 'headers', 'body'])
+Response.__new__.__defaults__ = (200, {}, b'')
+
+
+def _read_chunked(rfile):
+    body = b''
+    while True:
+        size = int(rfile.readline().split(b';')[0].strip(), 16)
+        if size == 0:
+            rfile.readline()
+            return body
+        body += rfile.read(size)
+        rfile.readline()
+
+
+class RequestHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def handle_request(self):
+        if self.headers.get('Transfer-Encoding', '').lower() == 'chunked':
+            body = _read_chunked(self.rfile)
+        else:
+            body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        request = Request(self.command, self.path, self.headers, body)
+        self.server.requests.append(request)
+
+        response = self.server.handler(request)
+        self.send_response(response.status)
+        headers = dict(response.headers)
+        headers.setdefault('Content-Length', str(len(response.body)))
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(response.body)
+
+    do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = do_HEAD = handle_request
+
+    def log_message(self, *args):
+        pass
+
+
+class UnixRequestHandler(RequestHandler):
+    disable_nagle_algorithm = False
+
+
+def _default_handler(request):
+    return Response(200, {'Content-Type': 'application/coreapi+json'}, b'{"_type": "document"}')
+
+
+class LocalServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        HTTPServer.__init__(self, ('127.0.0.1', 0), RequestHandler)
+        self.requests = []
+        self.handler = _default_handler
+
+    @property
+    def url(self):
+        return 'http://127.0.0.1:%d' % self.server_address[1]
+
+
+class UnixServer(ThreadingMixIn, UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path):
+        UnixStreamServer.__init__(self, path, UnixRequestHandler)
+        self.requests = []
+        self.handler = _default_handler
+
+    def get_request(self):
+        # `BaseHTTPRequestHandler` expects a (host, port) client address.
+        request, client_address = UnixStreamServer.get_request(self)
+        return (request, ('local', 0))
+
+
+def _serve(server):
+    thread = threading.Thread(target=server.serve_forever, kwargs={'poll_interval': 0.01})
+    thread.daemon = True
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def local_server():
+    for server in _serve(LocalServer()):
+        yield server
+
+
+@pytest.fixture
+def unix_server(tmpdir):
+    path = os.path.join(str(tmpdir), 'api.sock')
+    for server in _serve(UnixServer(path)):
+        yield server
@@ -0,0 +1,153 @@
+# coding: utf-8
+from coreapi import Client, Document, Field, Link
+from coreapi.exceptions import ErrorMessage, NetworkError, ParameterError
+import json
+import pytest
+import requests
+import sys
+
+if sys.version_info < (3, 7):  # pragma: nocover
+    pytest.skip('asyncio tests require Python 3.7+', allow_module_level=True)
+
+aiohttp = pytest.importorskip('aiohttp')
+
+from aiohttp import web  # noqa
+from aiohttp.test_utils import TestServer  # noqa
+from coreapi.transports import AsyncHTTPTransport  # noqa
+import asyncio  # noqa
+
+
+# A local stub server.
+
+async def handle_document(request):
+    content = {'_type': 'document', 'path': request.path_qs}
+    if request.can_read_body:
+        content['data'] = await request.json()
+    return web.Response(
+        body=json.dumps(content).encode('utf-8'),
+        content_type='application/coreapi+json'
+    )
+
+
+async def handle_error(request):
+    return web.Response(
+        status=400,
+        body=b'{"_type": "error", "messages": ["failed"]}',
+        content_type='application/coreapi+json'
+    )
+
+
+def run(coroutine_function):
+    async def wrapper():
+        app = web.Application()
+        app.router.add_route('*', '/error/', handle_error)
+        app.router.add_route('*', '/{tail:.*}', handle_document)
+        server = TestServer(app)
+        await server.start_server()
+        transport = AsyncHTTPTransport()
+        try:
+            return await coroutine_function(Client(transports=[transport]), str(server.make_url('')))
+        finally:
+            await transport.close()
+            await server.close()
+    return asyncio.run(wrapper())
+
+
+# Async transitions.
+
+def test_get_async():
+    async def test(client, base_url):
+        doc = await client.get_async(base_url + '/example/')
+        assert doc == {'path': '/example/'}
+    run(test)
+
+
+def test_reload_async():
+    async def test(client, base_url):
+        doc = Document(url=base_url + '/example/')
+        doc = await client.reload_async(doc)
+        assert doc == {'path': '/example/'}
+    run(test)
+
+
+def test_action_async_with_params():
+    async def test(client, base_url):
+        link = Link(
+            url=base_url + '/users/{id}/', action='post',
+            fields=[Field('id', location='path'), Field('name')]
+        )
+        doc = Document(content={'create': link})
+        result = await client.action_async(doc, ['create'], params={'id': 1, 'name': 'example'})
+        assert result == {'path': '/users/1/', 'data': {'name': 'example'}}
+    run(test)
+
+
+def test_action_async_inplace():
+    async def test(client, base_url):
+        link = Link(url=base_url + '/update/', action='put', fields=['name'])
+        doc = Document(title='original', content={'nested': Document(content={'update': link})})
+        result = await client.action_async(doc, ['nested', 'update'], params={'name': 'example'})
+        assert result == {'nested': {'path': '/update/', 'data': {'name': 'example'}}}
+        assert result.title == 'original'
+    run(test)
+
+
+def test_action_async_error():
+    async def test(client, base_url):
+        doc = Document(content={'fail': Link(url=base_url + '/error/')})
+        with pytest.raises(ErrorMessage):
+            await client.action_async(doc, ['fail'])
+    run(test)
+
+
+def test_action_async_validates_parameters():
+    async def test(client, base_url):
+        doc = Document(content={'link': Link(url=base_url + '/example/')})
+        with pytest.raises(ParameterError):
+            await client.action_async(doc, ['link'], params={'unknown': 1})
+    run(test)
+
+
+def test_concurrent_transitions():
+    async def test(client, base_url):
+        results = await asyncio.gather(*[
+            client.get_async(base_url + '/items/%d/' % idx)
+            for idx in range(50)
+        ])
+        assert [doc['path'] for doc in results] == ['/items/%d/' % idx for idx in range(50)]
+    run(test)
+
+
+def test_blocking_transition_not_supported():
+    async def test(client, base_url):
+        with pytest.raises(NetworkError):
+            client.get(base_url + '/example/')
+    run(test)
+
+
+# Blocking transports are run in an executor.
+
+def test_blocking_transport_fallback(monkeypatch):
+    class MockResponse(object):
+        content = b'{"_type": "document", "example": 123}'
+        headers = {}
+        url = 'http://example.org'
+        status_code = 200
+
+    def mockreturn(self, request, *args, **kwargs):
+        return MockResponse()
+
+    monkeypatch.setattr(requests.Session, 'send', mockreturn)
+
+    client = Client()
+    doc = asyncio.run(client.get_async('http://example.org'))
+    assert doc == {'example': 123}
+
+
+def test_async_body():
+    from coreapi.transports.asynchttp import _AsyncBody
+
+    async def read(body):
+        return [chunk async for chunk in body]
+
+    assert asyncio.run(read(_AsyncBody(iter([b'a', b'b'])))) == [b'a', b'b']
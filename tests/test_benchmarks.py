@@ -0,0 +1,57 @@
+# coding: utf-8
+from coreapi.benchmarks import data, runner
+from coreapi.codecs import CoreJSONCodec
+import json
+
+
+class StubModule(object):
+    @staticmethod
+    def benchmarks():
+        yield 'stub.add', lambda: 1 + 1
+        yield 'stub.other', lambda: None
+
+
+def test_make_document():
+    document = data.make_document('medium')
+    keys = data.get_deepest_keys(document)
+    assert len(keys) == 4
+    assert document.get_in(keys).url == '/resource_0/{id}/'
+    decoded = CoreJSONCodec().decode(CoreJSONCodec().encode(document))
+    assert decoded.get_in(keys).url == 'http://example.com/resource_0/{id}/'
+    assert len(decoded.get_in(keys[:-1]).links) == 4
+
+
+def test_run():
+    results = runner.run('add', repeat=2, target=0.001, modules=[StubModule])
+    assert list(results.keys()) == ['stub.add']
+    assert results['stub.add']['repeat'] == 2
+    assert results['stub.add']['best'] <= results['stub.add']['mean']
+
+
+def test_compare():
+    baseline = {'results': {
+        'faster': {'best': 1.0},
+        'slower': {'best': 1.0},
+        'within_threshold': {'best': 1.0}
+    }}
+    results = {
+        'faster': {'best': 0.5},
+        'slower': {'best': 1.5},
+        'within_threshold': {'best': 1.05},
+        'new': {'best': 1.0}
+    }
+    assert runner.compare(results, baseline, threshold=0.1) == [('slower', 1.0, 0.5)]
+
+
+def test_main(tmpdir, monkeypatch):
+    monkeypatch.setattr(runner, 'MODULES', [StubModule])
+    output = str(tmpdir.join('results.json'))
+    assert runner.main(['--quick', '--output', output]) == 0
+    with open(output) as results_file:
+        report = json.load(results_file)
+    assert sorted(report['results'].keys()) == ['stub.add', 'stub.other']
+
+    report['results']['stub.add']['best'] /= 100.0
+    with open(output, 'w') as results_file:
+        json.dump(report, results_file)
+    assert runner.main(['--quick', '--baseline', output, 'add']) == 1
@@ -0,0 +1,207 @@
+# coding: utf-8
+from coreapi import Client, Document, Link
+from coreapi.cache import CacheEntry, FileCache, MemoryCache, create_entry, is_fresh
+from coreapi.codecs import CoreJSONCodec, JSONCodec
+from coreapi.transports import HTTPTransport
+from conftest import Response
+import email.utils
+import os
+import pytest
+import stat
+import time
+
+
+decoders = [CoreJSONCodec(), JSONCodec()]
+coreapi_json = 'application/coreapi+json'
+
+
+class MockResponse(object):
+    def __init__(self, headers=None, status_code=200, content=b'{}'):
+        self.headers = headers or {}
+        self.status_code = status_code
+        self.content = content
+
+
+def entry(size=1, **kwargs):
+    return CacheEntry(result=None, accept=None, etag=None, last_modified=None, expires=0, size=size)._replace(**kwargs)
+
+
+@pytest.fixture
+def transport():
+    return HTTPTransport(cache=MemoryCache())
+
+
+# Caching and revalidation against a local server.
+
+def test_fresh_response_is_cached(local_server, transport):
+    local_server.handler = lambda request: Response(
+        200, {'Content-Type': coreapi_json, 'Cache-Control': 'max-age=60'}, b'{"_type": "document", "a": 1}'
+    )
+    link = Link(url=local_server.url + '/')
+    first = transport.transition(link, decoders)
+    second = transport.transition(link, decoders)
+    assert first == {'a': 1}
+    assert second is first
+    assert len(local_server.requests) == 1
+
+
+def test_etag_revalidation(local_server, transport):
+    def handler(request):
+        if request.headers.get('If-None-Match') == '"v1"':
+            return Response(304, {'ETag': '"v1"'})
+        return Response(200, {'Content-Type': coreapi_json, 'ETag': '"v1"'}, b'{"_type": "document", "a": 1}')
+
+    local_server.handler = handler
+    link = Link(url=local_server.url + '/')
+    first = transport.transition(link, decoders)
+    second = transport.transition(link, decoders)
+    assert second is first
+    assert len(local_server.requests) == 2
+    assert local_server.requests[1].headers['If-None-Match'] == '"v1"'
+
+
+def test_last_modified_revalidation(local_server, transport):
+    last_modified = 'Wed, 21 Oct 2015 07:28:00 GMT'
+
+    def handler(request):
+        if request.headers.get('If-Modified-Since') == last_modified:
+            return Response(304)
+        return Response(200, {'Content-Type': coreapi_json, 'Last-Modified': last_modified}, b'{"_type": "document"}')
+
+    local_server.handler = handler
+    link = Link(url=local_server.url + '/')
+    first = transport.transition(link, decoders)
+    assert transport.transition(link, decoders) is first
+    assert local_server.requests[1].headers['If-Modified-Since'] == last_modified
+
+
+def test_no_store_is_not_cached(local_server, transport):
+    local_server.handler = lambda request: Response(
+        200, {'Content-Type': coreapi_json, 'Cache-Control': 'no-store', 'ETag': '"v1"'}, b'{"_type": "document"}'
+    )
+    link = Link(url=local_server.url + '/')
+    transport.transition(link, decoders)
+    transport.transition(link, decoders)
+    assert len(local_server.requests) == 2
+    assert 'If-None-Match' not in local_server.requests[1].headers
+
+
+def test_unsafe_method_invalidates(local_server, transport):
+    local_server.handler = lambda request: Response(
+        200, {'Content-Type': coreapi_json, 'Cache-Control': 'max-age=60'}, b'{"_type": "document"}'
+    )
+    url = local_server.url + '/item/'
+    transport.transition(Link(url=url), decoders)
+    assert len(transport.cache) == 1
+    transport.transition(Link(url=url, action='put'), decoders, params={'a': 1})
+    assert len(transport.cache) == 0
+    transport.transition(Link(url=url), decoders)
+    assert [request.method for request in local_server.requests] == ['GET', 'PUT', 'GET']
+
+
+def test_different_accept_is_not_used(local_server, transport):
+    local_server.handler = lambda request: Response(
+        200, {'Content-Type': 'application/json', 'Cache-Control': 'max-age=60'}, b'{"a": 1}'
+    )
+    link = Link(url=local_server.url + '/')
+    transport.transition(link, decoders)
+    transport.transition(link, [JSONCodec()])
+    assert len(local_server.requests) == 2
+
+
+def test_plain_data_is_copied(local_server, transport):
+    local_server.handler = lambda request: Response(
+        200, {'Content-Type': 'application/json', 'Cache-Control': 'max-age=60'}, b'{"a": [1, 2]}'
+    )
+    link = Link(url=local_server.url + '/')
+    first = transport.transition(link, decoders)
+    first['a'].append(3)
+    assert transport.transition(link, decoders) == {'a': [1, 2]}
+
+
+def test_client_get_with_file_cache(local_server, tmpdir):
+    local_server.handler = lambda request: Response(
+        200, {'Content-Type': coreapi_json, 'Cache-Control': 'max-age=60'}, b'{"_type": "document", "a": 1}'
+    )
+    cache = FileCache(str(tmpdir))
+    client = Client(transports=[HTTPTransport(cache=cache)])
+    assert client.get(local_server.url + '/') == {'a': 1}
+
+    client = Client(transports=[HTTPTransport(cache=FileCache(str(tmpdir)))])
+    assert client.get(local_server.url + '/') == {'a': 1}
+    assert len(local_server.requests) == 1
+
+
+# Freshness.
+
+def test_max_age_freshness():
+    now = time.time()
+    cache_entry = create_entry(MockResponse({'cache-control': 'max-age=60'}), Document(), None, now=now)
+    assert is_fresh(cache_entry, now + 30)
+    assert not is_fresh(cache_entry, now + 90)
+
+
+def test_expires_freshness():
+    now = time.time()
+    headers = {
+        'date': email.utils.formatdate(now, usegmt=True),
+        'expires': email.utils.formatdate(now + 60, usegmt=True)
+    }
+    cache_entry = create_entry(MockResponse(headers), Document(), None, now=now)
+    assert is_fresh(cache_entry, now + 30)
+    assert not is_fresh(cache_entry, now + 90)
+
+
+def test_no_validators_or_freshness_not_stored():
+    assert create_entry(MockResponse(), Document(), None) is None
+
+
+def test_error_responses_not_stored():
+    response = MockResponse({'cache-control': 'max-age=60'}, status_code=404)
+    assert create_entry(response, Document(), None) is None
+
+
+# Cache backends.
+
+def test_memory_cache_max_entries():
+    cache = MemoryCache(max_entries=2)
+    cache.set('a', entry())
+    cache.set('b', entry())
+    cache.get('a')
+    cache.set('c', entry())
+    assert cache.get('a') is not None
+    assert cache.get('b') is None
+    assert cache.get('c') is not None
+
+
+def test_memory_cache_max_size():
+    cache = MemoryCache(max_entries=None, max_size=10)
+    cache.set('a', entry(size=4))
+    cache.set('b', entry(size=4))
+    cache.set('c', entry(size=4))
+    assert cache.get('a') is None
+    assert len(cache) == 2
+    cache.clear()
+    assert len(cache) == 0
+
+
+def test_file_cache(tmpdir):
+    cache = FileCache(str(tmpdir))
+    cache.set('a', entry(result=Document(content={'a': 1})))
+    assert cache.get('a').result == {'a': 1}
+    assert cache.get('b') is None
+    cache.delete('a')
+    assert cache.get('a') is None
+
+
+@pytest.mark.skipif(os.name != 'posix', reason='POSIX file permissions only.')
+def test_file_cache_directory_is_private(tmpdir):
+    directory = os.path.join(str(tmpdir), 'cache')
+    FileCache(directory)
+    assert stat.S_IMODE(os.stat(directory).st_mode) == 0o700
+
+
+def test_file_cache_max_size(tmpdir):
+    cache = FileCache(str(tmpdir), max_size=1)
+    cache.set('a', entry())
+    assert cache.get('a') is None
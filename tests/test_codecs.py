@@ -1,10 +1,15 @@
 # coding: utf-8
-from coreapi.codecs import CoreJSONCodec
+from collections import OrderedDict
+from coreapi.codecs import CoreJSONCodec, JSONCodec, backends
 from coreapi.codecs.corejson import _document_to_primitive, _primitive_to_document
 from coreapi.document import Document, Link, Error, Field
 from coreapi.exceptions import ParseError, NoCodecAvailable
 from coreapi.utils import negotiate_decoder, negotiate_encoder
 from coreschema import Enum, String
+import gc
+import io
+import json
+import math
 import pytest
 
 
@@ -170,6 +175,50 @@ def test_not_a_document(json_codec):
     assert json_codec.decode(b'{}') == Document()
 
 
+def test_not_a_document_or_error(json_codec):
+    with pytest.raises(ParseError):
+        json_codec.decode(b'[{"_type": "document"}]')
+    with pytest.raises(ParseError):
+        json_codec.decode(b'{"_type": "link"}')
+
+
+# URLs are resolved against the enclosing document, once it has been decoded.
+
+def test_nested_urls(json_codec):
+    content = b"""{
+        "_type": "document",
+        "_meta": {"url": "/api/"},
+        "list": {"_type": "link", "url": "users/"},
+        "nested": {
+            "_type": "document",
+            "_meta": {"url": "nested/"},
+            "read": {"_type": "link", "url": "../read/"},
+            "errors": [{"_type": "error", "retry": {"_type": "link", "url": "retry/"}}]
+        },
+        "data": {"items": [[{"link": {"_type": "link"}}]]}
+    }"""
+    doc = json_codec.decode(content, base_url='http://example.com/')
+    assert doc.url == 'http://example.com/api/'
+    assert doc['list'].url == 'http://example.com/api/users/'
+    assert doc['nested'].url == 'http://example.com/api/nested/'
+    assert doc['nested']['read'].url == 'http://example.com/api/read/'
+    assert doc['nested']['errors'][0]['retry'].url == 'http://example.com/api/nested/retry/'
+    assert doc['data']['items'][0][0]['link'].url == 'http://example.com/api/'
+    assert doc == _primitive_to_document(json.loads(content.decode('utf-8')), 'http://example.com/')
+
+
+def test_schema_and_escaped_keys(json_codec):
+    content = (
+        b'{"_type": "document", "__type": 1, "__meta": {"_type": "unknown", "a": 1},'
+        b' "link": {"_type": "link", "fields": [{"name": "q", "schema": {"_type": "enum", "enum": ["a"]}}]}}'
+    )
+    doc = json_codec.decode(content)
+    assert doc['_type'] == 1
+    assert doc['_meta'] == {'a': 1}
+    assert isinstance(doc['link'].fields[0].schema, Enum)
+    assert doc['link'].fields[0].schema.enum == ['a']
+
+
 # Encodings may have a verbose and a compact style.
 
 def test_compact_style(json_codec):
@@ -307,3 +356,183 @@ def test_get_unsupported_encoder():
 def test_get_unsupported_encoder_with_fallback():
     codec = negotiate_encoder([CoreJSONCodec()], accept='application/csv, */*')
     assert isinstance(codec, CoreJSONCodec)
+
+
+# JSON backends.
+
+available_backends = [name for name, backend_class in backends.BACKENDS.items() if backend_class.available]
+
+
+@pytest.mark.parametrize('name', available_backends)
+def test_json_backend_decode(name):
+    codec = JSONCodec(backend=name)
+    data = codec.decode(b'{"b": [1, 2.5, "\xc3\xa9"], "a": {"c": null}}')
+    assert data == {'b': [1, 2.5, u'\xe9'], 'a': {'c': None}}
+    assert isinstance(data, OrderedDict)
+    assert list(data.keys()) == ['b', 'a']
+
+
+@pytest.mark.parametrize('name', available_backends)
+def test_json_backend_unordered(name):
+    codec = JSONCodec(backend=name, ordered=False)
+    data = codec.decode(b'{"b": 1, "a": {"c": 2}}')
+    assert data == {'b': 1, 'a': {'c': 2}}
+    assert not isinstance(data['a'], OrderedDict)
+
+
+@pytest.mark.parametrize('name', available_backends)
+def test_json_backend_fallback(name):
+    codec = JSONCodec(backend=name, ordered=False)
+    data = codec.decode(b'{"big": 123456789012345678901234567890, "nan": NaN}')
+    assert data['big'] == 123456789012345678901234567890
+    assert data['nan'] != data['nan']
+    with pytest.raises(ParseError):
+        codec.decode(b'{"a": ')
+
+
+@pytest.mark.parametrize('name', available_backends)
+def test_json_backend_encode(name):
+    doc = Document(url='http://example.com/', content={
+        'text': u'\xe9', 'big': 123456789012345678901234567890, 'link': Link(url='http://example.com/link/')
+    })
+    codec = CoreJSONCodec(backend=name)
+    standard = CoreJSONCodec(backend='json')
+    assert codec.encode(doc) == standard.encode(doc)
+    assert codec.encode(doc, indent=True) == standard.encode(doc, indent=True)
+    assert codec.decode(codec.encode(doc)) == doc
+
+
+@pytest.mark.parametrize('name', available_backends)
+def test_json_backend_non_finite_floats(name):
+    doc = Document(content={'values': [float('inf'), float('-inf')], 'nested': {'nan': float('nan')}})
+    codec = CoreJSONCodec(backend=name)
+    content = codec.encode(doc)
+    assert content == CoreJSONCodec(backend='json').encode(doc)
+    decoded = codec.decode(content)
+    assert list(decoded['values']) == [float('inf'), float('-inf')]
+    assert math.isnan(decoded['nested']['nan'])
+
+
+def test_unknown_json_backend():
+    with pytest.raises(AssertionError):
+        JSONCodec(backend='unknown')
+
+
+def test_default_json_backend():
+    default = backends.get_default_backend()
+    assert default.name == available_backends[0]
+    try:
+        backends.set_default_backend('json')
+        assert backends.get_default_backend().name == 'json'
+    finally:
+        backends._default_backend = default
+
+
+# Lazy decoding.
+
+lazy_content = b"""{
+    "_type": "document",
+    "_meta": {"url": "/api/", "title": "Example"},
+    "users": {
+        "list": {"_type": "link", "url": "users/", "fields": [{"name": "page", "location": "query"}]},
+        "nested": {"_type": "document", "_meta": {"url": "nested/"}, "read": {"_type": "link", "url": "read/"}}
+    },
+    "items": [1, {"a": [2, 3]}],
+    "__type": "escaped",
+    "errors": {"_type": "error", "_meta": {"title": "Failed"}, "messages": ["failed"]}
+}"""
+
+
+def test_lazy_decode():
+    eager = CoreJSONCodec().decode(lazy_content, base_url='http://example.com/')
+    doc = CoreJSONCodec(lazy=True).decode(lazy_content, base_url='http://example.com/')
+    assert doc.url == 'http://example.com/api/'
+    assert doc.title == 'Example'
+    assert '_data' not in doc.__dict__
+
+    users = doc['users']
+    assert '_data' not in users.__dict__
+    assert users['list'].url == 'http://example.com/api/users/'
+    assert users['list'].fields == (Field('page', location='query'),)
+    assert users['nested']['read'].url == 'http://example.com/api/nested/read/'
+    assert '_data' not in doc['items'].__dict__
+    assert doc['items'][1]['a'] == [2, 3]
+    assert doc['_type'] == 'escaped'
+    assert doc['errors'].get_messages() == ['failed']
+
+    assert doc == eager
+    assert eager == doc
+    assert list(doc.keys()) == list(eager.keys())
+    assert repr(doc) == repr(eager)
+    assert CoreJSONCodec().encode(doc) == CoreJSONCodec().encode(eager)
+
+
+def test_lazy_decode_unchanged_operations():
+    doc = CoreJSONCodec(lazy=True).decode(lazy_content)
+    assert list(doc.links.keys()) == []
+    assert list(doc['users'].links.keys()) == ['list']
+    assert list(doc['users'].data.keys()) == ['nested']
+    updated = doc.set_in(['users', 'list'], Link(url='/replaced/'))
+    assert updated['users']['list'].url == '/replaced/'
+    assert updated['users']['nested'] == doc['users']['nested']
+    assert doc['users']['list'].url == '/api/users/'
+
+
+def test_lazy_decode_top_level():
+    codec = CoreJSONCodec(lazy=True)
+    assert codec.decode(b'{"a": {"b": 1}}') == Document(content={'a': {'b': 1}})
+    assert codec.decode(b'{"_type": "error", "_meta": {"title": "Failed"}}') == Error(title='Failed')
+    with pytest.raises(ParseError):
+        codec.decode(b'[]')
+    with pytest.raises(ParseError):
+        codec.decode(b'{"_type": "link"}')
+    with pytest.raises(ParseError):
+        codec.decode(b'{')
+
+
+# Streaming encoding.
+
+@pytest.mark.parametrize('indent', [False, True])
+def test_iter_encode(doc, indent):
+    codec = CoreJSONCodec(backend='json')
+    chunks = list(codec.iter_encode(doc, indent=indent, chunk_size=16))
+    assert len(chunks) > 1
+    assert b''.join(chunks) == codec.encode(doc, indent=indent)
+
+
+def test_iter_encode_nested_nodes():
+    codec = CoreJSONCodec(backend='json')
+    doc = Document(url='http://example.org/', content={
+        'empty': {},
+        'empty_list': [],
+        'nested': Document(url='http://example.org/nested/', content={'link': Link(url='http://example.org/nested/1')}),
+        'error': Error(title='Failed', content={'messages': ['failed']}),
+        'items': [1, 2.5, None, True, {'text': u'caf\xe9 "quoted"'}]
+    })
+    for indent in (False, True):
+        assert b''.join(codec.iter_encode(doc, indent=indent)) == codec.encode(doc, indent=indent)
+
+
+def test_encode_to(doc):
+    codec = CoreJSONCodec()
+    output = io.BytesIO()
+    codec.encode_to(doc, output)
+    assert codec.decode(output.getvalue()) == codec.decode(codec.encode(doc))
+
+
+def test_decode_leaves_gc_alone(monkeypatch):
+    def disable():
+        raise AssertionError('The garbage collector should not be disabled.')
+
+    monkeypatch.setattr(gc, 'disable', disable)
+    assert CoreJSONCodec().decode(b'{"_type": "document"}') == Document()
+
+
+def test_decode_pause_gc():
+    codec = CoreJSONCodec(pause_gc=True)
+    assert gc.isenabled()
+    assert codec.decode(b'{"_type": "document", "a": [1]}') == Document(content={'a': [1]})
+    assert gc.isenabled()
+    with pytest.raises(ParseError):
+        codec.decode(b'{')
+    assert gc.isenabled()
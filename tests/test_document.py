@@ -477,3 +477,95 @@ def test_object_data_and_links_properties():
     obj = Object({'a': 1, 'b': 2, 'c': Link(), 'd': Link()})
     assert sorted(list(obj.data.keys())) == ['a', 'b']
     assert sorted(list(obj.links.keys())) == ['c', 'd']
+
+
+# The key order is computed once, and is the same for every kind of node.
+
+def test_key_order():
+    content = {
+        'b': 1,
+        'a': 2,
+        'delete': Link(url='/x/', action='delete'),
+        'get': Link(url='/x/', action='get'),
+        'other': Link(url='/a/', action='options')
+    }
+    expected = ['a', 'b', 'other', 'get', 'delete']
+    doc = Document(content=content)
+    assert list(doc) == expected
+    assert list(doc) == expected
+    assert list(Object(content)) == expected
+    assert list(Error(content=content)) == expected
+    assert list(doc.data.keys()) == ['a', 'b']
+    assert list(doc.links.keys()) == ['other', 'get', 'delete']
+
+
+def test_key_order_after_set():
+    doc = Document(content={'b': 1, 'c': Link(url='/c/')})
+    assert list(doc) == ['b', 'c']
+    updated = doc.set('a', Link(url='/a/')).delete('b')
+    assert list(updated) == ['a', 'c']
+    assert list(updated.links.keys()) == ['a', 'c']
+    assert list(doc) == ['b', 'c']
+
+
+def test_data_and_links_are_new_dicts():
+    doc = Document(content={'a': 1, 'b': Link()})
+    doc.data.pop('a')
+    doc.links.pop('b')
+    assert list(doc.data.keys()) == ['a']
+    assert list(doc.links.keys()) == ['b']
+
+
+# Updated nodes share unchanged values, and keep a correct key order.
+
+def test_set_shares_unchanged_values():
+    doc = Document(url='http://example.org/', title='Example', content={'a': {'b': 1}, 'c': {'d': 2}})
+    updated = doc.set_in(['a', 'b'], {'e': [1]})
+    assert updated['c'] is doc['c']
+    assert isinstance(updated['a']['b'], Object)
+    assert updated.url == 'http://example.org/'
+    assert updated.title == 'Example'
+    assert doc['a']['b'] == 1
+
+
+@pytest.mark.parametrize('key, value', [
+    ('a', 3),
+    ('aa', 3),
+    ('z', 3),
+    ('b', Link(url='/b/')),
+    ('new', Link(url='/0/')),
+    ('link', Link(url='/link/', action='delete')),
+    ('link', Link(url='/z/'))
+])
+def test_set_key_order(key, value):
+    content = {'a': 1, 'b': 2, 'link': Link(url='/link/'), 'other': Link(url='/other/')}
+    doc = Document(content=content)
+    list(doc)
+    updated = doc.set(key, value)
+    expected = Document(content=dict(content, **{key: value}))
+    assert list(updated) == list(expected)
+    assert list(updated.data) == list(expected.data)
+    assert list(updated.links) == list(expected.links)
+
+
+def test_delete_key_order():
+    obj = Object({'a': 1, 'b': 2, 'link': Link(url='/link/')})
+    list(obj)
+    assert list(obj.delete('a')) == ['b', 'link']
+    assert list(obj.delete('link').links) == []
+    with pytest.raises(KeyError):
+        obj.delete('missing')
+
+
+def test_set_key_must_be_string():
+    with pytest.raises(TypeError):
+        Object({'a': 1}).set(1, 2)
+
+
+def test_array_set_and_delete():
+    array = Array([1, {'a': 2}])
+    updated = array.set(0, {'b': 3})
+    assert updated == [{'b': 3}, {'a': 2}]
+    assert isinstance(updated[0], Object)
+    assert updated[1] is array[1]
+    assert array.delete(0) == [{'a': 2}]
@@ -0,0 +1,87 @@
+# coding: utf-8
+from coreapi import Client, Document, Field, Link, instrumentation
+from coreapi.exceptions import ErrorMessage
+from conftest import Response
+import pytest
+
+
+@pytest.fixture
+def records():
+    records = []
+    instrumentation.add_listener(records.append)
+    yield records
+    instrumentation.remove_listener(records.append)
+
+
+@pytest.fixture
+def document(local_server):
+    return Document(url=local_server.url + '/', content={
+        'list': Link(url=local_server.url + '/items/', fields=[Field('page', location='query')]),
+        'create': Link(url=local_server.url + '/items/', action='post', fields=[Field('name', required=True)]),
+        'nested': {'update': Link(url=local_server.url + '/items/1/', action='put')}
+    })
+
+
+def test_action_record(records, document, local_server):
+    content = b'{"_type": "document", "name": "example"}'
+    local_server.handler = lambda request: Response(200, {'Content-Type': 'application/coreapi+json'}, content)
+    client = Client()
+    client.action(document, ['create'], params={'name': 'example'})
+
+    assert len(records) == 1
+    record = records[0]
+    assert record.kind == 'action'
+    assert record.method == 'POST'
+    assert record.url == local_server.url + '/items/'
+    assert record.status_code == 200
+    assert record.codec == 'application/coreapi+json'
+    assert record.request_bytes == len(b'{"name": "example"}')
+    assert record.response_bytes == len(content)
+    assert record.exception is None
+    assert list(record.phases.keys()) == [
+        'lookup_link', 'validate_parameters', 'get_params', 'build_request', 'network', 'read_body', 'decode',
+        'inplace_replacements'
+    ]
+    assert all([duration >= 0 for duration in record.phases.values()])
+    assert record.duration >= sum(record.phases.values())
+
+
+def test_get_record(records, local_server):
+    client = Client()
+    client.get(local_server.url + '/')
+    assert records[0].kind == 'get'
+    assert records[0].method == 'GET'
+    assert 'lookup_link' not in records[0].phases
+
+
+def test_inplace_replacements_phase(records, document, local_server):
+    client = Client()
+    client.action(document, ['nested', 'update'])
+    assert 'inplace_replacements' in records[0].phases
+
+
+def test_error_record(records, document, local_server):
+    local_server.handler = lambda request: Response(
+        404, {'Content-Type': 'application/coreapi+json'}, b'{"_type": "error"}'
+    )
+    client = Client()
+    with pytest.raises(ErrorMessage):
+        client.action(document, ['list'], params={'page': 2})
+    assert records[0].status_code == 404
+    assert records[0].url == local_server.url + '/items/?page=2'
+    assert isinstance(records[0].exception, ErrorMessage)
+    assert records[0].as_dict()['status_code'] == 404
+
+
+def test_action_many_records(records, document, local_server):
+    client = Client()
+    client.action_many(document, [(['list'], {'page': page}) for page in range(3)])
+    assert len(records) == 3
+
+
+def test_no_listeners(document, local_server):
+    assert instrumentation.transition('action').__enter__() is None
+    assert instrumentation.phase('network').__enter__() is None
+    client = Client()
+    client.action(document, ['list'])
+    assert instrumentation.current_record() is None
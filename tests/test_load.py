@@ -0,0 +1,103 @@
+# coding: utf-8
+from coreapi import Client, Document, Field, Link, load
+from coreapi.codecs import CoreJSONCodec
+from coreapi.exceptions import LinkLookupError
+from conftest import Response
+import json
+import pytest
+import random
+
+
+@pytest.fixture
+def document(local_server):
+    return Document(url=local_server.url + '/', content={
+        'users': {
+            'list': Link(url=local_server.url + '/users/', fields=[Field('page', location='query')]),
+            'read': Link(url=local_server.url + '/users/{id}/', fields=[Field('id', location='path', required=True)])
+        }
+    })
+
+
+def handler(request):
+    if request.path == '/users/0/':
+        return Response(404, {'Content-Type': 'application/coreapi+json'}, b'{"_type": "error"}')
+    return Response(200, {'Content-Type': 'application/coreapi+json'}, b'{"_type": "document"}')
+
+
+def test_make_generator():
+    generator = load.make_generator({
+        'id': {'$randint': [1, 3]},
+        'name': {'$choice': ['a', 'b']},
+        'sequence': {'$sequence': 10},
+        'tags': [{'$string': 4}, 'fixed'],
+        'value': 5
+    })
+    rng = random.Random(1)
+    first = generator(rng)
+    second = generator(rng)
+    assert first['id'] in (1, 2, 3)
+    assert first['name'] in ('a', 'b')
+    assert (first['sequence'], second['sequence']) == (10, 11)
+    assert len(first['tags'][0]) == 4
+    assert first['tags'][1] == 'fixed'
+    assert first['value'] == 5
+
+    with pytest.raises(AssertionError):
+        load.make_generator({'$unknown': 1})
+
+
+def test_scenario_weights():
+    scenario = load.Scenario.from_data({'links': [
+        {'keys': ['heavy'], 'weight': 9},
+        {'keys': ['light']}
+    ]})
+    rng = random.Random(1)
+    choices = [scenario.choose(rng).keys for idx in range(1000)]
+    assert 850 < choices.count(['heavy']) < 950
+
+
+def test_scenario_validate(document):
+    scenario = load.Scenario([load.Step(['users', 'missing'])])
+    with pytest.raises(LinkLookupError):
+        scenario.validate(document)
+
+
+def test_run_load(document, local_server):
+    local_server.handler = handler
+    scenario = load.Scenario([
+        load.Step(['users', 'list'], params={'page': {'$randint': [1, 5]}}, weight=2),
+        load.Step(['users', 'read'], params={'id': {'$choice': [0, 1]}})
+    ])
+    report = load.run_load(Client(stats=True), document, scenario, concurrency=2, duration=0.3, seed=1)
+
+    assert report['requests'] == sum(stats['requests'] for stats in report['links'].values())
+    assert report['throughput'] > 0
+    read = report['links']['GET %s/users/{id}/' % local_server.url]
+    assert read['error_types'] == {'HTTP 404': read['errors']}
+    assert read['errors'] > 0
+    assert read['latency']['p50'] > 0
+
+    text = load.format_report(report)
+    assert 'HTTP 404: %d' % read['errors'] in text
+
+
+def test_run_load_rate(document):
+    scenario = load.Scenario([load.Step(['users', 'list'])])
+    report = load.run_load(Client(stats=True), document, scenario, concurrency=4, rate=20, duration=0.5)
+    assert 5 <= report['requests'] <= 12
+
+
+def test_main(document, local_server, tmpdir):
+    schema_path = str(tmpdir.join('schema.json'))
+    with open(schema_path, 'wb') as schema_file:
+        schema_file.write(CoreJSONCodec().encode(document))
+    scenario_path = str(tmpdir.join('scenario.json'))
+    with open(scenario_path, 'w') as scenario_file:
+        json.dump({'schema': schema_path, 'links': [{'keys': ['users', 'list']}]}, scenario_file)
+    output_path = str(tmpdir.join('report.json'))
+
+    assert load.main([scenario_path, '--concurrency', '1', '--duration', '0.2', '--output', output_path]) == 0
+    with open(output_path) as output:
+        report = json.load(output)
+    assert list(report['links'].keys()) == ['GET %s/users/' % local_server.url]
+    assert len(local_server.requests) == report['requests']
@@ -0,0 +1,217 @@
+# coding: utf-8
+from coreapi import Array, Client, Document, Field, Link, Object
+from coreapi.compat import urlparse
+from coreapi.exceptions import ErrorMessage, ParseError
+from coreapi.pagination import PageIterator, get_next_link, get_page_items, get_remaining_params
+from conftest import Response
+import json
+import pytest
+import threading
+import time
+
+
+PAGE_SIZE = 3
+PAGE_COUNT = 4
+
+
+def paginated_handler(request):
+    if '?page=' in request.path:
+        page = int(request.path.split('?page=')[1])
+    else:
+        page = 1
+    if page > PAGE_COUNT:
+        return Response(404, {'Content-Type': 'application/coreapi+json'}, b'{"_type": "error", "detail": "Invalid page."}')
+    content = {
+        '_type': 'document',
+        'results': list(range((page - 1) * PAGE_SIZE, page * PAGE_SIZE)),
+        'next': None if page == PAGE_COUNT else '/items/?page=%d' % (page + 1)
+    }
+    return Response(200, {'Content-Type': 'application/coreapi+json'}, json.dumps(content).encode('utf-8'))
+
+
+@pytest.fixture
+def document(local_server):
+    local_server.handler = paginated_handler
+    return Document(url=local_server.url + '/', content={'items': Link(url=local_server.url + '/items/')})
+
+
+def test_paginate(document, local_server):
+    client = Client()
+    assert list(client.paginate(document, ['items'])) == list(range(PAGE_SIZE * PAGE_COUNT))
+    assert [request.path for request in local_server.requests] == [
+        '/items/', '/items/?page=2', '/items/?page=3', '/items/?page=4'
+    ]
+
+
+def test_paginate_sequential(document, local_server):
+    client = Client()
+    items = client.paginate(document, ['items'], prefetch=0)
+    assert next(items) == 0
+    assert len(local_server.requests) == 1
+    assert list(items) == list(range(1, PAGE_SIZE * PAGE_COUNT))
+
+
+def test_paginate_prefetch_is_bounded(document, local_server):
+    client = Client()
+    items = client.paginate(document, ['items'], prefetch=1)
+    assert next(items) == 0
+    time.sleep(0.2)
+    # The current page, and one prefetched page.
+    assert len(local_server.requests) == 2
+    items.close()
+    time.sleep(0.2)
+    assert len(local_server.requests) == 2
+
+
+def test_page_iterator_prefetch_is_bounded():
+    fetched = []
+
+    def fetch(page):
+        fetched.append(page)
+        return page
+
+    pages = iter(PageIterator(lambda: fetch(1), lambda page: fetch(page + 1), prefetch=2))
+    assert next(pages) == 1
+    time.sleep(0.2)
+    assert fetched == [1, 2, 3]
+    assert next(pages) == 2
+    time.sleep(0.2)
+    assert fetched == [1, 2, 3, 4]
+    pages.close()
+
+
+def test_paginate_error(local_server):
+    local_server.handler = paginated_handler
+    document = Document(url=local_server.url + '/', content={'items': Link(url=local_server.url + '/items/?page=4')})
+    client = Client()
+    items = client.paginate(document, ['items'])
+    assert next(items) == 9
+
+    local_server.handler = lambda request: Response(
+        404, {'Content-Type': 'application/coreapi+json'}, b'{"_type": "error", "detail": "Invalid page."}'
+    )
+    document = Document(url=local_server.url + '/', content={'items': Link(url=local_server.url + '/items/?page=5')})
+    with pytest.raises(ErrorMessage):
+        list(client.paginate(document, ['items']))
+
+
+def test_next_link():
+    assert get_next_link(Document(url='http://example.org/items/', content={'next': '?page=2'})).url == 'http://example.org/items/?page=2'
+    assert get_next_link(Document(content={'next': Link(url='http://example.org/2')})).url == 'http://example.org/2'
+    assert get_next_link({'next': 'http://example.org/2'}).url == 'http://example.org/2'
+    assert get_next_link(Document(content={'next': None})) is None
+    assert get_next_link([1, 2, 3]) is None
+
+
+def test_page_items():
+    assert get_page_items(Document(content={'results': [1, 2], 'count': 2})) == [1, 2]
+    assert get_page_items(Document(content={'users': [1, 2], 'count': 2})) == [1, 2]
+    assert get_page_items(Object({'rows': [1, 2]}), items_key='rows') == [1, 2]
+    assert get_page_items(Array([1, 2])) == [1, 2]
+    with pytest.raises(ParseError):
+        get_page_items(Document(content={'a': [1], 'b': [2]}))
+
+
+def test_page_iterator_error_in_background():
+    def fetch_next(page):
+        raise ValueError('failed')
+
+    pages = iter(PageIterator(lambda: [1], fetch_next))
+    assert next(pages) == [1]
+    with pytest.raises(ValueError):
+        next(pages)
+
+
+# Parallel page fetching.
+
+TOTAL = 10
+
+
+class CountedHandler(object):
+    """
+    Serves pages of a collection of `TOTAL` items, selected by page number in
+    the query or path, or by offset and limit, and tracks concurrency.
+    """
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, request):
+        with self.lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            time.sleep(self.delay)
+            url = urlparse.urlparse(request.path)
+            query = dict(urlparse.parse_qsl(url.query))
+            if 'limit' in query:
+                start = int(query.get('offset', 0))
+                stop = start + int(query.get('limit', PAGE_SIZE))
+            else:
+                segments = [segment for segment in url.path.split('/') if segment]
+                page = int(query.get('page', segments[-1] if segments[-1].isdigit() else 1))
+                start, stop = (page - 1) * PAGE_SIZE, page * PAGE_SIZE
+            content = {'_type': 'document', 'count': TOTAL, 'results': list(range(start, min(stop, TOTAL)))}
+            return Response(200, {'Content-Type': 'application/coreapi+json'}, json.dumps(content).encode('utf-8'))
+        finally:
+            with self.lock:
+                self.active -= 1
+
+
+def counted_document(local_server, url, fields):
+    return Document(url=local_server.url + '/', content={'items': Link(url=local_server.url + url, fields=fields)})
+
+
+def test_parallel_pages(local_server):
+    local_server.handler = handler = CountedHandler(delay=0.05)
+    document = counted_document(local_server, '/items/', [Field('page', location='query')])
+    client = Client()
+    assert list(client.paginate(document, ['items'], max_workers=2)) == list(range(TOTAL))
+    assert len(local_server.requests) == 4
+    assert handler.max_active == 2
+
+
+def test_parallel_pages_unordered(local_server):
+    local_server.handler = CountedHandler()
+    document = counted_document(local_server, '/items/', [Field('page', location='query')])
+    client = Client()
+    items = list(client.paginate(document, ['items'], max_workers=3, ordered=False))
+    assert sorted(items) == list(range(TOTAL))
+
+
+def test_parallel_pages_path_field(local_server):
+    local_server.handler = CountedHandler()
+    document = counted_document(local_server, '/items/{page}/', [Field('page', location='path', required=True)])
+    client = Client()
+    items = list(client.paginate(document, ['items'], params={'page': 2}, max_workers=2))
+    assert items == list(range(PAGE_SIZE, TOTAL))
+    assert sorted([request.path for request in local_server.requests]) == ['/items/2/', '/items/3/', '/items/4/']
+
+
+def test_parallel_offsets(local_server):
+    local_server.handler = CountedHandler()
+    fields = [Field('offset', location='query'), Field('limit', location='query')]
+    document = counted_document(local_server, '/items/', fields)
+    client = Client()
+    items = list(client.paginate(document, ['items'], params={'limit': 4}, max_workers=2))
+    assert items == list(range(TOTAL))
+    assert sorted([request.path for request in local_server.requests]) == [
+        '/items/?limit=4', '/items/?limit=4&offset=4', '/items/?limit=4&offset=8'
+    ]
+
+
+def test_parallel_falls_back_to_next_links(document):
+    client = Client()
+    assert list(client.paginate(document, ['items'], max_workers=4)) == list(range(PAGE_SIZE * PAGE_COUNT))
+
+
+def test_remaining_params():
+    link = Link(url='/items/', fields=[Field('page'), Field('search')])
+    page = Document(content={'count': 7, 'results': [1, 2, 3]})
+    assert get_remaining_params(page, link, {'search': 'a'}) == [
+        {'search': 'a', 'page': 2}, {'search': 'a', 'page': 3}
+    ]
+    assert get_remaining_params(Document(content={'results': [1]}), link, {}) is None
+    assert get_remaining_params(page, Link(url='/items/'), {}) is None
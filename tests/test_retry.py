@@ -0,0 +1,139 @@
+# coding: utf-8
+from coreapi import Link
+from coreapi.codecs import CoreJSONCodec
+from coreapi.exceptions import CircuitOpenError, ErrorMessage
+from coreapi.transports import HTTPTransport
+from coreapi.transports.retry import CircuitBreaker, RetryPolicy
+from conftest import Response
+import pytest
+import requests
+import socket
+import time
+
+
+decoders = [CoreJSONCodec()]
+ok = Response(200, {'Content-Type': 'application/coreapi+json'}, b'{"_type": "document"}')
+unavailable = Response(503, {'Content-Type': 'application/coreapi+json'}, b'{"_type": "error"}')
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    delays = []
+    monkeypatch.setattr(RetryPolicy, 'sleep', lambda self, delay: delays.append(delay))
+    return delays
+
+
+def respond_with(*responses):
+    responses = list(responses)
+    return lambda request: responses.pop(0) if len(responses) > 1 else responses[0]
+
+
+def closed_port_url():
+    sock = socket.socket()
+    sock.bind(('127.0.0.1', 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return 'http://127.0.0.1:%d/' % port
+
+
+# Retries.
+
+def test_retry_unavailable(local_server, sleeps):
+    local_server.handler = respond_with(unavailable, unavailable, ok)
+    policy = RetryPolicy(backoff_factor=0.5, jitter=False)
+    transport = HTTPTransport(retry=policy)
+    assert transport.transition(Link(url=local_server.url + '/'), decoders) == {}
+    assert len(local_server.requests) == 3
+    assert sleeps == [0.5, 1.0]
+    assert policy.stats.as_dict()['retries'] == 2
+
+
+def test_retry_after(local_server, sleeps):
+    throttled = Response(429, {'Retry-After': '2'})
+    local_server.handler = respond_with(throttled, ok)
+    transport = HTTPTransport(retry=RetryPolicy())
+    transport.transition(Link(url=local_server.url + '/'), decoders)
+    assert sleeps == [2]
+
+
+def test_retries_exhausted(local_server, sleeps):
+    local_server.handler = respond_with(unavailable)
+    transport = HTTPTransport(retry=RetryPolicy(max_retries=2, backoff_factor=0))
+    with pytest.raises(ErrorMessage):
+        transport.transition(Link(url=local_server.url + '/'), decoders)
+    assert len(local_server.requests) == 3
+
+
+def test_unsafe_method_not_retried(local_server, sleeps):
+    local_server.handler = respond_with(unavailable, ok)
+    transport = HTTPTransport(retry=RetryPolicy(backoff_factor=0))
+    with pytest.raises(ErrorMessage):
+        transport.transition(Link(url=local_server.url + '/', action='post'), decoders)
+    assert len(local_server.requests) == 1
+
+
+def test_connect_error_retried_for_unsafe_method(sleeps):
+    policy = RetryPolicy(max_retries=2, backoff_factor=0)
+    transport = HTTPTransport(retry=policy)
+    with pytest.raises(requests.ConnectionError):
+        transport.transition(Link(url=closed_port_url(), action='post'), decoders)
+    assert policy.stats.as_dict()['retries'] == 2
+
+
+def test_jittered_backoff():
+    policy = RetryPolicy(backoff_factor=1, backoff_max=5)
+    for retry in range(5):
+        assert 0 <= policy.get_backoff(retry) <= min(2 ** retry, 5)
+
+
+# Circuit breaker.
+
+def test_circuit_breaker(local_server, sleeps):
+    local_server.handler = respond_with(unavailable, unavailable, ok)
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+    policy = RetryPolicy(max_retries=0, circuit_breaker=breaker)
+    transport = HTTPTransport(retry=policy)
+    link = Link(url=local_server.url + '/')
+
+    for idx in range(2):
+        with pytest.raises(ErrorMessage):
+            transport.transition(link, decoders)
+    assert breaker.state(local_server.url) == 'open'
+
+    with pytest.raises(CircuitOpenError):
+        transport.transition(link, decoders)
+    assert len(local_server.requests) == 2
+
+    time.sleep(0.06)
+    assert breaker.state(local_server.url) == 'half-open'
+    transport.transition(link, decoders)
+    assert breaker.state(local_server.url) == 'closed'
+
+    stats = policy.stats.as_dict()
+    assert stats['breaker_trips'] == 1
+    assert stats['breaker_rejections'] == 1
+
+
+def test_circuit_breaker_trial_raises_other_exception():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    policy = RetryPolicy(max_retries=0, circuit_breaker=breaker)
+    request = requests.Request('GET', 'http://example.org/').prepare()
+    assert breaker.record_failure('http://example.org')
+
+    def interrupted(request):
+        raise KeyboardInterrupt()
+
+    with pytest.raises(KeyboardInterrupt):
+        policy.send(request, interrupted)
+    # The trial is released, so that another trial may be sent.
+    assert breaker.allow('http://example.org')
+
+
+def test_circuit_breaker_failed_trial():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    assert breaker.record_failure('http://example.org')
+    assert breaker.allow('http://example.org')
+    assert not breaker.allow('http://example.org')
+    assert breaker.record_failure('http://example.org')
+    breaker.reset()
+    assert breaker.state('http://example.org') == 'closed'
@@ -0,0 +1,120 @@
+# coding: utf-8
+from coreapi import Client, Document, Field, Link
+from coreapi.exceptions import ErrorMessage
+from coreapi.stats import ClientStats, Histogram, get_bucket_index, get_bucket_value
+from conftest import Response
+import pytest
+import threading
+
+
+@pytest.fixture
+def document(local_server):
+    return Document(url=local_server.url + '/', content={
+        'read': Link(url=local_server.url + '/users/{id}/', fields=[Field('id', location='path', required=True)]),
+        'create': Link(url=local_server.url + '/users/', action='post', fields=[Field('name')]),
+    })
+
+
+def test_client_stats(document, local_server):
+    def handler(request):
+        if request.path == '/users/3/':
+            return Response(404, {'Content-Type': 'application/coreapi+json'}, b'{"_type": "error"}')
+        return Response(200, {'Content-Type': 'application/coreapi+json'}, b'{"_type": "document"}')
+
+    local_server.handler = handler
+    client = Client(stats=True)
+    for user_id in range(4):
+        try:
+            client.action(document, ['read'], params={'id': user_id})
+        except ErrorMessage:
+            pass
+    client.action(document, ['create'], params={'name': 'example'})
+
+    stats = client.stats()
+    read = stats['GET %s/users/{id}/' % local_server.url]
+    assert read['requests'] == 4
+    assert read['errors'] == 1
+    assert read['error_types'] == {'HTTP 404': 1}
+    assert read['response_bytes'] == 3 * len(b'{"_type": "document"}') + len(b'{"_type": "error"}')
+    latency = read['latency']
+    assert 0 < latency['min'] <= latency['p50'] <= latency['p90'] <= latency['p99'] <= latency['p999'] <= latency['max']
+
+    create = stats['POST %s/users/' % local_server.url]
+    assert create['requests'] == 1
+    assert create['request_bytes'] == len(b'{"name": "example"}')
+
+
+def test_client_stats_reset(document, local_server):
+    client = Client(stats=True)
+    client.action(document, ['read'], params={'id': 1})
+    assert len(client.stats(reset=True)) == 1
+    assert client.stats() == {}
+    client.get(local_server.url + '/')
+    assert list(client.stats().keys()) == ['GET %s/' % local_server.url]
+
+
+def test_client_stats_not_enabled():
+    with pytest.raises(AssertionError):
+        Client().stats()
+
+
+def test_client_stats_threads(document, local_server):
+    client = Client(stats=True)
+
+    def run():
+        for idx in range(5):
+            client.action(document, ['read'], params={'id': idx})
+
+    threads = [threading.Thread(target=run) for idx in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert client.stats()['GET %s/users/{id}/' % local_server.url]['requests'] == 20
+
+
+def test_histogram_buckets():
+    for value in [0, 1, 127, 128, 129, 255, 256, 1000, 123456, 10 ** 9]:
+        index = get_bucket_index(value)
+        assert get_bucket_value(index) >= value
+        assert get_bucket_value(index) - value <= value / 64.0
+        if index:
+            assert get_bucket_value(index - 1) < value
+
+
+def test_histogram_percentiles():
+    histogram = Histogram()
+    for value in range(1, 1001):
+        histogram.record(value * 1000)
+    assert abs(histogram.percentile(50) - 500000) / 500000.0 < 0.02
+    assert abs(histogram.percentile(99) - 990000) / 990000.0 < 0.02
+    assert histogram.percentile(100) == 1000000
+    assert Histogram().percentile(50) is None
+
+
+def test_stats_merge_shards():
+    stats = ClientStats()
+
+    class Record(object):
+        link = Link(url='/example/')
+        method = 'GET'
+        url = '/example/'
+        status_code = 200
+        exception = None
+        request_bytes = 0
+        response_bytes = 10
+        duration = 0.01
+
+    def run():
+        for idx in range(10):
+            stats.record(Record())
+
+    threads = [threading.Thread(target=run) for idx in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    result = stats.snapshot()['GET /example/']
+    assert result['requests'] == 30
+    assert result['response_bytes'] == 300
+    assert result['latency']['p50'] == pytest.approx(0.01, rel=0.02)
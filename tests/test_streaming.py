@@ -0,0 +1,187 @@
+# coding: utf-8
+from coreapi import Client, Document, Field, Link, Object
+from coreapi.codecs import CoreJSONCodec, JSONCodec
+from coreapi.exceptions import ErrorMessage, LinkLookupError, ParameterError, ParseError
+from coreapi.streaming import get_array, iter_array
+from conftest import Response
+import json
+import pytest
+
+
+def chunked(content, size=1):
+    return [content[idx:idx + size] for idx in range(0, len(content), size)]
+
+
+# Parsing arrays incrementally.
+
+@pytest.mark.parametrize('size', [1, 3, 1000])
+def test_iter_array(size):
+    content = b'[1, 2.5e3, "a\\"b", {"c": [1, 2]}, null, true, 12345]'
+    items = list(iter_array(chunked(content, size)))
+    assert items == [1, 2.5e3, 'a"b', {'c': [1, 2]}, None, True, 12345]
+
+
+@pytest.mark.parametrize('size', [1, 4, 1000])
+def test_iter_array_at_path(size):
+    content = b'{"count": 3, "other": {"results": []}, "results": [{"id": 1}, {"id": 2}], "next": null}'
+    assert list(iter_array(chunked(content, size), ['results'])) == [{'id': 1}, {'id': 2}]
+    assert list(iter_array(chunked(content, size), ['other', 'results'])) == []
+
+
+def test_iter_array_at_index():
+    content = b'[[1], {"items": [2, 3]}]'
+    assert list(iter_array(chunked(content), [1, 'items'])) == [2, 3]
+
+
+def test_iter_array_multibyte_characters():
+    content = u'["caf\xe9", "☃"]'.encode('utf-8')
+    assert list(iter_array(chunked(content))) == [u'caf\xe9', u'☃']
+
+
+def test_iter_array_is_incremental():
+    def chunks():
+        yield b'[{"id": 1},'
+        raise AssertionError('Read past the first item.')
+
+    items = iter_array(chunks())
+    assert next(items) == {'id': 1}
+
+
+def test_iter_array_not_found():
+    with pytest.raises(ParseError) as excinfo:
+        list(iter_array([b'{"results": 1}'], ['results']))
+    assert str(excinfo.value) == "No array found at ['results']."
+
+    with pytest.raises(ParseError):
+        list(iter_array([b'{"count": 1}'], ['results']))
+
+    with pytest.raises(ParseError):
+        list(iter_array([b'[1]'], [2]))
+
+
+def test_iter_array_malformed():
+    with pytest.raises(ParseError):
+        list(iter_array([b'[1, 2']))
+
+    with pytest.raises(ParseError):
+        list(iter_array([b'[1 2]']))
+
+
+def test_get_array():
+    assert get_array({'results': [1, 2]}, ['results']) == [1, 2]
+    with pytest.raises(ParseError):
+        get_array({'results': [1, 2]}, ['missing'])
+
+
+# Codecs.
+
+def test_json_iter_decode():
+    codec = JSONCodec()
+    items = list(codec.iter_decode(chunked(b'{"results": [{"b": 1, "a": 2}]}', 5), ['results']))
+    assert items == [{'b': 1, 'a': 2}]
+    assert list(items[0].keys()) == ['b', 'a']
+
+
+def test_corejson_iter_decode():
+    codec = CoreJSONCodec()
+    content = json.dumps({
+        '_type': 'document',
+        '_meta': {'url': '/'},
+        'results': [
+            {'name': 'a', 'detail': {'_type': 'link', 'url': '/a/'}},
+            {'_type': 'document', '_meta': {'url': '/b/'}, 'results': 1}
+        ]
+    }).encode('utf-8')
+    items = list(codec.iter_decode(chunked(content, 7), ['results'], base_url='http://example.org/'))
+    assert items[0] == Object({'name': 'a', 'detail': Link(url='http://example.org/a/')})
+    assert items[1] == Document(url='http://example.org/b/', content={'results': 1})
+
+
+def test_corejson_iter_decode_escaped_key():
+    codec = CoreJSONCodec()
+    content = b'{"_type": "document", "__type": [1, 2]}'
+    assert list(codec.iter_decode([content], ['_type'])) == [1, 2]
+
+
+def test_corejson_iter_decode_document_url():
+    codec = CoreJSONCodec()
+    content = json.dumps({
+        '_type': 'document',
+        '_meta': {'url': 'http://api.example.com/v2/items/'},
+        'results': [{'_type': 'link', 'url': '1/'}]
+    }).encode('utf-8')
+    base_url = 'http://lb.internal/items/?page=1'
+    expected = codec.decode(content, base_url=base_url)['results'][0]
+    items = list(codec.iter_decode(chunked(content, 7), ['results'], base_url=base_url))
+    assert items == [expected] == [Link(url='http://api.example.com/v2/items/1/')]
+
+
+def test_corejson_iter_decode_nested_document_url():
+    codec = CoreJSONCodec()
+    content = json.dumps({
+        '_type': 'document',
+        '_meta': {'url': 'http://example.com/api/'},
+        'page': {
+            '_type': 'document',
+            '_meta': {'url': 'items/'},
+            'results': [{'_type': 'link', 'url': '1/'}]
+        }
+    }).encode('utf-8')
+    items = list(codec.iter_decode([content], ['page', 'results'], base_url='http://lb.internal/'))
+    assert items == [Link(url='http://example.com/api/items/1/')]
+
+
+# Client.stream()
+
+def items_handler(request):
+    content = {
+        '_type': 'document',
+        'count': 3,
+        'results': [{'id': 1}, {'id': 2}, {'id': 3}],
+        'next': None
+    }
+    return Response(200, {'Content-Type': 'application/coreapi+json'}, json.dumps(content).encode('utf-8'))
+
+
+def test_stream(local_server):
+    local_server.handler = items_handler
+    document = Document(content={'items': Link(url=local_server.url + '/items/')})
+    client = Client()
+    items = list(client.stream(document, ['items'], path=['results']))
+    assert items == [{'id': 1}, {'id': 2}, {'id': 3}]
+    assert all(isinstance(item, Object) for item in items)
+
+
+def test_stream_plain_json(local_server):
+    local_server.handler = lambda request: Response(200, {'Content-Type': 'application/json'}, b'[1, 2, 3]')
+    document = Document(content={'items': Link(url=local_server.url + '/items/')})
+    client = Client()
+    assert list(client.stream(document, ['items'])) == [1, 2, 3]
+
+
+def test_stream_error(local_server):
+    local_server.handler = lambda request: Response(
+        404, {'Content-Type': 'application/coreapi+json'}, b'{"_type": "error", "detail": "Not found."}'
+    )
+    document = Document(content={'items': Link(url=local_server.url + '/items/')})
+    client = Client()
+    with pytest.raises(ErrorMessage):
+        list(client.stream(document, ['items'], path=['results']))
+
+
+def test_stream_records_stats(local_server):
+    local_server.handler = items_handler
+    document = Document(content={'items': Link(url=local_server.url + '/items/')})
+    client = Client(stats=True)
+    list(client.stream(document, ['items'], path='results'))
+    stats = client.stats()
+    assert stats['GET %s/items/' % local_server.url]['requests'] == 1
+
+
+def test_stream_validates_eagerly():
+    document = Document(content={'items': Link(url='http://example.org/items/', fields=[Field('page')])})
+    client = Client()
+    with pytest.raises(LinkLookupError):
+        client.stream(document, ['missing'])
+    with pytest.raises(ParameterError):
+        client.stream(document, ['items'], params={'unknown': 1})
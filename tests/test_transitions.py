@@ -1,5 +1,6 @@
 # coding: utf-8
-from coreapi import Document, Link, Client
+from coreapi import Document, Link, Client, Error
+from coreapi.exceptions import ErrorMessage, ParameterError
 from coreapi.transports import HTTPTransport
 from coreapi.transports.http import _handle_inplace_replacements
 import pytest
@@ -81,3 +82,54 @@ def test_override_transform(doc):
     new = client.action(doc, ['nested', 'update'], params={'foo': 456}, overrides={'transform': 'new'})
     assert new == {'new': 123, 'foo': 456}
     assert new.title == 'new'
+
+
+# Test batches of actions.
+
+def test_action_many(doc):
+    results = client.action_many(doc, [
+        (['nested', 'create'], {'foo': idx})
+        for idx in range(20)
+    ], max_workers=4)
+    assert results == [{'new': 123, 'foo': idx} for idx in range(20)]
+
+
+def test_action_many_empty(doc):
+    assert client.action_many(doc, []) == []
+
+
+def test_action_many_validates_all_calls_first():
+    calls = []
+
+    class RecordingTransport(MockTransport):
+        def transition(self, link, decoders, params=None, link_ancestors=None):
+            calls.append(link)
+            return super(RecordingTransport, self).transition(link, decoders, params, link_ancestors)
+
+    recording_client = Client(transports=[RecordingTransport()])
+    doc = Document(content={'create': Link(url='mock://example.com', action='post', fields=['foo'])})
+    with pytest.raises(ParameterError):
+        recording_client.action_many(doc, [
+            (['create'], {'foo': 1}),
+            (['create'], {'bar': 2})
+        ])
+    assert calls == []
+
+
+def test_action_many_returns_exceptions():
+    class FailingTransport(MockTransport):
+        def transition(self, link, decoders, params=None, link_ancestors=None):
+            if params.get('foo') == 'fail':
+                raise ErrorMessage(Error(title='failed'))
+            return super(FailingTransport, self).transition(link, decoders, params, link_ancestors)
+
+    failing_client = Client(transports=[FailingTransport()])
+    doc = Document(content={'create': Link(url='mock://example.com', action='post', fields=['foo'])})
+    results = failing_client.action_many(doc, [
+        (['create'], {'foo': 1}),
+        (['create'], {'foo': 'fail'}),
+        (['create'], {'foo': 3})
+    ])
+    assert results[0] == {'new': 123, 'foo': 1}
+    assert isinstance(results[1], ErrorMessage)
+    assert results[2] == {'new': 123, 'foo': 3}
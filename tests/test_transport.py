@@ -1,13 +1,23 @@
 # coding: utf-8
 from coreapi import Document, Link, Field
-from coreapi.codecs import CoreJSONCodec
+from coreapi.codecs import CoreJSONCodec, DownloadCodec
 from coreapi.compat import force_text
-from coreapi.exceptions import NetworkError
+from coreapi.exceptions import ErrorMessage, NetworkError
 from coreapi.transports import HTTPTransport
-from coreapi.utils import determine_transport
+from coreapi.transports.coalesce import SingleFlight
+from coreapi.transports.http import PoolingAdapter
+from coreapi.transports.multipart import MultipartEncoder
+from coreapi.utils import determine_transport, File
+from conftest import Response
+from urllib3.filepost import encode_multipart_formdata
+import hashlib
+import io
 import pytest
 import requests
 import json
+import threading
+import time
+import zlib
 
 
 decoders = [CoreJSONCodec()]
@@ -112,3 +122,352 @@ def test_delete(monkeypatch, http):
     link = Link(url='http://example.org', action='delete')
     doc = http.transition(link, decoders)
     assert doc is None
+
+
+# Test connection pooling.
+
+def test_pool_options_mount_adapter():
+    transport = HTTPTransport(pool_maxsize=20, pool_block=True)
+    adapter = transport._session.get_adapter('https://example.org/')
+    assert isinstance(adapter, PoolingAdapter)
+    assert adapter._pool_maxsize == 20
+    assert adapter._pool_block is True
+
+
+def test_default_adapter_unchanged():
+    transport = HTTPTransport()
+    adapter = transport._session.get_adapter('https://example.org/')
+    assert not isinstance(adapter, PoolingAdapter)
+
+
+def test_host_pool_overrides():
+    transport = HTTPTransport(pool_maxsize=20, host_pools={
+        'api.example.org': {'pool_maxsize': 50}
+    })
+    adapter = transport._session.get_adapter('https://api.example.org/users/')
+    assert adapter._pool_maxsize == 50
+    adapter = transport._session.get_adapter('http://api.example.org/users/')
+    assert adapter._pool_maxsize == 50
+    adapter = transport._session.get_adapter('https://other.example.org/')
+    assert adapter._pool_maxsize == 20
+
+
+def test_host_pool_unknown_option():
+    with pytest.raises(AssertionError):
+        HTTPTransport(host_pools={'api.example.org': {'maxsize': 50}})
+
+
+def test_pool_options_with_session():
+    session = requests.Session()
+    transport = HTTPTransport(session=session, pool_maxsize=5)
+    assert transport._session is session
+    assert isinstance(session.get_adapter('http://example.org/'), PoolingAdapter)
+
+
+def test_pool_stats(local_server):
+    transport = HTTPTransport(pool_maxsize=4)
+    link = Link(url=local_server.url + '/', action='get')
+    transport.transition(link, decoders)
+    transport.transition(link, decoders)
+
+    stats = transport.pool_stats()
+    host = 'http://127.0.0.1:%d' % local_server.server_address[1]
+    assert stats[host]['maxsize'] == 4
+    assert stats[host]['in_use'] == 0
+    assert stats[host]['idle'] == 1
+    assert stats[host]['num_connections'] == 1
+    assert stats[host]['num_requests'] == 2
+
+
+def test_pool_idle_eviction(local_server):
+    transport = HTTPTransport(pool_idle_timeout=0)
+    port = local_server.server_address[1]
+    transport.transition(Link(url='http://127.0.0.1:%d/' % port), decoders)
+    assert list(transport.pool_stats().keys()) == ['http://127.0.0.1:%d' % port]
+
+    transport.transition(Link(url='http://localhost:%d/' % port), decoders)
+    assert list(transport.pool_stats().keys()) == ['http://localhost:%d' % port]
+
+
+# Test streaming downloads.
+
+def test_streaming_download(local_server, tmpdir):
+    content = b'abcdefghij' * 10000
+    local_server.handler = lambda request: Response(200, {'Content-Type': 'image/png'}, content)
+
+    codec = DownloadCodec(download_dir=str(tmpdir), chunk_size=1024, checksum='sha256')
+    link = Link(url=local_server.url + '/download/')
+    download = HTTPTransport().transition(link, [CoreJSONCodec(), codec])
+    assert download.basename == 'download.png'
+    assert download.read() == content
+    assert download.checksum == hashlib.sha256(content).hexdigest()
+    assert tmpdir.listdir() == [tmpdir.join('download.png')]
+
+
+def test_streaming_download_in_chunks(local_server):
+    chunks = []
+
+    class RecordingCodec(DownloadCodec):
+        def decode_stream(self, stream, **options):
+            for chunk in stream:
+                chunks.append(chunk)
+            return b''.join(chunks)
+
+    local_server.handler = lambda request: Response(200, {'Content-Type': 'image/png'}, b'x' * 10000)
+    link = Link(url=local_server.url + '/download/')
+    content = HTTPTransport().transition(link, [RecordingCodec(chunk_size=1000)])
+    assert content == b'x' * 10000
+    assert len(chunks) == 10
+
+
+def test_streaming_download_empty_response(local_server):
+    local_server.handler = lambda request: Response(200, {'Content-Type': 'image/png'}, b'')
+    link = Link(url=local_server.url + '/download/')
+    assert HTTPTransport().transition(link, [DownloadCodec()]) is None
+
+
+def test_streaming_download_error_response(local_server):
+    local_server.handler = lambda request: Response(404, {'Content-Type': 'text/plain'}, b'Not found')
+    link = Link(url=local_server.url + '/download/')
+    with pytest.raises(ErrorMessage) as exc:
+        HTTPTransport().transition(link, [DownloadCodec()])
+    assert exc.value.error.title == '404 Not Found'
+
+
+# Test streaming uploads.
+
+def test_multipart_encoder_matches_requests():
+    data = {'a': '123', 'b': ['x', 'y']}
+    files = {'upload': File('example.txt', b'abc', 'text/plain'), 'other': File('other.bin', 'def')}
+    encoder = MultipartEncoder(data, files, boundary='boundary')
+    fields = [
+        ('a', '123'), ('b', 'x'), ('b', 'y'),
+        ('upload', ('example.txt', b'abc', 'text/plain')),
+        ('other', ('other.bin', b'def', None))
+    ]
+    expected, content_type = encode_multipart_formdata(fields, boundary='boundary')
+    assert encoder.read() == expected
+    assert encoder.length == len(expected)
+    assert encoder.content_type == content_type
+
+
+def test_multipart_encoder_reads_incrementally():
+    encoder = MultipartEncoder({}, {'upload': io.BytesIO(b'x' * 100)}, chunk_size=10)
+    assert len(encoder.read(5)) == 5
+    assert encoder.tell() == 5
+    remaining = encoder.read()
+    assert len(remaining) == len(encoder) - 5
+
+
+def test_multipart_upload_with_content_length(local_server, tmpdir):
+    path = tmpdir.join('example.txt')
+    path.write_binary(b'abc' * 1000)
+    link = Link(url=local_server.url + '/', action='post', encoding='multipart/form-data', fields=['upload'])
+    with open(str(path), 'rb') as upload:
+        HTTPTransport().transition(link, decoders, params={'upload': upload})
+
+    request = local_server.requests[0]
+    assert int(request.headers['Content-Length']) == len(request.body)
+    assert b'filename="example.txt"' in request.body
+    assert b'abc' * 1000 in request.body
+
+
+def test_multipart_upload_chunked(local_server):
+    def generate():
+        for idx in range(10):
+            yield b'chunk %d\n' % idx
+
+    link = Link(url=local_server.url + '/', action='post', encoding='multipart/form-data', fields=['upload'])
+    HTTPTransport().transition(link, decoders, params={'upload': File('example.txt', generate())})
+
+    request = local_server.requests[0]
+    assert request.headers['Transfer-Encoding'] == 'chunked'
+    assert b''.join([b'chunk %d\n' % idx for idx in range(10)]) in request.body
+
+
+def test_raw_upload_streamed(local_server, tmpdir):
+    path = tmpdir.join('example.bin')
+    path.write_binary(b'x' * 10000)
+    link = Link(url=local_server.url + '/', action='post', encoding='application/octet-stream', fields=[
+        Field('upload', location='body')
+    ])
+    with open(str(path), 'rb') as upload:
+        HTTPTransport().transition(link, decoders, params={'upload': upload})
+
+    request = local_server.requests[0]
+    assert request.headers['Content-Length'] == '10000'
+    assert request.headers['Content-Disposition'] == 'attachment; filename="example.bin"'
+    assert request.body == b'x' * 10000
+
+
+# Test compression.
+
+def test_request_compression(local_server):
+    transport = HTTPTransport(compress_requests='gzip', compress_threshold=100)
+    link = Link(url=local_server.url + '/', action='post', fields=['data'])
+    data = 'x' * 1000
+    transport.transition(link, decoders, params={'data': data})
+
+    request = local_server.requests[0]
+    assert request.headers['Content-Encoding'] == 'gzip'
+    assert json.loads(zlib.decompress(request.body, 16 + zlib.MAX_WBITS).decode('utf-8')) == {'data': data}
+    stats = transport.transfer_stats.as_dict()
+    assert stats['request_bytes'] == len(json.dumps({'data': data}))
+    assert stats['request_bytes_compressed'] == len(request.body)
+
+
+def test_request_compression_below_threshold(local_server):
+    transport = HTTPTransport(compress_requests='deflate', compress_threshold=1000)
+    link = Link(url=local_server.url + '/', action='post', fields=['data'])
+    transport.transition(link, decoders, params={'data': 'abc'})
+
+    request = local_server.requests[0]
+    assert 'Content-Encoding' not in request.headers
+    assert json.loads(request.body.decode('utf-8')) == {'data': 'abc'}
+
+
+def test_unsupported_request_compression():
+    with pytest.raises(AssertionError):
+        HTTPTransport(compress_requests='unknown')
+
+
+def test_compressed_response(local_server):
+    content = b'{"_type": "document", "data": "' + b'x' * 1000 + b'"}'
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    compressed = compressor.compress(content) + compressor.flush()
+    local_server.handler = lambda request: Response(200, {
+        'Content-Type': 'application/coreapi+json',
+        'Content-Encoding': 'gzip'
+    }, compressed)
+
+    transport = HTTPTransport(accept_encoding=True)
+    doc = transport.transition(Link(url=local_server.url + '/'), decoders)
+    assert doc == {'data': 'x' * 1000}
+    assert 'gzip' in local_server.requests[0].headers['Accept-Encoding']
+    stats = transport.transfer_stats.as_dict()
+    assert stats['response_bytes'] == len(content)
+    assert stats['response_bytes_compressed'] == len(compressed)
+
+
+# Test environment settings.
+
+def test_environment_settings_cached(monkeypatch, local_server):
+    calls = []
+    merge_environment_settings = requests.Session.merge_environment_settings
+
+    def mock_merge(self, url, *args):
+        calls.append(url)
+        return merge_environment_settings(self, url, *args)
+
+    monkeypatch.setattr(requests.Session, 'merge_environment_settings', mock_merge)
+
+    transport = HTTPTransport()
+    transport.transition(Link(url=local_server.url + '/a/'), decoders)
+    transport.transition(Link(url=local_server.url + '/b/'), decoders)
+    assert len(calls) == 1
+
+    transport.refresh_environment()
+    transport.transition(Link(url=local_server.url + '/c/'), decoders)
+    assert len(calls) == 2
+
+    transport = HTTPTransport(cache_environment=False)
+    transport.transition(Link(url=local_server.url + '/a/'), decoders)
+    transport.transition(Link(url=local_server.url + '/b/'), decoders)
+    assert len(calls) == 4
+
+
+def test_environment_settings_per_host(monkeypatch):
+    monkeypatch.setenv('REQUESTS_CA_BUNDLE', '/example/ca-bundle.crt')
+    transport = HTTPTransport()
+    settings = transport._get_environment_settings('https://example.org/a/')
+    assert settings['verify'] == '/example/ca-bundle.crt'
+    assert transport._get_environment_settings('https://example.org/b/') is settings
+    assert transport._get_environment_settings('http://example.org/a/') is not settings
+    assert transport._get_environment_settings('https://other.example.org/a/') is not settings
+
+
+# Test request coalescing.
+
+def _run_concurrently(func, count):
+    results = [None] * count
+
+    def run(idx):
+        results[idx] = func()
+
+    threads = [threading.Thread(target=run, args=(idx,)) for idx in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads, results
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.01)
+
+
+def test_coalesced_requests(local_server):
+    release = threading.Event()
+
+    def handler(request):
+        release.wait(5)
+        return Response(200, {'Content-Type': 'application/coreapi+json'}, b'{"_type": "document", "a": 1}')
+
+    local_server.handler = handler
+    transport = HTTPTransport(coalesce_requests=True)
+    link = Link(url=local_server.url + '/', fields=[Field('page', location='query')])
+    threads, results = _run_concurrently(lambda: transport.transition(link, decoders, params={'page': 2}), 5)
+    _wait_for(lambda: len(local_server.requests) == 1)
+    time.sleep(0.1)  # Allow the remaining threads to join the in-flight request.
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(local_server.requests) == 1
+    assert local_server.requests[0].path == '/?page=2'
+    assert results == [results[0]] * 5
+    assert results[0] == {'a': 1}
+    assert transport.coalesced_requests == 4
+
+
+def test_unsafe_requests_not_coalesced(local_server):
+    def handler(request):
+        _wait_for(lambda: len(local_server.requests) == 2)
+        return Response(200, {'Content-Type': 'application/coreapi+json'}, b'{"_type": "document"}')
+
+    local_server.handler = handler
+    transport = HTTPTransport(coalesce_requests=True)
+    link = Link(url=local_server.url + '/', action='post')
+    threads, results = _run_concurrently(lambda: transport.transition(link, decoders), 2)
+    for thread in threads:
+        thread.join()
+
+    assert len(local_server.requests) == 2
+    assert transport.coalesced_requests == 0
+
+
+def test_singleflight_shares_exceptions():
+    singleflight = SingleFlight()
+    release = threading.Event()
+    outcomes = []
+
+    def fail():
+        release.wait(5)
+        raise ValueError('failed')
+
+    def call():
+        try:
+            singleflight.do('key', fail)
+        except ValueError as exc:
+            outcomes.append(exc)
+
+    threads, results = _run_concurrently(call, 3)
+    _wait_for(lambda: len(singleflight) == 1)
+    time.sleep(0.1)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(outcomes) == 3
+    assert len(set([id(exc) for exc in outcomes])) == 1
+    assert len(singleflight) == 0
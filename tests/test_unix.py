@@ -0,0 +1,104 @@
+# coding: utf-8
+from coreapi import Client, Field, Link
+from coreapi.codecs import CoreJSONCodec
+from coreapi.compat import urlparse
+from coreapi.exceptions import ErrorMessage
+from coreapi.transports import HTTPTransport, UnixSocketTransport
+from coreapi.transports.unix import get_socket_url
+from coreapi.utils import determine_transport
+from conftest import Response
+import json
+import pytest
+import requests
+
+
+decoders = [CoreJSONCodec()]
+
+
+def test_socket_url():
+    assert get_socket_url('/var/run/api.sock') == 'http+unix://%2Fvar%2Frun%2Fapi.sock/'
+    assert get_socket_url('/var/run/api.sock', '/users/') == 'http+unix://%2Fvar%2Frun%2Fapi.sock/users/'
+
+
+def test_determine_transport():
+    unix = UnixSocketTransport()
+    transports = [HTTPTransport(), unix]
+    assert determine_transport(transports, 'http+unix://%2Fvar%2Frun%2Fapi.sock/') is unix
+
+
+def test_transition(unix_server):
+    unix_server.handler = lambda request: Response(
+        200, {'Content-Type': 'application/coreapi+json'}, b'{"_type": "document", "path": "%s"}' % request.path.encode('ascii')
+    )
+    transport = UnixSocketTransport()
+    link = Link(url=get_socket_url(unix_server.server_address, '/users/'), fields=[Field('page', location='query')])
+    document = transport.transition(link, decoders, params={'page': 2})
+    assert document == {'path': '/users/?page=2'}
+    assert unix_server.requests[0].headers['Host'] == 'localhost'
+
+
+def test_post_and_error(unix_server):
+    unix_server.handler = lambda request: Response(
+        400, {'Content-Type': 'application/coreapi+json'}, b'{"_type": "error", "example": 123}'
+    )
+    transport = UnixSocketTransport()
+    link = Link(url=get_socket_url(unix_server.server_address), action='post', fields=[Field('example')])
+    with pytest.raises(ErrorMessage) as exc:
+        transport.transition(link, decoders, params={'example': 123})
+    assert exc.value.error['example'] == 123
+    assert json.loads(unix_server.requests[0].body.decode('utf-8')) == {'example': 123}
+
+
+def test_relative_urls(unix_server):
+    unix_server.handler = lambda request: Response(
+        200, {'Content-Type': 'application/coreapi+json'},
+        b'{"_type": "document", "_meta": {"url": "/"}, "users": {"_type": "link", "url": "/users/"}}'
+    )
+    client = Client(unix_sockets=True)
+    document = client.get(get_socket_url(unix_server.server_address))
+    assert document['users'].url == get_socket_url(unix_server.server_address, '/users/')
+
+
+def test_connection_pooling(unix_server):
+    transport = UnixSocketTransport(pool_maxsize=2)
+    link = Link(url=get_socket_url(unix_server.server_address))
+    for idx in range(3):
+        transport.transition(link, decoders)
+    stats = transport.pool_stats()[get_socket_url(unix_server.server_address, path='')]
+    assert stats['num_connections'] == 1
+    assert stats['num_requests'] == 3
+    assert stats['maxsize'] == 2
+    assert stats['idle'] == 1
+
+
+def test_missing_socket(tmpdir):
+    transport = UnixSocketTransport()
+    link = Link(url=get_socket_url(str(tmpdir.join('missing.sock'))))
+    with pytest.raises(requests.ConnectionError):
+        transport.transition(link, decoders)
+
+
+def test_default_transports():
+    assert [transport.__class__ for transport in Client().transports] == [HTTPTransport]
+    assert [transport.__class__ for transport in Client(unix_sockets=True).transports] == [
+        HTTPTransport, UnixSocketTransport
+    ]
+
+
+def test_session_not_modified():
+    session = requests.Session()
+    adapters = dict(session.adapters)
+    client = Client(session=session, unix_sockets=True)
+    assert session.adapters == adapters
+    assert client.transports[1]._session is not session
+
+
+def test_scheme_registered_on_first_use(monkeypatch):
+    monkeypatch.setattr(urlparse, 'uses_relative', [scheme for scheme in urlparse.uses_relative if scheme != 'http+unix'])
+    monkeypatch.setattr(urlparse, 'uses_netloc', [scheme for scheme in urlparse.uses_netloc if scheme != 'http+unix'])
+    assert urlparse.urljoin(get_socket_url('/api.sock'), 'users/') == 'users/'
+    UnixSocketTransport()
+    UnixSocketTransport()
+    assert urlparse.uses_relative.count('http+unix') == 1
+    assert urlparse.uses_netloc.count('http+unix') == 1
+    assert urlparse.urljoin(get_socket_url('/api.sock'), 'users/') == get_socket_url('/api.sock', '/users/')
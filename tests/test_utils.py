@@ -88,3 +88,10 @@ def test_validate_form_data():
         assert utils.validate_form_param(123, '')
     with pytest.raises(exceptions.NetworkError):
         assert utils.validate_body_param(123, 'invalid/media-type')
+
+
+def test_format_time():
+    assert utils.format_time(1.5) == '1.50s'
+    assert utils.format_time(0.0015) == '1.50ms'
+    assert utils.format_time(0.0000015) == '1.50us'
+    assert utils.format_time(0.0000000015) == '2ns'
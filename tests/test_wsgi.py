@@ -0,0 +1,151 @@
+# coding: utf-8
+from coreapi import Client, Field, Link
+from coreapi.codecs import CoreJSONCodec, DownloadCodec
+from coreapi.exceptions import ErrorMessage
+from coreapi.transports import ASGITransport, HTTPTransport, WSGITransport
+from coreapi.transports.asgi import ASGIAdapter
+from coreapi.utils import determine_transport
+import asyncio
+import json
+import pytest
+import requests
+import threading
+
+
+decoders = [CoreJSONCodec(), DownloadCodec()]
+
+
+def echo_content(method, path, query, headers, body):
+    return json.dumps({
+        '_type': 'document',
+        'method': method,
+        'path': path,
+        'query': query,
+        'host': headers.get('host'),
+        'body': body.decode('utf-8')
+    }).encode('utf-8')
+
+
+class EchoApplication(object):
+    """
+    A WSGI application that echos back the request.
+    """
+    def __init__(self):
+        self.closed = 0
+
+    def __call__(self, environ, start_response):
+        body = environ['wsgi.input'].read(int(environ.get('CONTENT_LENGTH') or 0))
+        headers = {'host': environ.get('HTTP_HOST')}
+        if environ['PATH_INFO'] == '/missing/':
+            start_response('404 Not Found', [('Content-Type', 'application/coreapi+json')])
+            return [b'{"_type": "error", "detail": "Not found"}']
+        content = echo_content(
+            environ['REQUEST_METHOD'], environ['PATH_INFO'], environ['QUERY_STRING'], headers, body
+        )
+        return self.iter_response(start_response, content)
+
+    def iter_response(self, start_response, content):
+        try:
+            start_response('200 OK', [('Content-Type', 'application/coreapi+json')])
+            yield content[:10]
+            yield content[10:]
+        finally:
+            self.closed += 1
+
+
+async def echo_asgi_application(scope, receive, send):
+    message = await receive()
+    headers = dict([(key.decode('latin-1'), value.decode('latin-1')) for key, value in scope['headers']])
+    if scope['path'] == '/missing/':
+        status, content = 404, b'{"_type": "error", "detail": "Not found"}'
+    else:
+        status = 200
+        content = echo_content(
+            scope['method'], scope['path'], scope['query_string'].decode('latin-1'), headers, message['body']
+        )
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', b'application/coreapi+json')]
+    })
+    await send({'type': 'http.response.body', 'body': content[:10], 'more_body': True})
+    await send({'type': 'http.response.body', 'body': content[10:]})
+
+
+@pytest.fixture(params=['wsgi', 'asgi'])
+def transport(request):
+    if request.param == 'wsgi':
+        transport = WSGITransport(EchoApplication())
+    else:
+        transport = ASGITransport(echo_asgi_application)
+    yield transport
+    transport.close()
+
+
+def test_get(transport):
+    link = Link(url='http://example.org/a%20b/', fields=[Field('page', location='query')])
+    document = transport.transition(link, decoders, params={'page': 2})
+    assert document == {
+        'method': 'GET',
+        'path': '/a b/',
+        'query': 'page=2',
+        'host': 'example.org',
+        'body': ''
+    }
+
+
+def test_post(transport):
+    link = Link(url='http://example.org/', action='post', fields=[Field('example')])
+    document = transport.transition(link, decoders, params={'example': 123})
+    assert document['method'] == 'POST'
+    assert json.loads(document['body']) == {'example': 123}
+
+
+def test_error(transport):
+    with pytest.raises(ErrorMessage) as exc:
+        transport.transition(Link(url='http://example.org/missing/'), decoders)
+    assert exc.value.error['detail'] == 'Not found'
+
+
+def test_wsgi_response_closed():
+    app = EchoApplication()
+    transport = WSGITransport(app)
+    transport.transition(Link(url='http://example.org/'), decoders)
+    assert app.closed == 1
+
+
+def test_transport_hosts():
+    internal = WSGITransport(EchoApplication(), hosts=['api.internal', 'localhost:8000'])
+    transports = [internal, HTTPTransport()]
+    assert determine_transport(transports, 'http://api.internal/users/') is internal
+    assert determine_transport(transports, 'https://API.internal:443/') is internal
+    assert determine_transport(transports, 'http://localhost:8000/') is internal
+    assert determine_transport(transports, 'http://localhost:8001/') is not internal
+    assert determine_transport(transports, 'http://example.org/') is not internal
+
+
+def test_client_with_wsgi_transport():
+    client = Client(transports=[WSGITransport(EchoApplication(), hosts=['api.internal'])])
+    document = client.get('http://api.internal/')
+    assert document['path'] == '/'
+
+
+def test_asgi_timeout():
+    cancelled = threading.Event()
+
+    async def slow_application(scope, receive, send):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    adapter = ASGIAdapter(slow_application)
+    request = requests.Request('GET', 'http://example.org/').prepare()
+    try:
+        with pytest.raises(requests.exceptions.ReadTimeout):
+            adapter.send(request, timeout=0.05)
+        # The application is cancelled in the event loop's thread.
+        assert cancelled.wait(1.0)
+    finally:
+        adapter.close()